@@ -0,0 +1,328 @@
+import asyncio
+import json
+import threading
+import time
+from contextlib import ExitStack
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from wikipedia.exceptions import DisambiguationError, PageError
+
+from flashquiz_proj.utils import auth_utils
+
+from ..utils import async_generation, generation, helperfunc
+from ..utils.tokens import estimate_tokens
+
+KID = "bench-key"
+
+
+def _sleep(ms):
+    if ms > 0:
+        time.sleep(ms / 1000)
+
+
+async def _asleep(ms):
+    if ms > 0:
+        await asyncio.sleep(ms / 1000)
+
+
+class LocalSigner:
+    """A throwaway RSA key: signs bench JWTs and serves the matching JWKS."""
+
+    def __init__(self):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.private_pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        public_pem = (
+            key.public_key()
+            .public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            )
+            .decode()
+        )
+        public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+        public_jwk.update(kid=KID, alg="RS256", use="sig")
+        self.jwks = {"keys": [public_jwk]}
+
+    def token(self, user_id, ttl=3600):
+        claims = {"sub": user_id, "exp": int(time.time()) + ttl}
+        if auth_utils.CLERK_ISSUER:
+            claims["iss"] = auth_utils.CLERK_ISSUER
+        return jwt.encode(
+            claims, self.private_pem, algorithm="RS256", headers={"kid": KID}
+        )
+
+
+class FakeJWKSResponse:
+    headers = {"Cache-Control": "public, max-age=3600"}
+
+    def __init__(self, jwks):
+        self._jwks = jwks
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._jwks
+
+
+class FakeClerk:
+    def __init__(self, latency_ms):
+        self.latency_ms = latency_ms
+        self.users = SimpleNamespace(get=self.get_user, get_async=self.aget_user)
+
+    def get_user(self, user_id):
+        _sleep(self.latency_ms)
+        return self._user(user_id)
+
+    async def aget_user(self, user_id):
+        await _asleep(self.latency_ms)
+        return self._user(user_id)
+
+    def _user(self, user_id):
+        return SimpleNamespace(
+            id=user_id,
+            first_name="Bench",
+            last_name=user_id,
+            email_addresses=[],
+        )
+
+
+class FakeWikipediaPage:
+    def __init__(self, title, latency_ms):
+        self.title = title
+        self._latency_ms = latency_ms
+
+    @property
+    def summary(self):
+        # The real library fetches the summary with a second request.
+        _sleep(self._latency_ms)
+        return f"{self.title} is a topic used for benchmarking. " * 40
+
+
+class FakeWikipedia:
+    """Stands in for the `wikipedia` module as used by helperfunc."""
+
+    PageError = PageError
+    DisambiguationError = DisambiguationError
+
+    def __init__(self, latency_ms):
+        self.latency_ms = latency_ms
+
+    def page(self, title, auto_suggest=True):
+        _sleep(self.latency_ms)
+        return FakeWikipediaPage(title.title(), self.latency_ms)
+
+    def search(self, query, results=10):
+        _sleep(self.latency_ms)
+        return [query.title()]
+
+
+def _usage(system, messages, output_tokens, cache):
+    """Bill tokens the way the API does, including prompt-cache reads."""
+    usage = {
+        "input_tokens": 0,
+        "output_tokens": output_tokens,
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 0,
+    }
+    for block in system or ():
+        tokens = estimate_tokens(block["text"])
+        if "cache_control" not in block:
+            usage["input_tokens"] += tokens
+        elif block["text"] in cache:
+            usage["cache_read_input_tokens"] += tokens
+        else:
+            cache.add(block["text"])
+            usage["cache_creation_input_tokens"] += tokens
+    for message in messages:
+        usage["input_tokens"] += estimate_tokens(message["content"])
+    return SimpleNamespace(**usage)
+
+
+CARDS_TEXT = json.dumps(
+    [
+        {
+            "question": f"Benchmark question {i}?",
+            "answer": f"Answer {i}",
+            "hint": f"Hint {i}",
+        }
+        for i in range(5)
+    ],
+    indent=2,
+)
+
+
+class InFlight:
+    """Counts Messages API calls in progress, across threads and event loops."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+        self.calls = 0
+
+    def enter(self):
+        with self._lock:
+            self.current += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.current)
+
+    def exit(self):
+        with self._lock:
+            self.current -= 1
+
+
+class FakeStream:
+    def __init__(self, latency_ms, usage, meter, chunk_size=16):
+        self._latency_ms = latency_ms
+        self._usage = usage
+        self._meter = meter
+        self._chunks = [
+            CARDS_TEXT[i : i + chunk_size]
+            for i in range(0, len(CARDS_TEXT), chunk_size)
+        ]
+
+    def __enter__(self):
+        self._meter.enter()
+        return self
+
+    def __exit__(self, *exc):
+        self._meter.exit()
+        return False
+
+    @property
+    def text_stream(self):
+        for chunk in self._chunks:
+            _sleep(self._latency_ms / len(self._chunks))
+            yield chunk
+
+    def get_final_message(self):
+        return SimpleNamespace(usage=self._usage)
+
+
+class FakeAsyncStream(FakeStream):
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        return self.__exit__(*exc)
+
+    @property
+    async def text_stream(self):
+        for chunk in self._chunks:
+            await _asleep(self._latency_ms / len(self._chunks))
+            yield chunk
+
+    async def get_final_message(self):
+        return SimpleNamespace(usage=self._usage)
+
+
+class FakeAnthropic:
+    """
+    Messages API stand-in: create() sleeps for the whole latency, stream()
+    spreads it over the chunks of a 5-card reply.
+    """
+
+    def __init__(self, latency_ms, meter=None):
+        self.latency_ms = latency_ms
+        self.meter = meter or InFlight()
+        self._cache = set()
+        self._lock = threading.Lock()
+        self.messages = SimpleNamespace(create=self.create, stream=self.stream)
+
+    def _bill(self, kwargs, output_tokens):
+        with self._lock:
+            return _usage(
+                kwargs.get("system"), kwargs["messages"], output_tokens, self._cache
+            )
+
+    def create(self, **kwargs):
+        self.meter.enter()
+        try:
+            _sleep(self.latency_ms)
+        finally:
+            self.meter.exit()
+        return self._reply(kwargs)
+
+    def stream(self, **kwargs):
+        return FakeStream(self.latency_ms, self._bill(kwargs, 300), self.meter)
+
+    def _reply(self, kwargs):
+        if kwargs.get("max_tokens", 0) > 256:
+            text = CARDS_TEXT
+        else:
+            text = "A short summary for the benchmark deck."
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=text)],
+            usage=self._bill(kwargs, estimate_tokens(text)),
+        )
+
+
+class FakeAsyncAnthropic(FakeAnthropic):
+    async def create(self, **kwargs):
+        self.meter.enter()
+        try:
+            await _asleep(self.latency_ms)
+        finally:
+            self.meter.exit()
+        return self._reply(kwargs)
+
+    def stream(self, **kwargs):
+        return FakeAsyncStream(self.latency_ms, self._bill(kwargs, 300), self.meter)
+
+
+def install_fakes(latency, meter=None):
+    """
+    Patch every external dependency with a local fake. `latency` maps
+    "jwks", "clerk", "wikipedia" and "anthropic" to milliseconds per call;
+    `meter` (an InFlight) counts the Anthropic calls made.
+    Returns (ExitStack that undoes the patches, LocalSigner for tokens).
+    """
+    signer = LocalSigner()
+    stack = ExitStack()
+
+    def fetch_jwks(url, timeout=None):
+        _sleep(latency["jwks"])
+        return FakeJWKSResponse(signer.jwks)
+
+    stack.enter_context(
+        mock.patch("flashquiz_proj.utils.jwks.requests.get", fetch_jwks)
+    )
+
+    async def afetch_jwks(client, url, **kwargs):
+        await _asleep(latency["jwks"])
+        return FakeJWKSResponse(signer.jwks)
+
+    # Only get() is replaced: the Anthropic SDK subclasses httpx.AsyncClient.
+    stack.enter_context(mock.patch.object(httpx.AsyncClient, "get", afetch_jwks))
+    stack.enter_context(
+        mock.patch.object(
+            auth_utils, "get_clerk_client", lambda: FakeClerk(latency["clerk"])
+        )
+    )
+    wikipedia = FakeWikipedia(latency["wikipedia"])
+    stack.enter_context(
+        mock.patch.object(helperfunc, "get_wikipedia", lambda: wikipedia)
+    )
+    meter = meter or InFlight()
+    anthropic = FakeAnthropic(latency["anthropic"], meter)
+    stack.enter_context(mock.patch.object(generation, "get_client", lambda: anthropic))
+    async_anthropic = FakeAsyncAnthropic(latency["anthropic"], meter)
+    stack.enter_context(
+        mock.patch.object(async_generation, "get_async_client", lambda: async_anthropic)
+    )
+
+    # Start cold, so the first requests pay for the JWKS fetch.
+    auth_utils.jwks_store.clear()
+    auth_utils.token_cache.clear()
+    auth_utils.user_cache.clear()
+    return stack, signer
@@ -0,0 +1,210 @@
+import json
+import os
+import queue
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import async_to_sync
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from ..utils.tokens import token_usage
+
+
+@contextmanager
+def bench_database(keepdb=False):
+    """A throwaway test database (and test environment) for one bench run."""
+    setup_test_environment()
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    if connection.vendor == "sqlite" and not test_settings.get("NAME"):
+        # An in-memory SQLite database is not shared between threads.
+        test_settings["NAME"] = os.path.join(
+            tempfile.gettempdir(), "flashquiz_bench.sqlite3"
+        )
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, keepdb=keepdb
+    )
+    try:
+        yield
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _send(client, tokens, request):
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {tokens[request.user_id]}"}
+    if request.body is None:
+        response = getattr(client, request.method)(request.path, **headers)
+    else:
+        response = getattr(client, request.method)(
+            request.path,
+            data=json.dumps(request.body),
+            content_type="application/json",
+            **headers,
+        )
+    # Streaming responses do their work while being read.
+    if response.streaming:
+        if response.is_async:
+            async_to_sync(_drain)(response.streaming_content)
+        else:
+            b"".join(response.streaming_content)
+    return response
+
+
+async def _drain(streaming_content):
+    async for _ in streaming_content:
+        pass
+
+
+def _input_tokens():
+    return sum(
+        stage["input_tokens"]
+        + stage["cache_creation_input_tokens"]
+        + stage["cache_read_input_tokens"]
+        for stage in token_usage.stats().values()
+    )
+
+
+def summarize(latencies, elapsed, errors, queries=None, tokens=None):
+    """p50/p95/p99 in ms, throughput per second and per-request averages."""
+    count = len(latencies)
+    if count > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else 0.0
+    result = {
+        "requests": count,
+        "errors": errors,
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "p99_ms": round(p99 * 1000, 3),
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+    }
+    if queries is not None:
+        result["queries_per_request"] = round(queries / max(count, 1), 2)
+    if tokens:
+        result["input_tokens_per_request"] = round(tokens / max(count, 1), 1)
+    return result
+
+
+def run_scenario(scenario, fixture, signer, count, concurrency):
+    """
+    Send `count` requests for one scenario from `concurrency` threads, each
+    with its own test Client and database connection.
+    """
+    if scenario.prepare:
+        scenario.prepare(fixture, count)
+    requests = [scenario.build(fixture, i) for i in range(count)]
+    # Like a browser session, each user reuses one token across requests.
+    tokens = {user_id: signer.token(user_id) for user_id in fixture.users}
+
+    pending = queue.Queue()
+    for request in requests:
+        pending.put(request)
+
+    lock = threading.Lock()
+    latencies = []
+    failures = []
+    totals = {"queries": 0}
+
+    def worker():
+        # Unhandled view errors come back as 500s instead of killing the thread.
+        client = Client(raise_request_exception=False)
+        try:
+            while True:
+                try:
+                    request = pending.get_nowait()
+                except queue.Empty:
+                    return
+                if scenario.before:
+                    scenario.before()
+                counter = QueryCounter()
+                start = time.perf_counter()
+                with connection.execute_wrapper(counter):
+                    response = _send(client, tokens, request)
+                took = time.perf_counter() - start
+                with lock:
+                    latencies.append(took)
+                    totals["queries"] += counter.count
+                    if response.status_code not in scenario.expect:
+                        failures.append(response.status_code)
+        finally:
+            connection.close()
+
+    tokens_before = _input_tokens()
+    counters_before = scenario.counters() if scenario.counters else {}
+    concurrency = scenario.concurrency or concurrency
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    result = summarize(
+        latencies,
+        elapsed,
+        len(failures),
+        queries=totals["queries"],
+        tokens=_input_tokens() - tokens_before,
+    )
+    if scenario.counters:
+        counters = scenario.counters()
+        result["counters"] = {
+            name: value - counters_before[name] for name, value in counters.items()
+        }
+    if failures:
+        result["error_statuses"] = sorted(set(failures))
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """
+    Regressions of `results` against a saved baseline: p95 latency or queries
+    per request above baseline * (1 + tolerance), throughput below
+    baseline / (1 + tolerance), or more errors. Query counts get the same
+    slack because cached GETs make them depend on request interleaving.
+    Scenarios missing from either side are skipped.
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {current['p95_ms']}ms > baseline {base['p95_ms']}ms"
+            )
+        if current["throughput_rps"] < base["throughput_rps"] / (1 + tolerance):
+            regressions.append(
+                f"{name}: throughput {current['throughput_rps']}/s"
+                f" < baseline {base['throughput_rps']}/s"
+            )
+        if current.get("queries_per_request", 0) > base.get(
+            "queries_per_request", float("inf")
+        ) * (1 + tolerance):
+            regressions.append(
+                f"{name}: {current['queries_per_request']} queries/request"
+                f" > baseline {base['queries_per_request']}"
+            )
+        if current["errors"] > base["errors"]:
+            regressions.append(
+                f"{name}: {current['errors']} errors > baseline {base['errors']}"
+            )
+    return regressions
@@ -0,0 +1,509 @@
+import json
+import time
+from itertools import islice
+
+from django.db import transaction
+from rest_framework.pagination import Cursor
+
+from flashquiz_proj.utils import auth_utils
+
+from ..models import Deck, Feedback, Flashcard
+from ..pagination import KeysetPagination
+from ..utils.card_parser import parse_cards
+from ..utils.jobs import enqueue_generation
+
+DECKS_PER_USER = 20
+CARDS_PER_DECK = 10
+# Rows per INSERT while seeding, so large fixtures never sit in memory whole.
+SEED_BATCH = 5000
+# How far into a list the deep-page scenarios start reading.
+DEEP_PAGE_AT = 0.9
+
+
+class Request:
+    """One request a scenario makes: user, method, path and JSON body."""
+
+    def __init__(self, user_id, method, path, body=None):
+        self.user_id = user_id
+        self.method = method
+        self.path = path
+        self.body = body
+
+
+class Scenario:
+    """
+    A named load against one URL. `build(fixture, i)` returns the i-th
+    Request; objects it needs are created in `prepare(fixture, count)`
+    before the clock starts, so DELETEs and PUTs each get their own row.
+    `before()` runs ahead of every request, outside its timing (e.g. to
+    empty a cache), and the change in `counters()` over the run is reported.
+    `concurrency` overrides the command's --concurrency.
+    """
+
+    def __init__(
+        self,
+        name,
+        url_name,
+        build,
+        prepare=None,
+        expect=(200,),
+        before=None,
+        counters=None,
+        concurrency=None,
+    ):
+        self.name = name
+        self.url_name = url_name
+        self.build = build
+        self.prepare = prepare
+        self.expect = expect
+        self.before = before
+        self.counters = counters
+        self.concurrency = concurrency
+
+
+def _batched(rows, size=SEED_BATCH):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+class Fixture:
+    """
+    Seed data shared by the scenarios: decks, cards and feedback per user.
+    Only deck ids are kept, so the fixture can be scaled up to millions of
+    rows (see `manage.py bench --decks-per-user/--cards-per-deck`).
+    """
+
+    def __init__(
+        self,
+        users,
+        run_id,
+        decks_per_user=DECKS_PER_USER,
+        cards_per_deck=CARDS_PER_DECK,
+    ):
+        self.users = users
+        self.run_id = run_id
+        self.decks_per_user = decks_per_user
+        self.cards_per_deck = cards_per_deck
+        self.decks = {}
+        self.extra = {}
+
+    def seed(self):
+        for user_id in self.users:
+            with transaction.atomic():
+                self.decks[user_id] = self._seed_user(user_id)
+
+    def _seed_user(self, user_id):
+        deck_ids = []
+        for batch in _batched(
+            Deck(user_id=user_id, title=f"Seed deck {i}", description="Seed")
+            for i in range(self.decks_per_user)
+        ):
+            deck_ids.extend(deck.id for deck in Deck.objects.bulk_create(batch))
+        for batch in _batched(
+            Flashcard(deck_id=deck_id, user_id=user_id, question="Q", answer="A")
+            for deck_id in deck_ids
+            for _ in range(self.cards_per_deck)
+        ):
+            Flashcard.objects.bulk_create(batch)
+        for batch in _batched(
+            Feedback(user_id=user_id, deck_id=deck_id, comment="Seed", rating=4)
+            for deck_id in deck_ids
+        ):
+            Feedback.objects.bulk_create(batch)
+        return deck_ids
+
+    def user(self, i):
+        return self.users[i % len(self.users)]
+
+    def deck_id(self, i):
+        decks = self.decks[self.user(i)]
+        return decks[(i // len(self.users)) % len(decks)]
+
+    def topic(self, i, tag):
+        # Unique per request, so every generation misses the caches and
+        # exercises the whole pipeline.
+        return f"{tag} topic {self.run_id} {i}"
+
+
+def _own_decks(fixture, count, key):
+    fixture.extra[key] = [
+        Deck.objects.create(
+            user_id=fixture.user(i), title=f"{key} {fixture.run_id} {i}"
+        )
+        for i in range(count)
+    ]
+
+
+def _own_cards(fixture, count, key):
+    fixture.extra[key] = Flashcard.objects.bulk_create(
+        Flashcard(
+            deck_id=fixture.deck_id(i),
+            user_id=fixture.user(i),
+            question="Q",
+            answer="A",
+        )
+        for i in range(count)
+    )
+
+
+def _own_feedback(fixture, count, key):
+    fixture.extra[key] = Feedback.objects.bulk_create(
+        Feedback(
+            user_id=fixture.user(i), deck_id=fixture.deck_id(i), comment="", rating=3
+        )
+        for i in range(count)
+    )
+
+
+def _cursor_path(path, ordering, position):
+    # The URL DRF's cursor paginator would put in `next` for the page that
+    # starts right after `position`.
+    paginator = KeysetPagination(ordering)
+    paginator.base_url = path
+    return paginator.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+
+def _deep_decks(fixture, count):
+    # One keyset position per user, DEEP_PAGE_AT of the way into their decks.
+    depth = int(fixture.decks_per_user * DEEP_PAGE_AT)
+    fixture.extra["deep_decks"] = {
+        user_id: _cursor_path(
+            "/api/decks/",
+            ("created_at", "id"),
+            str(
+                Deck.objects.filter(user_id=user_id)
+                .order_by("created_at", "id")
+                .values_list("created_at", flat=True)[depth]
+            ),
+        )
+        for user_id in fixture.users
+    }
+
+
+def _deep_cards(fixture, count):
+    depth = int(fixture.cards_per_deck * DEEP_PAGE_AT)
+    fixture.extra["deep_cards"] = [
+        _cursor_path(
+            f"/api/flashcards/?deck_id={fixture.deck_id(i)}",
+            ("id",),
+            str(
+                Flashcard.objects.filter(deck_id=fixture.deck_id(i))
+                .order_by("id")
+                .values_list("id", flat=True)[depth]
+            ),
+        )
+        for i in range(count)
+    ]
+
+
+def _jwks_counters():
+    stats = auth_utils.jwks_store.stats()
+    return {f"jwks_{name}": stats[name] for name in ("hits", "misses", "refreshes")}
+
+
+def _token_counters():
+    stats = auth_utils.token_cache.stats()
+    return {f"token_cache_{name}": stats[name] for name in ("hits", "misses")}
+
+
+def _cold_key_store():
+    auth_utils.jwks_store.clear()
+    auth_utils.token_cache.clear()
+
+
+def _auth_only(f, i):
+    # No such job: the view answers 404 after one indexed lookup, so the
+    # request is almost all authentication.
+    return Request(f.user(i), "get", "/api/generate-flashcards/0/")
+
+
+def _jobs(fixture, count):
+    fixture.extra["jobs"] = [
+        enqueue_generation(fixture.user(i), fixture.topic(i, "job"))
+        for i in range(count)
+    ]
+
+
+SCENARIOS = [
+    # Decks
+    Scenario(
+        "decks.list",
+        "deck-list-create",
+        lambda f, i: Request(f.user(i), "get", "/api/decks/"),
+    ),
+    Scenario(
+        "decks.list_deep",
+        "deck-list-create",
+        lambda f, i: Request(f.user(i), "get", f.extra["deep_decks"][f.user(i)]),
+        prepare=_deep_decks,
+    ),
+    Scenario(
+        "decks.create",
+        "deck-list-create",
+        lambda f, i: Request(
+            f.user(i), "post", "/api/decks/", {"title": f"New {f.run_id} {i}"}
+        ),
+        expect=(201,),
+    ),
+    Scenario(
+        "decks.detail",
+        "deck-detail",
+        lambda f, i: Request(f.user(i), "get", f"/api/decks/{f.deck_id(i)}/"),
+    ),
+    Scenario(
+        "decks.detail_with_flashcards",
+        "deck-detail",
+        lambda f, i: Request(
+            f.user(i), "get", f"/api/decks/{f.deck_id(i)}/?include=flashcards"
+        ),
+    ),
+    Scenario(
+        "decks.update",
+        "deck-detail",
+        lambda f, i: Request(
+            f.user(i),
+            "put",
+            f"/api/decks/{f.extra['update_decks'][i].id}/",
+            {"description": f"Updated {i}"},
+        ),
+        prepare=lambda f, n: _own_decks(f, n, "update_decks"),
+    ),
+    Scenario(
+        "decks.delete",
+        "deck-detail",
+        lambda f, i: Request(
+            f.user(i), "delete", f"/api/decks/{f.extra['delete_decks'][i].id}/"
+        ),
+        prepare=lambda f, n: _own_decks(f, n, "delete_decks"),
+        expect=(204,),
+    ),
+    # Flashcards
+    Scenario(
+        "flashcards.list",
+        "flashcard-list-create",
+        lambda f, i: Request(
+            f.user(i), "get", f"/api/flashcards/?deck_id={f.deck_id(i)}"
+        ),
+    ),
+    Scenario(
+        "flashcards.list_deep",
+        "flashcard-list-create",
+        lambda f, i: Request(f.user(i), "get", f.extra["deep_cards"][i]),
+        prepare=_deep_cards,
+    ),
+    Scenario(
+        "flashcards.create",
+        "flashcard-list-create",
+        lambda f, i: Request(
+            f.user(i),
+            "post",
+            "/api/flashcards/",
+            {"deck_id": f.deck_id(i), "question": "Q?", "answer": "A"},
+        ),
+        expect=(201,),
+    ),
+    Scenario(
+        "flashcards.create_batch",
+        "flashcard-list-create",
+        lambda f, i: Request(
+            f.user(i),
+            "post",
+            "/api/flashcards/",
+            {
+                "deck_id": f.deck_id(i),
+                "cards": [{"question": f"Q{n}?", "answer": "A"} for n in range(50)],
+            },
+        ),
+        expect=(201,),
+    ),
+    Scenario(
+        "flashcards.detail",
+        "flashcard-detail",
+        lambda f, i: Request(
+            f.user(i), "get", f"/api/flashcards/{f.extra['detail_cards'][i].id}/"
+        ),
+        prepare=lambda f, n: _own_cards(f, n, "detail_cards"),
+    ),
+    Scenario(
+        "flashcards.update",
+        "flashcard-detail",
+        lambda f, i: Request(
+            f.user(i),
+            "put",
+            f"/api/flashcards/{f.extra['update_cards'][i].id}/",
+            {"answer": "B"},
+        ),
+        prepare=lambda f, n: _own_cards(f, n, "update_cards"),
+    ),
+    Scenario(
+        "flashcards.delete",
+        "flashcard-detail",
+        lambda f, i: Request(
+            f.user(i), "delete", f"/api/flashcards/{f.extra['delete_cards'][i].id}/"
+        ),
+        prepare=lambda f, n: _own_cards(f, n, "delete_cards"),
+    ),
+    # Feedback
+    Scenario(
+        "feedback.list",
+        "feedback-list-create",
+        lambda f, i: Request(
+            f.user(i), "get", f"/api/feedback/?deck_id={f.deck_id(i)}"
+        ),
+    ),
+    Scenario(
+        "feedback.create",
+        "feedback-list-create",
+        lambda f, i: Request(
+            f.user(i),
+            "post",
+            "/api/feedback/",
+            {"deck": f.deck_id(i), "comment": "Nice", "rating": 5},
+        ),
+        expect=(201,),
+    ),
+    Scenario(
+        "feedback.detail",
+        "feedback-detail",
+        lambda f, i: Request(
+            f.user(i), "get", f"/api/feedback/{f.extra['detail_feedback'][i].id}/"
+        ),
+        prepare=lambda f, n: _own_feedback(f, n, "detail_feedback"),
+    ),
+    Scenario(
+        "feedback.update",
+        "feedback-detail",
+        lambda f, i: Request(
+            f.user(i),
+            "put",
+            f"/api/feedback/{f.extra['update_feedback'][i].id}/",
+            {"rating": 2},
+        ),
+        prepare=lambda f, n: _own_feedback(f, n, "update_feedback"),
+    ),
+    Scenario(
+        "feedback.delete",
+        "feedback-detail",
+        lambda f, i: Request(
+            f.user(i),
+            "delete",
+            f"/api/feedback/{f.extra['delete_feedback'][i].id}/",
+        ),
+        prepare=lambda f, n: _own_feedback(f, n, "delete_feedback"),
+        expect=(204,),
+    ),
+    # Authentication, one request at a time so a cache emptied for one request
+    # isn't emptied again under another. The token cache is emptied before
+    # each request so every one verifies its JWT; cold, the signing keys are
+    # fetched each time too, as they were before the process-wide key store.
+    Scenario(
+        "auth.jwks_warm",
+        "generation-job-detail",
+        _auth_only,
+        expect=(404,),
+        before=auth_utils.token_cache.clear,
+        counters=_jwks_counters,
+        concurrency=1,
+    ),
+    Scenario(
+        "auth.jwks_cold",
+        "generation-job-detail",
+        _auth_only,
+        expect=(404,),
+        before=_cold_key_store,
+        counters=_jwks_counters,
+        concurrency=1,
+    ),
+    # The same request with the verified-token cache hot (each user's token
+    # verified once) and emptied before every request.
+    Scenario(
+        "auth.token_cache_hot",
+        "generation-job-detail",
+        _auth_only,
+        expect=(404,),
+        counters=_token_counters,
+        concurrency=1,
+    ),
+    Scenario(
+        "auth.token_cache_cold",
+        "generation-job-detail",
+        _auth_only,
+        expect=(404,),
+        before=auth_utils.token_cache.clear,
+        counters=_token_counters,
+        concurrency=1,
+    ),
+    # Generation
+    Scenario(
+        "generate.sync",
+        "generate-flashcards",
+        lambda f, i: Request(
+            f.user(i),
+            "post",
+            "/api/generate-flashcards/",
+            {"topic": f.topic(i, "sync")},
+        ),
+        expect=(201,),
+    ),
+    Scenario(
+        "generate.async_enqueue",
+        "generate-flashcards",
+        lambda f, i: Request(
+            f.user(i),
+            "post",
+            "/api/generate-flashcards/",
+            {"topic": f.topic(i, "async"), "async": True},
+        ),
+        expect=(202,),
+    ),
+    Scenario(
+        "generate.job_status",
+        "generation-job-detail",
+        lambda f, i: Request(
+            f.user(i), "get", f"/api/generate-flashcards/{f.extra['jobs'][i].id}/"
+        ),
+        prepare=_jobs,
+    ),
+    Scenario(
+        "generate.stream",
+        "generate-flashcards-stream",
+        lambda f, i: Request(
+            f.user(i),
+            "post",
+            "/api/generate-flashcards/stream/",
+            {"topic": f.topic(i, "stream")},
+        ),
+    ),
+    Scenario(
+        "generate.batch",
+        "generate-flashcards-batch",
+        lambda f, i: Request(
+            f.user(i),
+            "post",
+            "/api/generate-flashcards/batch/",
+            {"topics": [f.topic(i * 3 + n, "batch") for n in range(3)]},
+        ),
+    ),
+]
+
+
+# Model replies the card parser has to cope with (see tests.PARSER_CORPUS).
+_CARD = {"question": "What is measured?", "answer": "Latency", "hint": "In ms"}
+PARSER_CORPUS = [
+    json.dumps([_CARD] * 5, indent=2),
+    "```json\n" + json.dumps([_CARD] * 5, indent=2) + "\n```",
+    "Here are your cards:\n" + json.dumps([_CARD] * 5) + "\nEnjoy!",
+    json.dumps([_CARD] * 5, indent=2)[:-40],
+]
+
+
+def parser_benchmark(iterations):
+    """Time parse_cards over the corpus; returns per-reply latencies (s)."""
+    latencies = []
+    for i in range(iterations):
+        text = PARSER_CORPUS[i % len(PARSER_CORPUS)]
+        start = time.perf_counter()
+        parse_cards(text)
+        latencies.append(time.perf_counter() - start)
+    return latencies
@@ -0,0 +1,206 @@
+import json
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import get_resolver
+
+from flashcards_app.bench.fakes import install_fakes
+from flashcards_app.bench.runner import (
+    bench_database,
+    compare,
+    run_scenario,
+    summarize,
+)
+from flashcards_app.bench.scenarios import (
+    CARDS_PER_DECK,
+    DECKS_PER_USER,
+    SCENARIOS,
+    Fixture,
+    parser_benchmark,
+)
+
+PARSER_SCENARIO = "parser.parse_cards"
+
+# Scenario pairs reported against each other as (suffix, baseline suffix):
+# a deep keyset page should cost what the first page does, and a cold cache
+# shows what the warm (or hot) one saves.
+COMPARISONS = [("_deep", ""), ("_cold", "_warm"), ("_cold", "_hot")]
+
+
+def _url_names():
+    from flashcards_app import urls
+
+    return {pattern.name for pattern in urls.urlpatterns}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test every flashcards_app endpoint against a throwaway test "
+        "database, with Clerk, Wikipedia and Anthropic replaced by local fakes. "
+        "Run it against Postgres: SQLite locks under concurrent writes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "scenarios",
+            nargs="*",
+            help="Scenario names or prefixes (e.g. decks, generate.stream). "
+            "Defaults to all.",
+        )
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--users", type=int, default=4)
+        parser.add_argument(
+            "--decks-per-user",
+            type=int,
+            default=DECKS_PER_USER,
+            help="Seed decks per user; raise it to bench the lists at volume.",
+        )
+        parser.add_argument("--cards-per-deck", type=int, default=CARDS_PER_DECK)
+        parser.add_argument(
+            "--jwks-latency", type=float, default=50, help="Milliseconds per call."
+        )
+        parser.add_argument("--clerk-latency", type=float, default=80)
+        parser.add_argument("--wikipedia-latency", type=float, default=150)
+        parser.add_argument("--anthropic-latency", type=float, default=1500)
+        parser.add_argument("--save", help="Write the results to this JSON file.")
+        parser.add_argument(
+            "--baseline", help="Fail if results regress against this JSON file."
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed latency/throughput slack against the baseline.",
+        )
+        parser.add_argument(
+            "--keepdb", action="store_true", help="Reuse the test database."
+        )
+
+    def handle(self, *args, **options):
+        scenarios = self._select(options["scenarios"])
+        if not scenarios and not self._wants_parser(options["scenarios"]):
+            raise CommandError("No scenario matches.")
+
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+
+        latency = {
+            "jwks": options["jwks_latency"],
+            "clerk": options["clerk_latency"],
+            "wikipedia": options["wikipedia_latency"],
+            "anthropic": options["anthropic_latency"],
+        }
+        results = {}
+        if self._wants_parser(options["scenarios"]):
+            results[PARSER_SCENARIO] = self._run_parser(options["requests"])
+        if scenarios:
+            results.update(self._run_http(scenarios, latency, options))
+
+        if options["save"]:
+            with open(options["save"], "w") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Saved results to {options['save']}")
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options["tolerance"])
+            if regressions:
+                raise CommandError(
+                    "Benchmark regressed:\n  " + "\n  ".join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
+
+    def _select(self, names):
+        # Every URL in flashcards_app must have at least one scenario, so a
+        # new endpoint can't silently go unbenchmarked.
+        missing = _url_names() - {scenario.url_name for scenario in SCENARIOS}
+        if missing:
+            raise CommandError(f"No bench scenario for: {', '.join(sorted(missing))}")
+        if not names:
+            return SCENARIOS
+        return [
+            scenario
+            for scenario in SCENARIOS
+            if any(scenario.name.startswith(name) for name in names)
+        ]
+
+    def _wants_parser(self, names):
+        return not names or any(PARSER_SCENARIO.startswith(name) for name in names)
+
+    def _run_parser(self, count):
+        # Parsing is CPU-bound and sub-millisecond, so take many samples.
+        iterations = max(count, 1) * 100
+        start = time.perf_counter()
+        latencies = parser_benchmark(iterations)
+        result = summarize(latencies, time.perf_counter() - start, 0)
+        self._report(PARSER_SCENARIO, result)
+        return result
+
+    def _run_http(self, scenarios, latency, options):
+        get_resolver()  # build the URL resolver before timing starts
+        with bench_database(options["keepdb"]):
+            fakes, signer = install_fakes(latency)
+            try:
+                cache.clear()
+                fixture = Fixture(
+                    [f"bench_user_{i}" for i in range(options["users"])],
+                    run_id=int(time.time()),
+                    decks_per_user=options["decks_per_user"],
+                    cards_per_deck=options["cards_per_deck"],
+                )
+                start = time.perf_counter()
+                fixture.seed()
+                decks = len(fixture.users) * fixture.decks_per_user
+                self.stdout.write(
+                    f"Seeded {decks} decks and {decks * fixture.cards_per_deck}"
+                    f" cards in {time.perf_counter() - start:.1f}s"
+                )
+                results = {}
+                for scenario in scenarios:
+                    result = run_scenario(
+                        scenario,
+                        fixture,
+                        signer,
+                        options["requests"],
+                        options["concurrency"],
+                    )
+                    self._report(scenario.name, result)
+                    results[scenario.name] = result
+                self._report_ratios(results)
+                return results
+            finally:
+                fakes.close()
+
+    def _report_ratios(self, results):
+        for name, result in results.items():
+            for suffix, base_suffix in COMPARISONS:
+                base_name = name.removesuffix(suffix) + base_suffix
+                base = results.get(base_name)
+                if not name.endswith(suffix) or not base or not base["p95_ms"]:
+                    continue
+                line = f"{name:<32} p95 {result['p95_ms'] / base['p95_ms']:.2f}x"
+                if base["throughput_rps"]:
+                    throughput = result["throughput_rps"] / base["throughput_rps"]
+                    line += f", throughput {throughput:.2f}x"
+                self.stdout.write(f"{line} {base_name}'s")
+
+    def _report(self, name, result):
+        line = (
+            f"{name:<32} p50={result['p50_ms']:>9.2f}ms"
+            f" p95={result['p95_ms']:>9.2f}ms p99={result['p99_ms']:>9.2f}ms"
+            f" {result['throughput_rps']:>9.2f} req/s"
+        )
+        if "queries_per_request" in result:
+            line += f" {result['queries_per_request']:>6.2f} queries/req"
+        if "input_tokens_per_request" in result:
+            line += f" {result['input_tokens_per_request']:>7.1f} input tokens/req"
+        for counter, value in result.get("counters", {}).items():
+            line += f" {counter}={value}"
+        if result["errors"]:
+            line += self.style.ERROR(
+                f" {result['errors']} errors {result.get('error_statuses', '')}"
+            )
+        self.stdout.write(line)
@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from flashcards_app.bench.fakes import InFlight, install_fakes
+from flashcards_app.bench.runner import bench_database, summarize
+from flashcards_app.bench.servers import asgi_server, wsgi_server
+
+ENDPOINTS = {
+    "generate": "/api/generate-flashcards/",
+    "stream": "/api/generate-flashcards/stream/",
+}
+
+
+async def _fire(base_url, path, tokens, count, run_id):
+    """Send `count` generation requests at once; (latencies, error count)."""
+    import httpx
+
+    async def one(client, i):
+        start = time.perf_counter()
+        response = await client.post(
+            base_url + path,
+            json={"topic": f"concurrency topic {run_id} {i}", "fresh": True},
+            headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"},
+        )
+        await response.aread()
+        return time.perf_counter() - start, response.status_code
+
+    limits = httpx.Limits(max_connections=count, max_keepalive_connections=0)
+    async with httpx.AsyncClient(timeout=None, limits=limits) as client:
+        results = await asyncio.gather(*(one(client, i) for i in range(count)))
+    latencies = [latency for latency, _ in results]
+    errors = sum(1 for _, status in results if status not in (200, 201))
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Open N simultaneous generation requests against one in-process worker, "
+        "served over ASGI (uvicorn) and over WSGI with a fixed thread pool, and "
+        "report how many Anthropic calls each had in flight at once. Clerk, "
+        "Wikipedia and Anthropic are local fakes. Run it against Postgres: "
+        "SQLite locks under concurrent writes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--server", choices=["asgi", "wsgi", "both"], default="both"
+        )
+        parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="generate")
+        parser.add_argument(
+            "--concurrency", type=int, default=64, help="Requests opened at once."
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Request threads of the WSGI worker (gunicorn --threads).",
+        )
+        parser.add_argument("--users", type=int, default=4)
+        parser.add_argument(
+            "--anthropic-latency", type=float, default=2000, help="Milliseconds."
+        )
+        parser.add_argument("--wikipedia-latency", type=float, default=50)
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["threads"] < 1:
+            raise CommandError("--concurrency and --threads must be at least 1.")
+        servers = (
+            ["asgi", "wsgi"] if options["server"] == "both" else [options["server"]]
+        )
+        latency = {
+            "jwks": 0,
+            "clerk": 0,
+            "wikipedia": options["wikipedia_latency"],
+            "anthropic": options["anthropic_latency"],
+        }
+
+        with (
+            bench_database(options["keepdb"]),
+            override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "127.0.0.1"]),
+        ):
+            for name in servers:
+                self._report(name, options, self._run(name, latency, options))
+
+    def _run(self, name, latency, options):
+        meter = InFlight()
+        fakes, signer = install_fakes(latency, meter)
+        try:
+            cache.clear()
+            tokens = [
+                signer.token(f"concurrency_user_{i}") for i in range(options["users"])
+            ]
+            server = (
+                asgi_server() if name == "asgi" else wsgi_server(options["threads"])
+            )
+            with server as base_url:
+                start = time.perf_counter()
+                latencies, errors = asyncio.run(
+                    _fire(
+                        base_url,
+                        ENDPOINTS[options["endpoint"]],
+                        tokens,
+                        options["concurrency"],
+                        f"{name}-{int(start)}",
+                    )
+                )
+                elapsed = time.perf_counter() - start
+        finally:
+            fakes.close()
+        result = summarize(latencies, elapsed, errors)
+        result.update(
+            wall_s=round(elapsed, 3),
+            peak_anthropic_in_flight=meter.peak,
+            anthropic_calls=meter.calls,
+        )
+        return result
+
+    def _report(self, name, options, result):
+        label = name if name == "asgi" else f"wsgi ({options['threads']} threads)"
+        line = (
+            f"{label:<20} {result['requests']} requests: wall={result['wall_s']:.2f}s"
+            f" p50={result['p50_ms']:.0f}ms p95={result['p95_ms']:.0f}ms"
+            f" peak Anthropic calls in flight={result['peak_anthropic_in_flight']}"
+            f" (of {result['anthropic_calls']})"
+        )
+        if result["errors"]:
+            line += self.style.ERROR(f" {result['errors']} errors")
+        self.stdout.write(line)
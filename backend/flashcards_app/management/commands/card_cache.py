@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from flashcards_app.models import GeneratedCardSet
+from flashcards_app.utils.card_cache import card_cache
+from flashcards_app.utils.generation import MODEL, PROMPT_VERSION
+
+
+class Command(BaseCommand):
+    help = "Evict or inspect the shared generated-card cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action", choices=["evict", "stats"], help="What to do with the cache."
+        )
+
+    def handle(self, *args, **options):
+        if options["action"] == "evict":
+            deleted = card_cache.evict(PROMPT_VERSION, MODEL)
+            self.stdout.write(
+                f"Evicted {deleted} card sets (keeping prompt v{PROMPT_VERSION}, {MODEL})."
+            )
+        else:
+            self.stats()
+
+    def stats(self):
+        # Read from the table: the in-process hit counters of a fresh command
+        # process are always zero.
+        card_sets = GeneratedCardSet.objects.all()
+        total = card_sets.aggregate(count=Count("id"), hits=Sum("hits"))
+        current = card_sets.filter(
+            prompt_version=PROMPT_VERSION,
+            model=MODEL,
+            created_at__gt=timezone.now() - timedelta(seconds=card_cache.max_age),
+        ).count()
+        self.stdout.write(f"Card sets: {total['count']}")
+        self.stdout.write(f"  current (prompt v{PROMPT_VERSION}, {MODEL}): {current}")
+        self.stdout.write(f"  evictable: {total['count'] - current}")
+        self.stdout.write(f"Hits recorded on card sets: {total['hits'] or 0}")
+        self.stdout.write(
+            "Live hit rates are exported per process at /metrics "
+            "(flashquiz_card_cache_*)."
+        )
@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from flashcards_app.utils.jobs import (
+    claim_next_job,
+    fail_job,
+    reap_expired_jobs,
+    run_job,
+)
+
+
+def _run_in_thread(job):
+    try:
+        run_job(job)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Process queued flashcard generation jobs with a local thread pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.GENERATION_JOB_CONCURRENCY,
+            help="Maximum number of jobs running at once.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.GENERATION_JOB_POLL_INTERVAL,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is drained instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options["concurrency"]
+        timeout = settings.GENERATION_JOB_TIMEOUT
+        # future -> (job id, attempt, deadline); timed-out futures stay here
+        # until their thread actually finishes so they still count against
+        # the concurrency cap.
+        running = {}
+        timed_out = set()
+
+        self.stdout.write(f"Generation worker started (concurrency={concurrency})")
+        with ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="generation"
+        ) as executor:
+            while True:
+                for future in [f for f in running if f.done()]:
+                    del running[future]
+                    timed_out.discard(future)
+
+                now = time.monotonic()
+                for future, (job_id, attempt, deadline) in running.items():
+                    if future not in timed_out and now > deadline:
+                        timed_out.add(future)
+                        fail_job(job_id, attempt, "Job timed out.", retryable=True)
+
+                reap_expired_jobs()
+
+                claimed = False
+                while len(running) < concurrency:
+                    job = claim_next_job()
+                    if job is None:
+                        break
+                    claimed = True
+                    self.stdout.write(f"Running job {job.pk}: {job.topic!r}")
+                    future = executor.submit(_run_in_thread, job)
+                    running[future] = (job.pk, job.attempts, now + timeout)
+
+                if options["once"] and not running and not claimed:
+                    break
+                close_old_connections()
+                time.sleep(options["poll_interval"] if not claimed else 0.1)
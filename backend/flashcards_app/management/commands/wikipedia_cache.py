@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+
+from flashcards_app.models import WikipediaCacheEntry
+from flashcards_app.utils.helperfunc import (
+    WikipediaAmbiguousError,
+    WikipediaNotFoundError,
+)
+from flashcards_app.utils.wiki_cache import wiki_cache
+
+
+class Command(BaseCommand):
+    help = "Pre-warm, purge or inspect the Wikipedia content cache."
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest="action", required=True)
+
+        warm = subparsers.add_parser("warm", help="Fetch and cache topics.")
+        warm.add_argument("topics", nargs="*", help="Topics to cache.")
+        warm.add_argument(
+            "--file", help="Read additional topics from a file, one per line."
+        )
+        warm.add_argument(
+            "--refresh",
+            action="store_true",
+            help="Re-fetch topics even if they are already cached.",
+        )
+
+        purge = subparsers.add_parser("purge", help="Delete cached entries.")
+        purge.add_argument("--topic", help="Only purge this topic.")
+        purge.add_argument(
+            "--expired", action="store_true", help="Only purge expired entries."
+        )
+
+        subparsers.add_parser("stats", help="Show what the cache table holds.")
+
+    def handle(self, *args, **options):
+        action = options["action"]
+        if action == "warm":
+            self.warm(options)
+        elif action == "purge":
+            deleted = wiki_cache.purge(
+                topic=options["topic"], expired_only=options["expired"]
+            )
+            self.stdout.write(f"Purged {deleted} cache entries.")
+        else:
+            self.stats()
+
+    def stats(self):
+        # NOTE: Hit counters live in each serving process, so a fresh command
+        # process would only ever report zeros; show what the table holds.
+        entries = WikipediaCacheEntry.objects.all()
+        by_kind = dict(
+            entries.values_list("kind").annotate(count=Count("id")).order_by()
+        )
+        self.stdout.write(f"DB entries: {sum(by_kind.values())}")
+        for kind, label in WikipediaCacheEntry.KIND_CHOICES:
+            self.stdout.write(f"  {label.lower()}: {by_kind.get(kind, 0)}")
+        expired = entries.filter(expires_at__lte=timezone.now()).count()
+        self.stdout.write(f"Expired (purge --expired): {expired}")
+        self.stdout.write(
+            "Live hit rates are exported per process at /metrics "
+            "(flashquiz_wikipedia_cache_*)."
+        )
+
+    def warm(self, options):
+        topics = list(options["topics"])
+        if options["file"]:
+            try:
+                with open(options["file"]) as f:
+                    topics.extend(line.strip() for line in f if line.strip())
+            except OSError as e:
+                raise CommandError(f"Could not read {options['file']}: {e}")
+
+        for topic in topics:
+            try:
+                page_title, _ = wiki_cache.fetch(topic, refresh=options["refresh"])
+                self.stdout.write(f"{topic!r} -> {page_title!r}")
+            except (WikipediaNotFoundError, WikipediaAmbiguousError) as e:
+                self.stdout.write(f"{topic!r} -> cached miss ({e})")
+            except Exception as e:
+                self.stderr.write(f"{topic!r} -> failed: {type(e).__name__}: {e}")
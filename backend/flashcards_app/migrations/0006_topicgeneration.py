@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flashcards_app", "0005_wikipediacacheentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TopicGeneration",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("topic_key", models.CharField(max_length=255, unique=True)),
+                ("result", models.JSONField(blank=True, null=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
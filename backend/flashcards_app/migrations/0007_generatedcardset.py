@@ -0,0 +1,53 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flashcards_app", "0006_topicgeneration"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="generationjob",
+            name="fresh",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name="GeneratedCardSet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("page_title", models.CharField(max_length=255)),
+                ("summary_hash", models.CharField(max_length=64)),
+                ("prompt_version", models.CharField(max_length=32)),
+                ("model", models.CharField(max_length=64)),
+                ("deck_summary", models.TextField(blank=True)),
+                ("cards", models.JSONField()),
+                ("hits", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=(
+                            "page_title",
+                            "summary_hash",
+                            "prompt_version",
+                            "model",
+                        ),
+                        name="unique_generated_card_set",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:43
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_decks(apps, schema_editor):
+    # Concurrent generations could create the same (user_id, title) deck more
+    # than once. Fold duplicates into the oldest deck before adding the
+    # unique constraint.
+    Deck = apps.get_model("flashcards_app", "Deck")
+    Flashcard = apps.get_model("flashcards_app", "Flashcard")
+    Feedback = apps.get_model("flashcards_app", "Feedback")
+
+    duplicates = (
+        Deck.objects.values("user_id", "title")
+        .annotate(keep_id=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+    )
+    for dup in duplicates:
+        extra_ids = list(
+            Deck.objects.filter(user_id=dup["user_id"], title=dup["title"])
+            .exclude(id=dup["keep_id"])
+            .values_list("id", flat=True)
+        )
+        Flashcard.objects.filter(deck_id__in=extra_ids).update(deck_id=dup["keep_id"])
+        Feedback.objects.filter(deck_id__in=extra_ids).update(deck_id=dup["keep_id"])
+        Deck.objects.filter(id__in=extra_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flashcards_app", "0007_generatedcardset"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_decks, migrations.RunPython.noop),
+    ]
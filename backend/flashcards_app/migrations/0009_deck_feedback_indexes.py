@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flashcards_app", "0008_merge_duplicate_decks"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="deck",
+            index=models.Index(
+                fields=["user_id", "created_at"], name="deck_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="feedback",
+            index=models.Index(
+                fields=["deck", "user_id"], name="feedback_deck_user_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="deck",
+            constraint=models.UniqueConstraint(
+                fields=("user_id", "title"), name="unique_deck_user_title"
+            ),
+        ),
+    ]
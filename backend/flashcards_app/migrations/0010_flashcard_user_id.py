@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flashcards_app", "0009_deck_feedback_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flashcard",
+            name="user_id",
+            field=models.CharField(default="", editable=False, max_length=255),
+        ),
+    ]
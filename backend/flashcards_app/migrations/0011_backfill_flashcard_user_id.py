@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:44
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 10000
+
+
+def backfill_flashcard_user_id(apps, schema_editor):
+    # Copy deck.user_id onto existing cards in id ranges, committing each
+    # batch (the migration is non-atomic) so a large table isn't locked or
+    # rewritten in one transaction.
+    Deck = apps.get_model("flashcards_app", "Deck")
+    Flashcard = apps.get_model("flashcards_app", "Flashcard")
+
+    owner = Deck.objects.filter(pk=OuterRef("deck_id")).values("user_id")[:1]
+    last_id = Flashcard.objects.order_by("-id").values_list("id", flat=True).first()
+    if last_id is None:
+        return
+    for start in range(0, last_id + 1, BATCH_SIZE):
+        Flashcard.objects.filter(
+            id__gte=start, id__lt=start + BATCH_SIZE, user_id=""
+        ).update(user_id=Subquery(owner))
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("flashcards_app", "0010_flashcard_user_id"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_flashcard_user_id, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flashcards_app", "0011_backfill_flashcard_user_id"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flashcard",
+            index=models.Index(
+                fields=["user_id", "deck", "id"], name="flashcard_user_deck_idx"
+            ),
+        ),
+    ]
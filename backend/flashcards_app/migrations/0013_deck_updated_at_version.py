@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("flashcards_app", "0012_flashcard_user_deck_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deck",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="deck",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
 
 
 # Create your models here.
@@ -8,6 +10,34 @@ class Deck(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # NOTE: Bumped whenever the deck, its cards or its feedback change. The
+    # deck endpoints build their ETags from it instead of hashing the body.
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        # NOTE: Every deck query filters on user_id, and generation relies on
+        # get_or_create(user_id, title) being race-free.
+        indexes = [
+            models.Index(fields=["user_id", "created_at"], name="deck_user_created_idx")
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user_id", "title"], name="unique_deck_user_title"
+            )
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def touch(cls, *deck_ids):
+        """Mark decks as changed after a write to their cards or feedback."""
+        cls.objects.filter(pk__in=deck_ids).update(
+            version=F("version") + 1, updated_at=timezone.now()
+        )
 
     def __str__(self):
         return f"{self.title} ({self.user_id})"
@@ -15,10 +45,33 @@ class Deck(models.Model):
 
 class Flashcard(models.Model):
     deck = models.ForeignKey(Deck, on_delete=models.CASCADE, related_name="flashcards")
+    # NOTE: Copy of deck.user_id so ownership checks and card lists don't need
+    # a join to Deck. Set from the deck on save(); bulk_create() callers must
+    # set it themselves.
+    user_id = models.CharField(max_length=255, default="", editable=False)
     question = models.TextField()
     answer = models.TextField()
     hint = models.CharField(max_length=255, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user_id", "deck", "id"], name="flashcard_user_deck_idx"
+            )
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.user_id and self.deck_id:
+            self.user_id = self.deck.user_id
+        super().save(*args, **kwargs)
+        Deck.touch(self.deck_id)
+
+    def delete(self, *args, **kwargs):
+        deck_id = self.deck_id
+        result = super().delete(*args, **kwargs)
+        Deck.touch(deck_id)
+        return result
+
     def __str__(self):
         return f"Q: {self.question[:30]}..."
 
@@ -31,5 +84,120 @@ class Feedback(models.Model):
     rating = models.PositiveIntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["deck", "user_id"], name="feedback_deck_user_idx")
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        Deck.touch(self.deck_id)
+
+    def delete(self, *args, **kwargs):
+        deck_id = self.deck_id
+        result = super().delete(*args, **kwargs)
+        Deck.touch(deck_id)
+        return result
+
     def __str__(self):
         return f"Feedback from {self.user_id} on {self.deck.title}"
+
+
+class GenerationJob(models.Model):
+    # NOTE: Background deck generation. The API enqueues a row here and the
+    # `run_generation_worker` management command picks it up, so a slow
+    # Wikipedia fetch + LLM call never holds a web worker.
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    user_id = models.CharField(max_length=255)  # Store Clerk user ID
+    topic = models.CharField(max_length=255)
+    fresh = models.BooleanField(default=False)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    stage = models.CharField(max_length=32, default="queued")
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    result = models.JSONField(null=True, blank=True)
+    deck = models.ForeignKey(
+        Deck, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_after"])]
+
+    def __str__(self):
+        return f"Job {self.pk}: {self.topic} ({self.status})"
+
+
+class WikipediaCacheEntry(models.Model):
+    # NOTE: Second tier of the Wikipedia cache (the first is an in-process LRU).
+    # Negative entries remember topics that had no page or were ambiguous, so
+    # repeated bad lookups don't go back to Wikipedia either.
+    FOUND = "found"
+    NOT_FOUND = "not_found"
+    AMBIGUOUS = "ambiguous"
+    KIND_CHOICES = [
+        (FOUND, "Found"),
+        (NOT_FOUND, "Not found"),
+        (AMBIGUOUS, "Ambiguous"),
+    ]
+
+    topic_key = models.CharField(max_length=255, unique=True)
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES, default=FOUND)
+    page_title = models.CharField(max_length=255, blank=True)
+    summary = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    fetched_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.topic_key} -> {self.page_title or self.kind}"
+
+
+class TopicGeneration(models.Model):
+    # NOTE: One row per normalized topic. The worker generating a topic holds
+    # a row lock on it, so other processes asking for the same topic wait and
+    # reuse `result` instead of paying for their own Wikipedia + LLM calls.
+    topic_key = models.CharField(max_length=255, unique=True)
+    result = models.JSONField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.topic_key
+
+
+class GeneratedCardSet(models.Model):
+    # NOTE: Cards depend only on the source article, the prompt and the model,
+    # not on who asked. Caching them here lets popular topics skip the LLM
+    # entirely; each requester gets a copy in their own Deck.
+    page_title = models.CharField(max_length=255)
+    summary_hash = models.CharField(max_length=64)
+    prompt_version = models.CharField(max_length=32)
+    model = models.CharField(max_length=64)
+    deck_summary = models.TextField(blank=True)
+    cards = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["page_title", "summary_hash", "prompt_version", "model"],
+                name="unique_generated_card_set",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.page_title} ({self.prompt_version}, {self.model})"
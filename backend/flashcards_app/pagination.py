@@ -0,0 +1,40 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.status import HTTP_200_OK
+
+
+class KeysetPagination(CursorPagination):
+    # NOTE: Cursor (keyset) pagination: each page is a WHERE on the ordering
+    # columns plus a LIMIT, so page 1000 costs the same as page 1. Cursors are
+    # opaque base64 tokens returned in `next` / `previous`.
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def __init__(self, ordering):
+        self.ordering = ordering
+
+
+class CursorPaginatedMixin:
+    ordering = ("id",)
+
+    def paginated_response(self, request, queryset, serializer_class):
+        # NOTE: ?paginate=false returns the old bare-list shape for clients
+        # that haven't moved to cursors yet.
+        if request.query_params.get("paginate") == "false":
+            serializer = serializer_class(queryset.order_by(*self.ordering), many=True)
+            return Response(serializer.data, status=HTTP_200_OK)
+
+        paginator = KeysetPagination(self.ordering)
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = serializer_class(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    async def apaginated_response(self, request, queryset, serializer_class):
+        # DRF's paginator and serializers are sync; run the page query and the
+        # serialization together on the request's ORM thread.
+        return await sync_to_async(self.paginated_response)(
+            request, queryset, serializer_class
+        )
@@ -1,19 +1,51 @@
+from django.conf import settings
 from rest_framework import serializers
 
-from .models import Deck, Feedback, Flashcard
+from .models import Deck, Feedback, Flashcard, GenerationJob
 
 
 class DeckSerializer(serializers.ModelSerializer):
     class Meta:
         model = Deck
-        fields = ["id", "title", "description", "created_at"]
-        read_only_fields = ["id", "created_at"]
+        fields = ["id", "title", "description", "created_at", "updated_at"]
+        read_only_fields = ["id", "created_at", "updated_at"]
+
+    def validate_title(self, value):
+        # Titles are unique per user (see Deck.Meta); the view passes user_id
+        # in the context so we can return a 400 instead of an IntegrityError.
+        user_id = self.context.get("user_id")
+        if user_id is not None:
+            decks = Deck.objects.filter(user_id=user_id, title=value)
+            if self.instance is not None:
+                decks = decks.exclude(pk=self.instance.pk)
+            if decks.exists():
+                raise serializers.ValidationError(
+                    "You already have a deck with this title."
+                )
+        return value
 
     def create(self, validated_data):
         # The user_id will be passed from the view
         return super().create(validated_data)
 
 
+class FlashcardListSerializer(serializers.ListSerializer):
+    # NOTE: DRF's default ListSerializer.create() saves one row per card.
+    # Batch imports go through here instead so N cards cost one INSERT
+    # (or one per FLASHCARD_BULK_BATCH_SIZE cards).
+    def create(self, validated_data):
+        flashcards = Flashcard.objects.bulk_create(
+            [
+                Flashcard(user_id=item["deck"].user_id, **item)
+                for item in validated_data
+            ],
+            batch_size=settings.FLASHCARD_BULK_BATCH_SIZE,
+        )
+        # bulk_create() skips Flashcard.save(), so bump the decks here.
+        Deck.touch(*{item["deck"].pk for item in validated_data})
+        return flashcards
+
+
 class FlashcardSerializer(serializers.ModelSerializer):
     # Include deck field for reading (when returning flashcards)
     deck = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -22,6 +54,23 @@ class FlashcardSerializer(serializers.ModelSerializer):
         model = Flashcard
         fields = ["id", "deck", "question", "answer", "hint"]
         read_only_fields = ["id"]
+        list_serializer_class = FlashcardListSerializer
+
+
+class DeckSummarySerializer(DeckSerializer):
+    # Filled in by the annotated queryset in DeckListCreateView.get
+    flashcard_count = serializers.IntegerField(read_only=True)
+    avg_feedback_rating = serializers.FloatField(read_only=True)
+
+    class Meta(DeckSerializer.Meta):
+        fields = DeckSerializer.Meta.fields + ["flashcard_count", "avg_feedback_rating"]
+
+
+class DeckWithFlashcardsSerializer(DeckSerializer):
+    flashcards = FlashcardSerializer(many=True, read_only=True)
+
+    class Meta(DeckSerializer.Meta):
+        fields = DeckSerializer.Meta.fields + ["flashcards"]
 
 
 class FeedbackSerializer(serializers.ModelSerializer):
@@ -33,3 +82,21 @@ class FeedbackSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         # The user_id will be passed from the view
         return super().create(validated_data)
+
+
+class GenerationJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GenerationJob
+        fields = [
+            "id",
+            "topic",
+            "fresh",
+            "status",
+            "stage",
+            "attempts",
+            "error",
+            "result",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,1245 @@
+import asyncio
+import io
+import json
+import logging
+import queue
+import random
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.utils import timezone
+from django.utils.http import http_date
+from wikipedia.exceptions import DisambiguationError, PageError
+
+from flashquiz_proj.utils import auth_utils, log, startup
+
+from .models import (
+    Deck,
+    Feedback,
+    Flashcard,
+    GeneratedCardSet,
+    GenerationJob,
+    TopicGeneration,
+    WikipediaCacheEntry,
+)
+from .utils import generation, helperfunc, jobs
+from .utils.batch import astream_batch
+from .utils.card_parser import CardStreamParser, parse_cards
+from .utils.coalesce import AsyncSingleFlight, SingleFlight
+from .utils.generation import GenerationError
+from .utils.helperfunc import WikipediaNotFoundError, WikipediaTimeoutError
+from .utils.tokens import estimate_tokens, fit_to_budget
+
+
+class QueryPlanTests(TestCase):
+    """
+    The hot list/lookup queries must be answered from an index, not a table
+    scan. Runs against SQLite or Postgres; on Postgres sequential scans are
+    disabled so the planner reports whether an index is usable at all,
+    rather than what it prefers for a tiny test table.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        decks = Deck.objects.bulk_create(
+            Deck(user_id=f"user_{i % 20}", title=f"Deck {i}") for i in range(200)
+        )
+        Flashcard.objects.bulk_create(
+            Flashcard(deck=deck, user_id=deck.user_id, question="Q", answer="A")
+            for deck in decks
+        )
+        Feedback.objects.bulk_create(
+            Feedback(user_id=deck.user_id, deck=deck, comment="", rating=5)
+            for deck in decks
+        )
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset, index_pattern):
+        plan = queryset.explain()
+        if connection.vendor == "sqlite":
+            self.assertRegex(plan, r"USING (COVERING )?INDEX")
+        else:
+            self.assertIn("Index", plan)
+            self.assertNotIn("Seq Scan", plan)
+        self.assertRegex(plan, index_pattern)
+
+    def test_deck_list_uses_user_created_index(self):
+        decks = Deck.objects.filter(user_id="user_1").order_by("created_at", "id")
+        self.assertUsesIndex(decks, "deck_user_created_idx")
+
+    def test_deck_title_lookup_uses_unique_index(self):
+        decks = Deck.objects.filter(user_id="user_1", title="Deck 1")
+        # SQLite backs unique constraints with an auto-named index.
+        self.assertUsesIndex(
+            decks, r"unique_deck_user_title|sqlite_autoindex_flashcards_app_deck"
+        )
+
+    def test_feedback_filter_uses_deck_user_index(self):
+        deck = Deck.objects.first()
+        feedback = Feedback.objects.filter(deck_id=deck.id, user_id=deck.user_id)
+        self.assertUsesIndex(feedback, "feedback_deck_user_idx")
+
+    def test_flashcard_list_uses_owner_index(self):
+        deck = Deck.objects.first()
+        flashcards = Flashcard.objects.filter(
+            user_id=deck.user_id, deck_id=deck.id
+        ).order_by("id")
+        self.assertUsesIndex(flashcards, "flashcard_user_deck_idx")
+
+
+@mock.patch(
+    "flashquiz_proj.utils.auth_utils.averify_token", return_value={"sub": "user_1"}
+)
+class DeckQueryCountTests(TestCase):
+    """Deck endpoints must cost a fixed number of queries, however big the data."""
+
+    auth = {"HTTP_AUTHORIZATION": "Bearer test-token"}
+
+    def setUp(self):
+        cache.clear()
+
+    def make_decks(self, count, cards_per_deck=3):
+        start = Deck.objects.count()
+        decks = Deck.objects.bulk_create(
+            Deck(user_id="user_1", title=f"Deck {start + i}") for i in range(count)
+        )
+        Flashcard.objects.bulk_create(
+            Flashcard(deck=deck, user_id="user_1", question="Q", answer="A")
+            for deck in decks
+            for _ in range(cards_per_deck)
+        )
+        Feedback.objects.bulk_create(
+            Feedback(user_id="user_2", deck=deck, comment="", rating=4)
+            for deck in decks
+        )
+        return decks
+
+    # NOTE: Each count includes the one ETag validator query (see views.py).
+    def test_deck_list_is_two_queries(self, _verify):
+        self.make_decks(3)
+        with self.assertNumQueries(2):
+            small = self.client.get("/api/decks/", **self.auth)
+        self.make_decks(30)
+        with self.assertNumQueries(2):
+            large = self.client.get("/api/decks/", **self.auth)
+
+        self.assertEqual(len(small.json()["results"]), 3)
+        self.assertEqual(len(large.json()["results"]), 33)
+        deck = large.json()["results"][0]
+        self.assertEqual(deck["flashcard_count"], 3)
+        self.assertEqual(deck["avg_feedback_rating"], 4.0)
+
+    def test_deck_detail_with_flashcards_is_three_queries(self, _verify):
+        deck = self.make_decks(1, cards_per_deck=25)[0]
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                f"/api/decks/{deck.id}/?include=flashcards", **self.auth
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["flashcards"]), 25)
+
+
+@mock.patch(
+    "flashquiz_proj.utils.auth_utils.averify_token", return_value={"sub": "user_1"}
+)
+class ResponseCacheTests(TestCase):
+    """Cached GETs are per user and dropped by any write through the API."""
+
+    auth = {"HTTP_AUTHORIZATION": "Bearer test-token"}
+
+    def setUp(self):
+        cache.clear()
+        self.deck = Deck.objects.create(user_id="user_1", title="Cached")
+        Deck.objects.create(user_id="user_2", title="Someone else's")
+
+    def test_repeat_get_is_served_from_cache(self, _verify):
+        first = self.client.get("/api/decks/", **self.auth)
+        # Only the ETag validator query runs; the page comes from the cache.
+        with self.assertNumQueries(1):
+            second = self.client.get("/api/decks/", **self.auth)
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(len(second.json()["results"]), 1)
+
+    def test_cache_is_per_user(self, verify):
+        self.client.get("/api/decks/", **self.auth)
+        verify.return_value = {"sub": "user_2"}
+        response = self.client.get("/api/decks/", **self.auth)
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["title"], "Someone else's")
+
+    def test_writes_invalidate_cached_reads(self, _verify):
+        url = f"/api/flashcards/?deck_id={self.deck.id}"
+        self.client.get(url, **self.auth)
+        self.client.post(
+            "/api/flashcards/",
+            {"deck_id": self.deck.id, "question": "Q", "answer": "A"},
+            content_type="application/json",
+            **self.auth,
+        )
+        response = self.client.get(url, **self.auth)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.json()["results"]), 1)
+
+        self.client.get(f"/api/decks/{self.deck.id}/", **self.auth)
+        self.client.put(
+            f"/api/decks/{self.deck.id}/",
+            {"title": "Renamed"},
+            content_type="application/json",
+            **self.auth,
+        )
+        response = self.client.get(f"/api/decks/{self.deck.id}/", **self.auth)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["title"], "Renamed")
+
+    def test_writes_from_other_processes_invalidate_cached_reads(self, _verify):
+        url = f"/api/flashcards/?deck_id={self.deck.id}"
+        etag = self.client.get(url, **self.auth)["ETag"]
+        self.client.get("/api/decks/", **self.auth)
+
+        # The job worker saves straight to the database, never to this
+        # process's cache.
+        card = {"question": "Q", "answer": "A", "hint": ""}
+        generation.save_deck(
+            "user_1", {"page_title": "Cached", "deck_summary": "", "flashcards": [card]}
+        )
+        generation.save_deck(
+            "user_1", {"page_title": "New", "deck_summary": "", "flashcards": [card]}
+        )
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual((response.status_code, response["X-Cache"]), (200, "MISS"))
+        self.assertEqual(len(response.json()["results"]), 1)
+        response = self.client.get("/api/decks/", **self.auth)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.json()["results"]), 2)
+
+
+@mock.patch(
+    "flashquiz_proj.utils.auth_utils.averify_token", return_value={"sub": "user_1"}
+)
+class ConditionalGetTests(TestCase):
+    auth = {"HTTP_AUTHORIZATION": "Bearer test-token"}
+
+    def setUp(self):
+        cache.clear()
+        self.deck = Deck.objects.create(user_id="user_1", title="Conditional")
+        self.card = Flashcard.objects.create(deck=self.deck, question="Q", answer="A")
+
+    def get(self, url, **headers):
+        return self.client.get(url, **self.auth, **headers)
+
+    def test_matching_etag_returns_not_modified(self, _verify):
+        for url in [
+            "/api/decks/",
+            f"/api/decks/{self.deck.id}/",
+            f"/api/decks/{self.deck.id}/?include=flashcards",
+            f"/api/flashcards/?deck_id={self.deck.id}",
+        ]:
+            first = self.get(url)
+            self.assertEqual(first.status_code, 200)
+            self.assertIn("Authorization", first["Vary"])
+            with self.assertNumQueries(1):
+                second = self.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(second.status_code, 304)
+            self.assertEqual(second["ETag"], first["ETag"])
+            self.assertEqual(second.content, b"")
+
+    def test_last_modified_on_decks(self, _verify):
+        first = self.get(f"/api/decks/{self.deck.id}/")
+        second = self.get(
+            f"/api/decks/{self.deck.id}/",
+            HTTP_IF_MODIFIED_SINCE=first["Last-Modified"],
+        )
+        self.assertEqual(second.status_code, 304)
+
+    def test_deck_list_ignores_if_modified_since_after_delete(self, _verify):
+        newest = Deck.objects.create(user_id="user_1", title="Newest")
+        first = self.get("/api/decks/")
+        self.assertNotIn("Last-Modified", first)
+        self.client.delete(f"/api/decks/{newest.id}/", **self.auth)
+
+        # A date after every remaining deck's updated_at, as a client that
+        # saw the deleted deck would send.
+        since = http_date(time.time() + 60)
+        response = self.get("/api/decks/", HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_card_edit_changes_deck_etags(self, _verify):
+        urls = [
+            "/api/decks/",
+            f"/api/decks/{self.deck.id}/?include=flashcards",
+            f"/api/flashcards/?deck_id={self.deck.id}",
+        ]
+        etags = [self.get(url)["ETag"] for url in urls]
+        self.client.put(
+            f"/api/flashcards/{self.card.id}/",
+            {"answer": "B"},
+            content_type="application/json",
+            **self.auth,
+        )
+        for url, etag in zip(urls, etags):
+            response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_differs_per_page(self, _verify):
+        first = self.get("/api/decks/")
+        other = self.get("/api/decks/?page_size=1", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(other.status_code, 200)
+
+
+class FakeStream:
+    """Stands in for anthropic's AsyncMessageStream: yields the text in chunks."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        for chunk in self.chunks:
+            self.sent += 1
+            yield chunk
+
+    async def get_final_message(self):
+        return SimpleNamespace(usage=None)
+
+
+class FakeAnthropic:
+    def __init__(self, cards_text, chunk_size=7):
+        self.stream_obj = FakeStream(
+            [
+                cards_text[i : i + chunk_size]
+                for i in range(0, len(cards_text), chunk_size)
+            ]
+        )
+        self.messages = SimpleNamespace(create=self.create, stream=self.stream)
+
+    async def create(self, **kwargs):
+        return SimpleNamespace(content=[SimpleNamespace(text="A short summary.")])
+
+    def stream(self, **kwargs):
+        return self.stream_obj
+
+
+@mock.patch(
+    "flashquiz_proj.utils.auth_utils.averify_token", return_value={"sub": "user_1"}
+)
+@mock.patch(
+    "flashcards_app.utils.generation.fetch_wikipedia_content_cached",
+    return_value=("Octopus", "Octopuses are soft-bodied, eight-limbed molluscs."),
+)
+class GenerationStreamTests(TestCase):
+    # The async client takes headers by name rather than as WSGI environ keys.
+    headers = {"Authorization": "Bearer test-token"}
+    url = "/api/generate-flashcards/stream/"
+
+    def setUp(self):
+        cache.clear()
+        cards = [
+            {"question": f"Question {i}?", "answer": f"Answer {i}", "hint": "{x}"}
+            for i in range(5)
+        ]
+        self.fake = FakeAnthropic("```json\n" + json.dumps(cards, indent=2) + "\n```")
+        patcher = mock.patch(
+            "flashcards_app.utils.async_generation.get_async_client",
+            return_value=self.fake,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def events(self, response):
+        async for message in response.streaming_content:
+            event, data = message.decode().strip().split("\n")
+            yield event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+    async def test_cards_are_streamed_and_saved_as_they_arrive(self, _wiki, _verify):
+        response = await self.async_client.post(
+            self.url,
+            {"topic": "octopus"},
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = self.events(response)
+
+        event, deck = await anext(events)
+        self.assertEqual((event, deck["title"]), ("deck", "Octopus"))
+
+        event, card = await anext(events)
+        self.assertEqual(event, "card")
+        self.assertEqual(card["question"], "Question 0?")
+        # The first card is out (and saved) well before the model is done.
+        self.assertLess(self.fake.stream_obj.sent, len(self.fake.stream_obj.chunks) / 3)
+        self.assertTrue(await Flashcard.objects.filter(pk=card["id"]).aexists())
+
+        rest = [item async for item in events]
+        self.assertEqual([e for e, _ in rest], ["card"] * 4 + ["done"])
+        self.assertEqual(rest[-1][1]["count"], 5)
+        saved = await Deck.objects.aget(pk=deck["id"])
+        self.assertEqual(await saved.flashcards.acount(), 5)
+        self.assertEqual(saved.description, "A short summary.")
+
+    async def test_errors_are_sent_as_events(self, wiki, _verify):
+        wiki.side_effect = WikipediaNotFoundError("No Wikipedia page found.")
+        response = await self.async_client.post(
+            self.url,
+            {"topic": "zzz"},
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(
+            [item async for item in self.events(response)],
+            [("error", {"error": "No Wikipedia page found.", "status": 404})],
+        )
+
+
+CARDS = [
+    {"question": "Where is {this}?", "answer": 'A "quoted" place', "hint": "C:\\path"},
+    {"question": "Unicode?", "answer": "Caf\u00e9 \u2014 \U0001f419", "hint": ""},
+    {"question": "Brackets?", "answer": "[1, 2] and }", "hint": "Not {a} card"},
+]
+CARD_JSON = json.dumps(CARDS, indent=2)
+
+# Real-world shapes of the model's reply: (text, expected cards)
+PARSER_CORPUS = [
+    (CARD_JSON, CARDS),
+    ("```json\n" + CARD_JSON + "\n```", CARDS),
+    ("Here are your flashcards:\n" + CARD_JSON + "\nGood luck!", CARDS),
+    (json.dumps(CARDS), CARDS),
+    # Trailing commas inside a card and after the last one
+    (CARD_JSON.replace('"hint": ""', '"hint": "",').replace("}\n]", "},\n]"), CARDS),
+    # Truncated mid-card: the finished prefix survives
+    (CARD_JSON[: CARD_JSON.index("Brackets") + 20], CARDS[:2]),
+    # Stray brace in the prose before the array
+    ("Use { carefully: " + CARD_JSON, CARDS),
+    # Cards missing an answer are dropped, the rest kept
+    ('[{"question": "No answer"}, ' + json.dumps(CARDS[0]) + "]", CARDS[:1]),
+    ("I can't make flashcards from this.", []),
+    ("", []),
+]
+
+
+class CardParserTests(SimpleTestCase):
+    def test_corpus(self):
+        for text, expected in PARSER_CORPUS:
+            with self.subTest(text=text[:40]):
+                self.assertEqual(parse_cards(text), expected)
+
+    def test_any_chunking_gives_the_same_cards(self):
+        rng = random.Random(1234)
+        for text, expected in PARSER_CORPUS:
+            for _ in range(50):
+                parser = CardStreamParser()
+                cards = []
+                pos = 0
+                while pos < len(text):
+                    size = rng.randint(1, 12)
+                    cards += parser.feed(text[pos : pos + size])
+                    pos += size
+                self.assertEqual(cards, expected)
+
+    def test_truncation_keeps_every_closed_card(self):
+        text = "```json\n" + CARD_JSON
+        for cut in range(len(text) + 1):
+            cards = parse_cards(text[:cut])
+            self.assertEqual(cards, CARDS[: len(cards)])
+        self.assertEqual(parse_cards(text), CARDS)
+
+    def test_garbage_never_raises(self):
+        rng = random.Random(5678)
+        alphabet = '{}[]",:\\ abcqestionanswrhit\n`'
+        for _ in range(2000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+            for card in parse_cards(text):
+                self.assertEqual(set(card), {"question", "answer", "hint"})
+
+
+class SlowGenerator:
+    """Fake agenerate_content: sleeps like an LLM call and tracks concurrency."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, topic, fresh=False):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if topic == "missing":
+                raise GenerationError("No Wikipedia page found.", status=404)
+            if topic == "mercury":
+                raise GenerationError("Topic is ambiguous.", status=400)
+            return {
+                "page_title": topic.title(),
+                "deck_summary": f"About {topic}",
+                "flashcards": [{"question": "Q", "answer": "A", "hint": "H"}] * 3,
+            }
+        finally:
+            self.active -= 1
+
+
+@mock.patch(
+    "flashquiz_proj.utils.auth_utils.averify_token", return_value={"sub": "user_1"}
+)
+class BatchGenerationTests(TestCase):
+    auth = {"HTTP_AUTHORIZATION": "Bearer test-token"}
+    headers = {"Authorization": "Bearer test-token"}
+    url = "/api/generate-flashcards/batch/"
+
+    def setUp(self):
+        cache.clear()
+        self.generator = SlowGenerator()
+        patcher = mock.patch(
+            "flashcards_app.utils.batch.agenerate_content", self.generator
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def run_batch(self, topics, **body):
+        response = await self.async_client.post(
+            self.url,
+            {"topics": topics, **body},
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = []
+        async for message in response.streaming_content:
+            event, data = message.decode().strip().split("\n")
+            events.append(
+                (event.removeprefix("event: "), json.loads(data.removeprefix("data: ")))
+            )
+        return events
+
+    async def test_topics_run_concurrently_up_to_the_limit(self, _verify):
+        topics = [f"topic {i}" for i in range(8)]
+        events = await self.run_batch(topics, concurrency=4)
+
+        self.assertEqual(self.generator.peak, 4)
+        self.assertEqual(events[-1], ("done", {"succeeded": 8, "failed": 0}))
+        results = [data for event, data in events if event == "topic"]
+        self.assertEqual(sorted(r["index"] for r in results), list(range(8)))
+        self.assertEqual(await Deck.objects.filter(user_id="user_1").acount(), 8)
+        self.assertEqual(await Flashcard.objects.filter(user_id="user_1").acount(), 24)
+
+    @override_settings(GENERATION_BATCH_GLOBAL_CONCURRENCY=2)
+    async def test_abandoned_topics_keep_their_global_slot(self, _verify):
+        async def consume(topics):
+            async for _ in astream_batch("user_1", topics, concurrency=2):
+                pass
+
+        abandoned = asyncio.ensure_future(consume(["a", "b"]))
+        while self.generator.active < 2:
+            await asyncio.sleep(0)
+        # The client goes away; "a" and "b" keep generating for the others.
+        abandoned.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await abandoned
+
+        await consume(["c", "d"])
+        self.assertEqual(self.generator.peak, 2)
+
+    async def test_per_topic_errors(self, _verify):
+        events = await self.run_batch(["octopus", "missing", "mercury"])
+        results = {data["topic"]: data for event, data in events if event == "topic"}
+
+        self.assertEqual(results["octopus"]["status"], 201)
+        self.assertEqual(len(results["octopus"]["flashcards"]), 3)
+        self.assertEqual(results["missing"]["status"], 404)
+        self.assertEqual(results["mercury"]["status"], 400)
+        self.assertEqual(events[-1], ("done", {"succeeded": 1, "failed": 2}))
+
+    def test_rejects_bad_requests(self, _verify):
+        for body in [
+            {},
+            {"topics": []},
+            {"topics": ["ok", ""]},
+            {"topics": ["x" * 256]},
+        ]:
+            response = self.client.post(
+                self.url, body, content_type="application/json", **self.auth
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+@override_settings(GENERATION_JOB_RETRY_DELAY=5, GENERATION_JOB_MAX_ATTEMPTS=3)
+class GenerationJobTests(TestCase):
+    content = {
+        "page_title": "Octopus",
+        "deck_summary": "Eight arms.",
+        "flashcards": [{"question": "Q", "answer": "A", "hint": "H"}] * 3,
+    }
+
+    def setUp(self):
+        patcher = mock.patch(
+            "flashcards_app.utils.generation.coalesced_content",
+            return_value=self.content,
+        )
+        self.generate = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.job = jobs.enqueue_generation("user_1", "octopus")
+
+    def claim(self):
+        # Make a job waiting out its backoff due now, then claim it.
+        GenerationJob.objects.filter(status=GenerationJob.PENDING).update(
+            run_after=timezone.now()
+        )
+        return jobs.claim_next_job()
+
+    def test_job_saves_deck(self):
+        jobs.run_job(self.claim())
+
+        job = GenerationJob.objects.get(pk=self.job.pk)
+        self.assertEqual(
+            (job.status, job.stage, job.attempts), ("succeeded", "done", 1)
+        )
+        self.assertEqual(job.deck.title, "Octopus")
+        self.assertEqual(len(job.result["flashcards"]), 3)
+        self.assertEqual(Flashcard.objects.filter(deck=job.deck).count(), 3)
+
+    def test_only_one_worker_claims_a_job(self):
+        listed = GenerationJob.objects.get(pk=self.job.pk)  # as a second worker saw it
+        self.assertEqual(jobs.claim_next_job().pk, self.job.pk)
+        self.assertFalse(jobs.claim_job(listed, timezone.now()))
+        self.assertIsNone(jobs.claim_next_job())
+
+    def test_retryable_failure_backs_off(self):
+        self.generate.side_effect = GenerationError("AI service error.", retryable=True)
+        for attempt, delay in [(1, 5), (2, 10)]:
+            start = timezone.now()
+            jobs.run_job(self.claim())
+
+            job = GenerationJob.objects.get(pk=self.job.pk)
+            self.assertEqual((job.status, job.attempts), ("pending", attempt))
+            self.assertEqual(job.error, "AI service error.")
+            self.assertGreaterEqual(job.run_after, start + timedelta(seconds=delay))
+            # Not due again until the backoff has passed.
+            self.assertIsNone(jobs.claim_next_job())
+
+    def test_gives_up_after_max_attempts(self):
+        self.generate.side_effect = GenerationError("AI service error.", retryable=True)
+        for _ in range(3):
+            jobs.run_job(self.claim())
+
+        job = GenerationJob.objects.get(pk=self.job.pk)
+        self.assertEqual((job.status, job.attempts), ("failed", 3))
+        self.assertIsNone(self.claim())
+
+    def test_non_retryable_failure_is_final(self):
+        self.generate.side_effect = GenerationError("No Wikipedia page found.", 404)
+        jobs.run_job(self.claim())
+        self.assertEqual(GenerationJob.objects.get(pk=self.job.pk).status, "failed")
+
+    def test_expired_lease_is_reaped_and_the_late_attempt_discarded(self):
+        late = self.claim()
+        GenerationJob.objects.filter(pk=self.job.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        jobs.reap_expired_jobs()
+        job = GenerationJob.objects.get(pk=self.job.pk)
+        self.assertEqual((job.status, job.error), ("pending", "Job timed out."))
+
+        # The timed-out worker finishes anyway: nothing it saved is kept.
+        jobs.run_job(late)
+        self.assertFalse(Deck.objects.exists())
+
+        jobs.run_job(self.claim())
+        job = GenerationJob.objects.get(pk=self.job.pk)
+        self.assertEqual((job.status, job.attempts), ("succeeded", 2))
+        self.assertEqual(Flashcard.objects.count(), 3)
+
+    def test_retry_after_a_failed_save_does_not_duplicate_cards(self):
+        # Fails once the cards are written, before the job is marked done.
+        with mock.patch.object(
+            generation, "_card_payload", side_effect=RuntimeError("worker died")
+        ):
+            jobs.run_job(self.claim())
+        self.assertEqual(GenerationJob.objects.get(pk=self.job.pk).status, "pending")
+        self.assertFalse(Flashcard.objects.exists())
+
+        jobs.run_job(self.claim())
+        self.assertEqual(GenerationJob.objects.get(pk=self.job.pk).status, "succeeded")
+        self.assertEqual(Flashcard.objects.count(), 3)
+
+
+def row_locks():
+    """
+    Run the TopicGeneration row-lock path on any backend: on SQLite, which has
+    no SELECT ... FOR UPDATE, the lock becomes a plain SELECT.
+    """
+    features, ops = type(connection.features), type(connection.ops)
+    return [
+        mock.patch.object(features, "has_select_for_update", True),
+        mock.patch.object(ops, "for_update_sql", return_value="", create=True),
+    ]
+
+
+class TopicCoalescingTests(TransactionTestCase):
+    """Coalescing across processes, through the TopicGeneration row."""
+
+    def setUp(self):
+        for patcher in row_locks():
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.calls = 0
+
+    def generate(self):
+        self.calls += 1
+        return {"cards": self.calls}
+
+    async def agenerate(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {"cards": self.calls}
+
+    def finished_elsewhere(self, key):
+        # What another process leaves behind after generating `key`.
+        TopicGeneration.objects.create(
+            topic_key=key, result={"cards": "theirs"}, completed_at=timezone.now()
+        )
+
+    def test_result_from_another_process_is_reused(self):
+        self.finished_elsewhere("octopus")
+        flight = SingleFlight(window=60)
+
+        self.assertEqual(flight.run("octopus", self.generate), {"cards": "theirs"})
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(flight.stats()["db_followers"], 1)
+
+    async def test_async_leader_shares_its_result_with_other_processes(self):
+        flight = AsyncSingleFlight(SingleFlight(window=60))
+        results = await asyncio.gather(
+            *(flight.run("octopus", self.agenerate) for _ in range(3))
+        )
+        self.assertEqual(results, [{"cards": 1}] * 3)
+        row = await TopicGeneration.objects.aget(topic_key="octopus")
+        self.assertEqual(row.result, {"cards": 1})
+
+        # Another worker asking now takes the lock and reuses the row.
+        other_worker = AsyncSingleFlight(SingleFlight(window=60))
+        self.assertEqual(
+            await other_worker.run("octopus", self.agenerate), {"cards": 1}
+        )
+        self.assertEqual(self.calls, 1)
+
+    def test_fresh_requests_only_reuse_what_they_waited_on(self):
+        key = generation.flight_key("octopus", fresh=True)
+        self.finished_elsewhere(key)
+
+        result = SingleFlight(window=60).run(key, self.generate, window=0)
+        self.assertEqual(result, {"cards": 1})
+        self.assertEqual(
+            TopicGeneration.objects.get(topic_key=key).result, {"cards": 1}
+        )
+
+    def test_long_flight_keys_fit_the_column(self):
+        limit = TopicGeneration._meta.get_field("topic_key").max_length
+        topic = "x" * 255
+        keys = {
+            generation.flight_key(topic, fresh=True),
+            generation.flight_key(topic[:-1] + "y", fresh=True),
+            generation.flight_key(topic),
+        }
+        self.assertEqual(len(keys), 3)
+        self.assertTrue(all(len(key) <= limit for key in keys))
+        self.assertEqual(
+            generation.flight_key(" Octopus ", fresh=True), "octopus|fresh"
+        )
+
+        SingleFlight(window=60).run(max(keys), self.generate, window=0)
+        self.assertEqual(self.calls, 1)
+
+    @mock.patch(
+        "flashquiz_proj.utils.auth_utils.averify_token", return_value={"sub": "user_1"}
+    )
+    def test_long_topics_are_rejected(self, _verify):
+        for body in [{"topic": "x" * 256}, {"topic": "x" * 256, "async": True}]:
+            response = self.client.post(
+                "/api/generate-flashcards/",
+                body,
+                content_type="application/json",
+                HTTP_AUTHORIZATION="Bearer test-token",
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+class TokenCountingAnthropic:
+    """
+    Local stand-in for the Messages API that bills input tokens the way the
+    real one does: system blocks marked cache_control are written to the cache
+    on first use and read from it (not billed as input) afterwards.
+    """
+
+    def __init__(self):
+        self.cached = set()
+        self.calls = []
+        self.messages = SimpleNamespace(create=self.create)
+
+    def create(self, system=(), messages=(), **kwargs):
+        usage = dict.fromkeys(
+            [
+                "input_tokens",
+                "output_tokens",
+                "cache_creation_input_tokens",
+                "cache_read_input_tokens",
+            ],
+            0,
+        )
+        for block in system:
+            tokens = estimate_tokens(block["text"])
+            if "cache_control" not in block:
+                usage["input_tokens"] += tokens
+            elif block["text"] in self.cached:
+                usage["cache_read_input_tokens"] += tokens
+            else:
+                self.cached.add(block["text"])
+                usage["cache_creation_input_tokens"] += tokens
+        for message in messages:
+            usage["input_tokens"] += estimate_tokens(message["content"])
+        usage["output_tokens"] = 300
+        self.calls.append(usage)
+        return SimpleNamespace(
+            content=[SimpleNamespace(text="[]")], usage=SimpleNamespace(**usage)
+        )
+
+
+class PromptBudgetTests(SimpleTestCase):
+    def test_fit_to_budget_keeps_whole_sentences(self):
+        text = "First sentence here. " * 50
+        trimmed = fit_to_budget(text, 40)
+        self.assertLessEqual(estimate_tokens(trimmed), 40)
+        self.assertTrue(trimmed.endswith("here."))
+        self.assertEqual(fit_to_budget("Short.", 40), "Short.")
+
+    def test_fewer_input_tokens_per_generation(self):
+        # A long article lead, as Wikipedia returns for broad topics.
+        summary = "\n".join(
+            f"Paragraph {i} about the octopus and its nervous system. " * 12
+            for i in range(40)
+        )
+        # The old prompt: rules, examples and the whole article in one message.
+        old_prompt = (
+            generation.FLASHCARD_SYSTEM_PROMPT
+            + generation.FLASHCARD_PROMPT.format(
+                page_title="Octopus", wiki_summary=summary
+            )
+        )
+        old_input = estimate_tokens(old_prompt)
+
+        stub = TokenCountingAnthropic()
+        runs = 10
+        for _ in range(runs):
+            stub.create(**generation._flashcard_request("Octopus", summary))
+        billed = [call["input_tokens"] for call in stub.calls]
+        cache_reads = [call["cache_read_input_tokens"] for call in stub.calls]
+
+        budget = settings.GENERATION_INPUT_TOKEN_BUDGET
+        self.assertGreater(old_input, budget)
+        for call in stub.calls:
+            self.assertLessEqual(
+                call["input_tokens"]
+                + call["cache_read_input_tokens"]
+                + call["cache_creation_input_tokens"],
+                budget,
+            )
+        # After the first call the instructions come from the prompt cache.
+        self.assertEqual(cache_reads[0], 0)
+        self.assertTrue(all(cache_reads[1:]))
+        self.assertLess(sum(billed) / runs, old_input / 2)
+
+
+@mock.patch(
+    "flashquiz_proj.utils.auth_utils.averify_token", return_value={"sub": "user_1"}
+)
+class MetricsTests(TestCase):
+    auth = {"HTTP_AUTHORIZATION": "Bearer test-token"}
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(METRICS_TOKEN="", DEBUG=True)
+    def test_request_metrics_are_exported(self, _verify):
+        self.client.get("/api/decks/", **self.auth)
+        body = self.client.get("/metrics").content.decode()
+
+        self.assertIn(
+            'flashquiz_request_duration_seconds_count{view="deck-list-create",'
+            'method="GET",status="200"}',
+            body,
+        )
+        self.assertIn(
+            'flashquiz_request_db_queries_bucket{view="deck-list-create"', body
+        )
+        self.assertIn("flashquiz_response_cache_misses", body)
+        self.assertIn("# TYPE flashquiz_dependency_duration_seconds histogram", body)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self, _verify):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        for wrong in ["Bearer secreT", "Bearer sécret"]:
+            response = self.client.get("/metrics", HTTP_AUTHORIZATION=wrong)
+            self.assertEqual(response.status_code, 401)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN="", DEBUG=False)
+    def test_metrics_hidden_without_token_in_production(self, _verify):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+    @override_settings(SERVER_TIMING=True)
+    @mock.patch("flashquiz_proj.utils.auth_utils.CLERK_USER_DETAILS_MODE", "eager")
+    @mock.patch("flashquiz_proj.utils.auth_utils.get_clerk_client")
+    def test_server_timing_header(self, clerk, _verify):
+        clerk.return_value.users.get_async = mock.AsyncMock(
+            return_value=SimpleNamespace(first_name="Ada")
+        )
+        auth_utils.user_cache.clear()
+        response = self.client.get("/api/decks/", **self.auth)
+
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"')
+        # Eager mode looked the user up in Clerk, which is timed separately.
+        self.assertRegex(timing, r"clerk_user;dur=[\d.]+")
+
+
+class AmbiguousWikipedia:
+    """Every lookup of "Mercury" is ambiguous; its first option takes `delay`."""
+
+    PageError = PageError
+    DisambiguationError = DisambiguationError
+
+    def __init__(self, delay=0):
+        self.delay = delay
+
+    def page(self, title, auto_suggest=True):
+        if title == "Mercury":
+            raise DisambiguationError("Mercury", ["Mercury (planet)", "Mercury (god)"])
+        time.sleep(self.delay)
+        return SimpleNamespace(title=title, summary=f"{title} summary")
+
+    def search(self, query, results=10):
+        return [query]
+
+
+@override_settings(WIKIPEDIA_RESOLVE_BUDGET=0.2)
+class WikipediaDisambiguationTests(SimpleTestCase):
+    def fetch(self, wikipedia):
+        with mock.patch.object(helperfunc, "get_wikipedia", lambda: wikipedia):
+            return helperfunc.fetch_wikipedia_content("Mercury")
+
+    def test_first_option_is_used(self):
+        self.assertEqual(
+            self.fetch(AmbiguousWikipedia()),
+            ("Mercury (planet)", "Mercury (planet) summary"),
+        )
+
+    def test_option_fetch_counts_against_the_budget(self):
+        start = time.monotonic()
+        with self.assertRaises(WikipediaTimeoutError):
+            self.fetch(AmbiguousWikipedia(delay=1))
+        self.assertLess(time.monotonic() - start, 0.9)
+
+
+class CacheStatsCommandTests(TestCase):
+    def stats(self, *args):
+        out = io.StringIO()
+        call_command(*args, stdout=out)
+        return out.getvalue()
+
+    def test_wikipedia_cache_stats_come_from_the_table(self):
+        now = timezone.now()
+        for topic, kind, expires_at in [
+            ("a", WikipediaCacheEntry.FOUND, now + timedelta(days=1)),
+            ("b", WikipediaCacheEntry.NOT_FOUND, now + timedelta(days=1)),
+            ("c", WikipediaCacheEntry.FOUND, now - timedelta(days=1)),
+        ]:
+            WikipediaCacheEntry.objects.create(
+                topic_key=topic, kind=kind, expires_at=expires_at
+            )
+        out = self.stats("wikipedia_cache", "stats")
+        self.assertIn("DB entries: 3", out)
+        self.assertIn("found: 2", out)
+        self.assertIn("not found: 1", out)
+        self.assertIn("Expired (purge --expired): 1", out)
+
+    def test_card_cache_stats_come_from_the_table(self):
+        for model, hits in [(generation.MODEL, 3), ("retired-model", 2)]:
+            GeneratedCardSet.objects.create(
+                page_title="Octopus",
+                summary_hash="x",
+                prompt_version=generation.PROMPT_VERSION,
+                model=model,
+                cards=[],
+                hits=hits,
+            )
+        out = self.stats("card_cache", "stats")
+        self.assertIn("Card sets: 2", out)
+        self.assertIn("evictable: 1", out)
+        self.assertIn("Hits recorded on card sets: 5", out)
+
+
+class BenchTests(SimpleTestCase):
+    def test_every_url_has_a_scenario(self):
+        from .bench.scenarios import SCENARIOS
+        from .urls import urlpatterns
+
+        covered = {scenario.url_name for scenario in SCENARIOS}
+        self.assertEqual({pattern.name for pattern in urlpatterns} - covered, set())
+
+    def test_compare_flags_regressions(self):
+        from .bench.runner import compare
+
+        base = {
+            "p95_ms": 10.0,
+            "throughput_rps": 100.0,
+            "queries_per_request": 2.0,
+            "errors": 0,
+        }
+        within = dict(base, p95_ms=12.0, throughput_rps=85.0)
+        self.assertEqual(compare({"a": within}, {"a": base}, 0.25), [])
+
+        worse = dict(base, p95_ms=20.0, queries_per_request=3.0, errors=1)
+        regressions = compare({"a": worse, "new": base}, {"a": base}, 0.25)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(all(line.startswith("a: ") for line in regressions))
+
+
+@mock.patch(
+    "flashquiz_proj.utils.auth_utils.averify_token", return_value={"sub": "user_1"}
+)
+class BenchFixtureTests(TestCase):
+    def test_deep_page_scenarios_read_the_end_of_the_list(self, _verify):
+        from .bench.scenarios import SCENARIOS, Fixture
+
+        cache.clear()
+        fixture = Fixture(["user_1"], run_id=0, decks_per_user=60, cards_per_deck=60)
+        fixture.seed()
+        self.assertEqual(Flashcard.objects.count(), 3600)
+        deck_id = fixture.deck_id(0)
+        tails = {
+            "decks.list_deep": fixture.decks["user_1"][54:],
+            "flashcards.list_deep": list(
+                Flashcard.objects.filter(deck_id=deck_id)
+                .order_by("id")
+                .values_list("id", flat=True)[55:]
+            ),
+        }
+
+        for scenario in SCENARIOS:
+            if scenario.name not in tails:
+                continue
+            scenario.prepare(fixture, 1)
+            request = scenario.build(fixture, 0)
+            response = self.client.get(
+                request.path, HTTP_AUTHORIZATION="Bearer test-token"
+            )
+            self.assertEqual(response.status_code, 200)
+            ids = [row["id"] for row in response.json()["results"]]
+            self.assertTrue(ids, scenario.name)
+            self.assertLessEqual(set(ids), set(tails[scenario.name]), scenario.name)
+
+
+@mock.patch(
+    "flashquiz_proj.utils.auth_utils.averify_token", return_value={"sub": "user_1"}
+)
+class FeedbackCreateTests(TestCase):
+    def test_feedback_belongs_to_the_caller(self, _verify):
+        deck = Deck.objects.create(user_id="user_2", title="Shared")
+        response = self.client.post(
+            "/api/feedback/",
+            {"deck": deck.id, "comment": "Nice", "rating": 5},
+            content_type="application/json",
+            HTTP_AUTHORIZATION="Bearer test-token",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Feedback.objects.get().user_id, "user_1")
+
+
+class LoggingTests(SimpleTestCase):
+    def test_queue_handler_keeps_request_id_and_traceback(self):
+        records = queue.SimpleQueue()
+        handler = log.BackgroundQueueHandler(records)
+        handler.addFilter(log.RequestIdFilter())
+        logger = logging.getLogger("flashquiz.tests.log")
+        logger.addHandler(handler)
+        logger.propagate = False
+        self.addCleanup(logger.removeHandler, handler)
+
+        token = log._request_id.set("req-1")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Failed for %s", "topic")
+        finally:
+            log._request_id.reset(token)
+
+        entry = json.loads(log.JsonFormatter().format(records.get_nowait()))
+        self.assertEqual(entry["message"], "Failed for topic")
+        self.assertEqual(entry["request_id"], "req-1")
+        self.assertIn("ValueError: boom", entry["exc_info"])
+
+    @override_settings(LOG_PAYLOAD_SAMPLE_RATE=1.0, LOG_PAYLOAD_MAX_CHARS=10)
+    def test_payloads_are_capped(self):
+        logger = logging.getLogger("flashquiz.tests.payload")
+        with self.assertLogs(logger, "DEBUG") as logs:
+            log.log_payload(logger, "Raw", "x" * 25)
+        self.assertEqual(
+            logs.records[0].getMessage(), f"Raw: {'x' * 10}... [15 more chars]"
+        )
+
+    @override_settings(LOG_PAYLOAD_SAMPLE_RATE=0.0)
+    def test_payloads_are_sampled(self):
+        logger = logging.getLogger("flashquiz.tests.payload")
+        logger.setLevel(logging.DEBUG)
+        self.addCleanup(logger.setLevel, logging.NOTSET)
+        with mock.patch.object(logger, "debug") as debug:
+            log.log_payload(logger, "Raw", "x")
+        debug.assert_not_called()
+
+    def test_reconfiguring_keeps_handlers_behind_the_queue(self):
+        self.addCleanup(log.configure, settings.LOGGING)
+        config = {
+            "version": 1,
+            "disable_existing_loggers": False,
+            "handlers": {
+                "buffer": {
+                    "class": "logging.handlers.BufferingHandler",
+                    "capacity": 100,
+                }
+            },
+            "root": {"handlers": ["buffer"], "level": "WARNING"},
+        }
+        log.configure(config)
+        first = log._listener
+        log.configure(config)
+
+        root = logging.getLogger()
+        self.assertEqual(
+            [type(handler) for handler in root.handlers], [log.BackgroundQueueHandler]
+        )
+        self.assertIsNone(first._thread)
+        (buffer,) = log._listener.handlers
+        logging.getLogger("flashquiz.tests.reconfigure").warning("queued")
+        for _ in range(100):
+            if buffer.buffer:
+                break
+            time.sleep(0.01)
+        self.assertEqual([record.msg for record in buffer.buffer], ["queued"])
+
+    @override_settings(METRICS_TOKEN="")
+    def test_request_id_header(self):
+        response = self.client.get("/metrics", HTTP_X_REQUEST_ID="abc123")
+        self.assertEqual(response["X-Request-ID"], "abc123")
+        self.assertRegex(self.client.get("/metrics")["X-Request-ID"], r"^[0-9a-f]{32}$")
+
+    @override_settings(METRICS_TOKEN="")
+    def test_malformed_request_id_is_replaced(self):
+        for bad in ["x" * 65, "id with spaces", "a\tb", "<script>"]:
+            response = self.client.get("/metrics", HTTP_X_REQUEST_ID=bad)
+            self.assertRegex(response["X-Request-ID"], r"^[0-9a-f]{32}$")
+
+
+class AsyncViewTests(TestCase):
+    """The async request path: JWKS over httpx, async middleware, coalescing."""
+
+    def setUp(self):
+        from .bench.fakes import FakeJWKSResponse, LocalSigner
+
+        cache.clear()
+        auth_utils.jwks_store.clear()
+        auth_utils.token_cache.clear()
+        self.addCleanup(auth_utils.jwks_store.clear)
+        self.signer = LocalSigner()
+        self.jwks_fetch = mock.AsyncMock(
+            return_value=FakeJWKSResponse(self.signer.jwks)
+        )
+        patcher = mock.patch("httpx.AsyncClient.get", self.jwks_fetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(SERVER_TIMING=True)
+    async def test_signed_token_is_verified_without_blocking(self):
+        await Deck.objects.acreate(user_id="user_1", title="Async")
+        headers = {"Authorization": f"Bearer {self.signer.token('user_1')}"}
+
+        for _ in range(2):
+            response = await self.async_client.get("/api/decks/", headers=headers)
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["title"], "Async")
+        # Fetched once over httpx, then served from the key store.
+        self.jwks_fetch.assert_awaited_once()
+        self.assertTrue(response["X-Request-ID"])
+        # Queries run on sync_to_async threads still count toward the request.
+        self.assertRegex(response["Server-Timing"], r'desc="[1-9]\d* queries"')
+
+    async def test_bad_token_is_rejected(self):
+        response = await self.async_client.get(
+            "/api/decks/", headers={"Authorization": "Bearer not-a-jwt"}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    async def test_concurrent_runs_share_one_execution(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def generate():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"page_title": "Octopus"}
+
+        results = await asyncio.gather(
+            *(flight.run("octopus", generate) for _ in range(5))
+        )
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"page_title": "Octopus"}] * 5)
+        self.assertEqual(flight.stats()["followers"], 4)
+
+
+class StartupTests(SimpleTestCase):
+    """A cold worker must not import the SDKs the providers registry defers."""
+
+    # Time and memory depend on the machine, so those budgets are enforced by
+    # `python -m flashquiz_proj.utils.startup --max-seconds/--max-rss` in the
+    # deploy pipeline rather than here.
+    def test_worker_cold_start(self):
+        result = startup.profile()
+        self.assertEqual(result["deferred_loaded"], [])
+
+    def test_over_budget(self):
+        result = {"seconds": 1.5, "max_rss_mb": 80, "deferred_loaded": []}
+        self.assertEqual(startup.over_budget(result, 2, 100), [])
+        self.assertEqual(len(startup.over_budget(result, 1, 50)), 2)
+        result["deferred_loaded"] = ["anthropic"]
+        self.assertEqual(
+            startup.over_budget(result), ["imported at startup: anthropic"]
+        )
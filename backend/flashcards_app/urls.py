@@ -7,7 +7,10 @@ from .views import (
     FeedbackListCreateView,
     FlashcardDetailView,
     FlashcardListCreateView,
+    GenerateFlashcardsBatchView,
+    GenerateFlashcardsStreamView,
     GenerateFlashcardsView,
+    GenerationJobDetailView,
 )
 
 urlpatterns = [
@@ -34,4 +37,19 @@ urlpatterns = [
         GenerateFlashcardsView.as_view(),
         name="generate-flashcards",
     ),
+    path(
+        "api/generate-flashcards/stream/",
+        GenerateFlashcardsStreamView.as_view(),
+        name="generate-flashcards-stream",
+    ),
+    path(
+        "api/generate-flashcards/batch/",
+        GenerateFlashcardsBatchView.as_view(),
+        name="generate-flashcards-batch",
+    ),
+    path(
+        "api/generate-flashcards/<int:job_id>/",
+        GenerationJobDetailView.as_view(),
+        name="generation-job-detail",
+    ),
 ]
@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from flashquiz_proj.utils.metrics import registry, timed
+from flashquiz_proj.utils.providers import providers
+
+from ..models import Deck, Flashcard
+from .card_cache import card_cache
+from .card_parser import CardStreamParser
+from .coalesce import AsyncSingleFlight
+from .generation import (
+    MODEL,
+    PROMPT_VERSION,
+    GenerationError,
+    _anthropic_errors,
+    _card_payload,
+    _flashcard_request,
+    _summary_request,
+    cached_content,
+    fetch_source,
+    flight_key,
+    generation_flight,
+    parsed_content,
+    save_deck,
+)
+from .tokens import token_usage
+
+logger = logging.getLogger(__name__)
+
+# NOTE: The async views run generation on the worker's event loop: Claude is
+# called through AsyncAnthropic, so a request waiting on the model holds no
+# thread and one worker can have many generations in flight. Only the
+# Wikipedia lookup (the library has no async API), the ORM and, on Postgres,
+# the leader's TopicGeneration row lock still use threads.
+async_generation_flight = AsyncSingleFlight(generation_flight)
+registry.register_stats(
+    "flashquiz_async_generation_coalescing", async_generation_flight.stats
+)
+
+
+def get_async_client():
+    return providers.get("anthropic_async")
+
+
+async def _atimed_create(client, stage, **kwargs):
+    start = time.perf_counter()
+    try:
+        with timed(f"anthropic_{stage}"):
+            response = await client.messages.create(**kwargs)
+        token_usage.record(stage, getattr(response, "usage", None))
+        return response
+    finally:
+        logger.info(
+            "Anthropic %s call took %.0f ms",
+            stage,
+            (time.perf_counter() - start) * 1000,
+        )
+
+
+async def agenerate_flashcards(client, page_title, wiki_summary):
+    """Async generate_flashcards(): both prompts run as tasks on the loop."""
+    start = time.perf_counter()
+    summary_task = asyncio.ensure_future(
+        _atimed_create(client, "summary", **_summary_request(wiki_summary))
+    )
+    try:
+        ai_response = await _atimed_create(
+            client, "flashcards", **_flashcard_request(page_title, wiki_summary)
+        )
+    except BaseException:
+        summary_task.cancel()
+        raise
+    ai_summary = await summary_task
+
+    logger.info(
+        "Generation pipeline took %.0f ms", (time.perf_counter() - start) * 1000
+    )
+    return ai_response.content[0].text, ai_summary.content[0].text
+
+
+def _fetch_source(topic):
+    # Runs outside the request's ORM thread, so it closes its own connection.
+    try:
+        return fetch_source(topic)
+    finally:
+        close_old_connections()
+
+
+async def afetch_source(topic):
+    return await sync_to_async(_fetch_source, thread_sensitive=False)(topic)
+
+
+async def agenerate_content(topic, fresh=False):
+    """Async generate_content(); same result and errors."""
+    page_title, wiki_summary = await afetch_source(topic)
+
+    if not fresh:
+        cached = await sync_to_async(cached_content)(page_title, wiki_summary)
+        if cached is not None:
+            return cached
+
+    with _anthropic_errors():
+        cards_text, deck_summary = await agenerate_flashcards(
+            get_async_client(), page_title, wiki_summary
+        )
+    return await sync_to_async(parsed_content)(
+        page_title, wiki_summary, cards_text, deck_summary
+    )
+
+
+async def acoalesced_content(topic, fresh=False, generate=None):
+    """
+    Async coalesced_content(): shared with requests on this and other workers.
+    `generate` replaces agenerate_content() when this caller ends up leading.
+    """
+    generate = generate or agenerate_content
+    return await async_generation_flight.run(
+        flight_key(topic, fresh),
+        lambda: generate(topic, fresh=fresh),
+        window=0 if fresh else None,
+    )
+
+
+async def agenerate_deck(user_id, topic, fresh=False):
+    """Async generate_deck(), coalesced with concurrent requests for the topic."""
+    content = await acoalesced_content(topic, fresh=fresh)
+    return await sync_to_async(save_deck)(user_id, content)
+
+
+async def _replay(cards):
+    for card in cards:
+        yield card
+
+
+async def astream_deck(user_id, topic, fresh=False):
+    """
+    Streaming deck generation for the SSE endpoint. Yields (event, data)
+    pairs: "deck" once the target deck exists, "card" for each card as soon
+    as Claude finishes writing it (already saved), then "done", or "error"
+    with the message and status generate_deck would have raised.
+
+    Streams are not coalesced with concurrent requests; a card set cached for
+    the same article is replayed instead of prompting Claude.
+    """
+    try:
+        page_title, wiki_summary = await afetch_source(topic)
+    except GenerationError as e:
+        yield "error", {"error": e.message, "status": e.status}
+        return
+
+    cached = None
+    if not fresh:
+        cached = await sync_to_async(card_cache.get)(
+            page_title, wiki_summary, PROMPT_VERSION, MODEL
+        )
+    summary_task = None
+    if cached is None:
+        summary_task = asyncio.ensure_future(
+            _atimed_create(
+                get_async_client(), "summary", **_summary_request(wiki_summary)
+            )
+        )
+
+    deck, created = await Deck.objects.aget_or_create(
+        user_id=user_id,
+        title=page_title,
+        defaults={"description": cached[0] if cached else ""},
+    )
+    yield "deck", {"id": deck.id, "title": deck.title}
+
+    saved = []
+    try:
+        if cached is not None:
+            cards = _replay(cached[1])
+        else:
+            cards = _astream_cards(page_title, wiki_summary)
+        async for card in cards:
+            flashcard = await Flashcard.objects.acreate(
+                deck=deck,
+                user_id=deck.user_id,
+                question=card["question"],
+                answer=card["answer"],
+                hint=card.get("hint") or "",
+            )
+            saved.append(card)
+            yield "card", _card_payload(flashcard)
+
+        if not saved:
+            raise GenerationError("Failed to generate flashcards.", retryable=True)
+
+        if summary_task is not None:
+            with _anthropic_errors():
+                deck_summary = (await summary_task).content[0].text
+            if created:
+                # Update in place: the card inserts have moved the version on.
+                await Deck.objects.filter(pk=deck.pk).aupdate(description=deck_summary)
+                await sync_to_async(Deck.touch)(deck.pk)
+            await sync_to_async(card_cache.set)(
+                page_title, wiki_summary, PROMPT_VERSION, MODEL, deck_summary, saved
+            )
+    except GenerationError as e:
+        if created and not saved:
+            await deck.adelete()
+        yield "error", {"error": e.message, "status": e.status}
+        return
+    finally:
+        # Also covers a client that disconnected mid-stream.
+        if summary_task is not None and not summary_task.done():
+            summary_task.cancel()
+
+    yield "done", {"deck": {"id": deck.id, "title": deck.title}, "count": len(saved)}
+
+
+async def _astream_cards(page_title, wiki_summary):
+    start = time.perf_counter()
+    parser = CardStreamParser()
+    with _anthropic_errors(), timed("anthropic_flashcards_stream"):
+        async with get_async_client().messages.stream(
+            **_flashcard_request(page_title, wiki_summary)
+        ) as stream:
+            async for text in stream.text_stream:
+                for card in parser.feed(text):
+                    logger.debug(
+                        "Streamed card after %.0f ms",
+                        (time.perf_counter() - start) * 1000,
+                    )
+                    yield card
+            token_usage.record("flashcards", (await stream.get_final_message()).usage)
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .async_generation import acoalesced_content, agenerate_content
+from .generation import GenerationError, save_deck
+
+logger = logging.getLogger(__name__)
+
+# NOTE: One semaphore per event loop (one per ASGI worker) caps the topics
+# being generated at once across every batch request on it; each request
+# additionally keeps at most `concurrency` of its own topics running.
+_batch_slots = weakref.WeakKeyDictionary()
+
+
+def _global_slots():
+    loop = asyncio.get_running_loop()
+    slots = _batch_slots.get(loop)
+    if slots is None:
+        slots = _batch_slots[loop] = asyncio.Semaphore(
+            settings.GENERATION_BATCH_GLOBAL_CONCURRENCY
+        )
+    return slots
+
+
+async def _slotted(topic, fresh=False):
+    # Runs as the flight leader, so the slot is held for as long as Claude is
+    # actually being prompted, even after every batch waiting on it has gone.
+    async with _global_slots():
+        return await agenerate_content(topic, fresh=fresh)
+
+
+async def _agenerate(topic, fresh):
+    return await acoalesced_content(topic, fresh=fresh, generate=_slotted)
+
+
+async def astream_batch(user_id, topics, concurrency, fresh=False):
+    """
+    Generate a deck per topic, `concurrency` topics at a time, each as a task
+    on the event loop. Yields ("topic", result) as each topic finishes - in
+    completion order, with its index in `topics` - and then ("done", totals).
+    A topic that fails carries the error and status generate_deck would have
+    raised instead of a deck.
+    """
+    pending = iter(enumerate(topics))
+    running = {}
+
+    def start_next():
+        for index, topic in pending:
+            task = asyncio.ensure_future(_agenerate(topic, fresh))
+            running[task] = (index, topic)
+            return
+
+    for _ in range(concurrency):
+        start_next()
+
+    succeeded = failed = 0
+    try:
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, topic = running.pop(task)
+                start_next()
+                result = {"index": index, "topic": topic}
+                try:
+                    saved = await sync_to_async(save_deck)(user_id, task.result())
+                    result.update(saved, status=201)
+                    succeeded += 1
+                except GenerationError as e:
+                    result.update(error=e.message, status=e.status)
+                    failed += 1
+                except Exception:
+                    logger.exception("Batch generation failed for %r", topic)
+                    result.update(error="Failed to generate flashcards.", status=500)
+                    failed += 1
+                yield "topic", result
+    finally:
+        # The client went away: stop the topics still running.
+        for task in running:
+            task.cancel()
+
+    yield "done", {"succeeded": succeeded, "failed": failed}
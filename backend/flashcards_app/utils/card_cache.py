@@ -0,0 +1,93 @@
+import hashlib
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F, Q
+from django.utils import timezone
+
+from flashquiz_proj.utils.metrics import registry
+
+from ..models import GeneratedCardSet
+
+logger = logging.getLogger(__name__)
+
+
+def summary_hash(wiki_summary):
+    return hashlib.sha256(wiki_summary.encode("utf-8")).hexdigest()
+
+
+class CardCache:
+    """
+    Cross-user cache of generated card sets, keyed by
+    (page title, summary hash, prompt version, model).
+    """
+
+    def __init__(self, max_age):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, page_title, wiki_summary, prompt_version, model):
+        entry = (
+            GeneratedCardSet.objects.filter(
+                page_title=page_title,
+                summary_hash=summary_hash(wiki_summary),
+                prompt_version=prompt_version,
+                model=model,
+                created_at__gt=timezone.now() - timedelta(seconds=self.max_age),
+            )
+            .only("id", "deck_summary", "cards")
+            .first()
+        )
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            return None
+        GeneratedCardSet.objects.filter(pk=entry.pk).update(hits=F("hits") + 1)
+        return entry.deck_summary, entry.cards
+
+    def set(self, page_title, wiki_summary, prompt_version, model, deck_summary, cards):
+        try:
+            GeneratedCardSet.objects.update_or_create(
+                page_title=page_title,
+                summary_hash=summary_hash(wiki_summary),
+                prompt_version=prompt_version,
+                model=model,
+                defaults={
+                    "deck_summary": deck_summary,
+                    "cards": cards,
+                    "created_at": timezone.now(),
+                },
+            )
+        except IntegrityError:
+            # Another worker stored the same key first; theirs is as good.
+            logger.info("Card set for %r already cached", page_title)
+
+    def evict(self, prompt_version, model):
+        """Delete entries past max age or made with another prompt/model."""
+        deleted, _ = GeneratedCardSet.objects.filter(
+            Q(created_at__lte=timezone.now() - timedelta(seconds=self.max_age))
+            | ~Q(prompt_version=prompt_version)
+            | ~Q(model=model)
+        ).delete()
+        return deleted
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+card_cache = CardCache(max_age=settings.CARD_CACHE_MAX_AGE)
+registry.register_stats("flashquiz_card_cache", card_cache.stats)
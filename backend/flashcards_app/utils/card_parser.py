@@ -0,0 +1,127 @@
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Characters that matter while scanning inside a card object / inside a string
+_OBJECT_SPECIAL = re.compile(r'[{}"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_TRAILING_COMMA = re.compile(r",\s*}$")
+
+
+def clean_card(item):
+    """Normalize one parsed card; None if it isn't a usable card."""
+    if not isinstance(item, dict):
+        return None
+    question = item.get("question")
+    answer = item.get("answer")
+    hint = item.get("hint") or ""
+    if not isinstance(question, str) or not isinstance(answer, str):
+        return None
+    if not isinstance(hint, str):
+        hint = str(hint)
+    question, answer = question.strip(), answer.strip()
+    if not question or not answer:
+        return None
+    return {"question": question, "answer": answer, "hint": hint.strip()}
+
+
+class CardStreamParser:
+    """
+    Pulls flashcard objects out of LLM output as it streams in, so each card
+    can be used as soon as its closing brace arrives. feed() takes the next
+    chunk of text and returns the cards completed by it.
+
+    Anything outside a card object (code fences, the enclosing array, prose)
+    is skipped, and a truncated response still yields every card that closed
+    before the cut. Cards are flat, so a "{" inside an unfinished card means
+    the earlier "{" was stray text and the card restarts there. Only the
+    unfinished card is buffered between chunks.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0  # next unscanned index in _text
+        self._start = None  # index of the current card's opening brace
+        self._in_string = False
+        self.skipped = 0
+
+    def feed(self, chunk):
+        text = self._text + chunk if self._text else chunk
+        pos = self._pos
+        cards = []
+        while True:
+            if self._start is None:
+                pos = text.find("{", pos)
+                if pos == -1:
+                    break
+                self._start = pos
+                pos += 1
+            elif self._in_string:
+                match = _STRING_SPECIAL.search(text, pos)
+                if match is None:
+                    pos = len(text)
+                    break
+                if match.group() == "\\":
+                    if match.end() == len(text):
+                        # Escape split across chunks; rescan it next time.
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                else:
+                    self._in_string = False
+                    pos = match.end()
+            else:
+                match = _OBJECT_SPECIAL.search(text, pos)
+                if match is None:
+                    pos = len(text)
+                    break
+                pos = match.end()
+                ch = match.group()
+                if ch == '"':
+                    self._in_string = True
+                elif ch == "{":
+                    self._start = match.start()
+                else:
+                    card = self._load(text[self._start : pos])
+                    if card is not None:
+                        cards.append(card)
+                    self._start = None
+
+        if self._start is None:
+            self._text = ""
+            self._pos = 0
+        else:
+            self._text = text[self._start :]
+            self._pos = pos - self._start
+            self._start = 0
+        return cards
+
+    def _load(self, raw):
+        try:
+            item = json.loads(raw)
+        except json.JSONDecodeError:
+            # The most common slip: a trailing comma before the closing brace.
+            try:
+                item = json.loads(_TRAILING_COMMA.sub("}", raw))
+            except json.JSONDecodeError as e:
+                self.skipped += 1
+                logger.warning("Skipping malformed card (%s)", e)
+                return None
+        card = clean_card(item)
+        if card is None:
+            self.skipped += 1
+            logger.warning("Skipping card without a question and answer")
+        return card
+
+
+def parse_cards(text):
+    """Every well-formed card in a complete LLM response."""
+    parser = CardStreamParser()
+    cards = parser.feed(text)
+    if parser.skipped:
+        logger.warning(
+            "Parsed %d flashcards, skipped %d malformed", len(cards), parser.skipped
+        )
+    return cards
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import threading
+import weakref
+from concurrent.futures import Future
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from ..models import TopicGeneration
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+
+    Within a process, the first caller (the leader) runs the function and
+    later callers with the same key wait on its Future. Across processes the
+    leader also holds a row lock on the TopicGeneration row for the key;
+    followers in other processes block on that lock and then reuse the result
+    the leader stored there, as long as it was finished no more than `window`
+    seconds before they asked. run(..., window=0) only reuses a result
+    finished after the caller asked, i.e. one it actually waited on.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+        self.db_followers = 0
+
+    def run(self, key, fn, window=None):
+        window = self.window if window is None else window
+        reuse_after = timezone.now() - timedelta(seconds=window)
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            logger.info("Waiting on in-flight generation for %r", key)
+            return future.result()
+
+        try:
+            result = self._run_locked(key, fn, reuse_after)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self):
+        with self._lock:
+            leaders = self.leaders
+            followers = self.followers + self.db_followers
+            return {
+                "leaders": leaders,
+                "followers": self.followers,
+                "db_followers": self.db_followers,
+                "coalescing_ratio": (
+                    followers / (leaders + followers) if leaders + followers else 0.0
+                ),
+            }
+
+    @staticmethod
+    def locks_rows():
+        # SQLite has no row locks; holding its write lock for a whole LLM call
+        # would stall every other write, so coalesce in-process only there.
+        return connection.features.has_select_for_update
+
+    def _run_locked(self, key, fn, reuse_after):
+        if not self.locks_rows():
+            return fn()
+
+        with transaction.atomic():
+            row = self._lock_row(key)
+            if row.completed_at and row.completed_at >= reuse_after:
+                with self._lock:
+                    self.leaders -= 1
+                    self.db_followers += 1
+                logger.info("Reusing generation from another worker for %r", key)
+                return row.result
+
+            result = fn()
+            row.result = result
+            row.completed_at = timezone.now()
+            row.save(update_fields=["result", "completed_at"])
+            return result
+
+    def _lock_row(self, key):
+        try:
+            with transaction.atomic():
+                TopicGeneration.objects.get_or_create(topic_key=key)
+        except IntegrityError:
+            pass  # Another process created it first
+        return TopicGeneration.objects.select_for_update().get(topic_key=key)
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines: concurrent callers on the same event loop
+    that share a key await one run of `fn()`.
+
+    Given a SingleFlight to share, the leader also coalesces across processes
+    through it: a thread takes the TopicGeneration row lock and waits while
+    `fn()` runs on the event loop, so other processes wait on the lock and
+    reuse the result as they would for a sync caller. Holding the lock costs
+    the leader a thread and a DB connection; followers cost nothing.
+    """
+
+    def __init__(self, shared=None):
+        self.shared = shared
+        # One table per event loop; a task can only be awaited on its own.
+        self._inflight = weakref.WeakKeyDictionary()
+        self.leaders = 0
+        self.followers = 0
+
+    async def run(self, key, fn, window=None):
+        inflight = self._inflight.setdefault(asyncio.get_running_loop(), {})
+        task = inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = inflight[key] = asyncio.ensure_future(self._lead(key, fn, window))
+
+            def forget(done):
+                if inflight.get(key) is done:
+                    del inflight[key]
+
+            task.add_done_callback(forget)
+        else:
+            self.followers += 1
+            logger.info("Waiting on in-flight generation for %r", key)
+        # A caller that goes away must not cancel the run for the others.
+        return await asyncio.shield(task)
+
+    async def _lead(self, key, fn, window):
+        if self.shared is None or not self.shared.locks_rows():
+            return await fn()
+
+        loop = asyncio.get_running_loop()
+
+        def locked():
+            try:
+                return self.shared.run(
+                    key,
+                    lambda: asyncio.run_coroutine_threadsafe(fn(), loop).result(),
+                    window=window,
+                )
+            finally:
+                close_old_connections()
+
+        return await sync_to_async(locked, thread_sensitive=False)()
+
+    def stats(self):
+        leaders, followers = self.leaders, self.followers
+        return {
+            "leaders": leaders,
+            "followers": followers,
+            "coalescing_ratio": (
+                followers / (leaders + followers) if leaders + followers else 0.0
+            ),
+        }
@@ -0,0 +1,84 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+from rest_framework.status import HTTP_200_OK, HTTP_304_NOT_MODIFIED
+
+
+def path_tag(request):
+    """Short digest of the full path, so each page/filter gets its own ETag."""
+    return hashlib.sha256(request.get_full_path().encode("utf-8")).hexdigest()[:16]
+
+
+def conditional_response(validators):
+    """
+    Answer GETs with 304 Not Modified when the client's If-None-Match (or
+    If-Modified-Since) still matches, before the view queries or serializes
+    anything.
+
+    `validators(request, *args, **kwargs)` returns (etag, last_modified) from
+    cheap version columns, or None to let the view run (e.g. to 404). Goes
+    under @clerk_authenticated so request.user_details is set. An async view
+    method takes async validators. The ETag is left on request.etag, where
+    @cached_response below it picks it up as its cache key.
+    """
+
+    def decorator(view_method):
+        if iscoroutinefunction(view_method):
+
+            @wraps(view_method)
+            async def async_wrapper(self, request, *args, **kwargs):
+                found = await validators(request, *args, **kwargs)
+                if found is None:
+                    return await view_method(self, request, *args, **kwargs)
+
+                etag, timestamp, not_modified = _check(request, found)
+                request.etag = etag
+                response = not_modified or await view_method(
+                    self, request, *args, **kwargs
+                )
+                return _validated(response, etag, timestamp)
+
+            return async_wrapper
+
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            found = validators(request, *args, **kwargs)
+            if found is None:
+                return view_method(self, request, *args, **kwargs)
+
+            etag, timestamp, not_modified = _check(request, found)
+            request.etag = etag
+            response = not_modified or view_method(self, request, *args, **kwargs)
+            return _validated(response, etag, timestamp)
+
+        return wrapper
+
+    return decorator
+
+
+def _check(request, found):
+    """(etag, timestamp, 304 response or None) for a validators() result."""
+    etag, last_modified = found
+    etag = quote_etag(etag)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    return etag, timestamp, not_modified
+
+
+def _validated(response, etag, timestamp):
+    if response.status_code in (HTTP_200_OK, HTTP_304_NOT_MODIFIED):
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        # Bodies differ per Clerk user behind the same URL, and browsers
+        # must revalidate rather than guess freshness from Last-Modified.
+        patch_vary_headers(response, ["Authorization"])
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,392 @@
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+from flashquiz_proj.utils.log import log_payload
+from flashquiz_proj.utils.metrics import current_context, registry, timed
+from flashquiz_proj.utils.providers import providers
+
+from ..models import Deck, Flashcard
+from .helperfunc import (
+    WikipediaAmbiguousError,
+    WikipediaNotFoundError,
+    WikipediaTimeoutError,
+)
+from .card_cache import card_cache
+from .card_parser import parse_cards
+from .coalesce import SingleFlight
+from .tokens import estimate_tokens, fit_to_budget, token_usage
+from .wiki_cache import fetch_wikipedia_content_cached, normalize_topic
+
+logger = logging.getLogger(__name__)
+
+MODEL = "claude-haiku-4-5-20251001"
+# Bump whenever the prompts below change so cached card sets made with the
+# old prompt are no longer served.
+PROMPT_VERSION = "2"
+
+# NOTE: The static instructions go in a system block marked for prompt
+# caching; only the article itself changes from request to request.
+FLASHCARD_SYSTEM_PROMPT = """
+You are a flashcard generator. Given Wikipedia content, extract specific, testable facts and format them as flashcards.
+
+Rules:
+- ONE fact per card. Never combine two facts into one card.
+- The question must NOT contain or imply the answer.
+- The answer must state the fact directly and concisely (a number, name, date, ranking, etc.).
+- The hint must help narrow down the answer WITHOUT restating the question or giving the answer away. It should eliminate wrong guesses, not confirm the right one.
+- Avoid trivia-style "what is X" questions where the answer is just the definition of X.
+- Prefer questions that test relationships, rankings, quantities, causes, or contrasts.
+
+Bad example:
+Q: How many UN official languages is Arabic?
+A: One of six official languages
+Hint: It ranks third after English and French
+
+Good example:
+Q: How many official languages does the United Nations recognize?
+A: Six
+Hint: Arabic and Chinese were added in 1973, bringing the total up from four
+
+Generate exactly 5 flashcards. Each must be a JSON object with these fields:
+- "question": the question text
+- "answer": the answer text (a specific fact — number, name, date, etc.)
+- "hint": a hint that narrows down the answer without giving it away
+
+Return ONLY a valid JSON array. Do NOT include any extra text.
+Example:
+[
+  {"question": "Q1", "answer": "A1", "hint": "Hint1"},
+  ...
+]
+"""
+
+FLASHCARD_PROMPT = """
+Article title: {page_title}
+Article summary: {wiki_summary}
+"""
+
+SUMMARY_SYSTEM_PROMPT = """
+Create a short summary (200 characters max) with surface-level information about the topic.
+
+Return ONLY a plain string with no extra text or formatting.
+"""
+
+SUMMARY_PROMPT = """
+Provided summary: {wiki_summary}
+"""
+
+# Longest topic the generation endpoints accept (GenerationJob.topic), and the
+# longest flight key (TopicGeneration.topic_key).
+MAX_TOPIC_LENGTH = 255
+FLIGHT_KEY_LENGTH = 255
+
+# Concurrent requests for the same topic share one Wikipedia fetch and one
+# pair of LLM calls; each requester still gets its own deck.
+generation_flight = SingleFlight(window=settings.GENERATION_COALESCE_WINDOW)
+registry.register_stats("flashquiz_generation_coalescing", generation_flight.stats)
+
+# Shared by every request; the deck summary call runs here while the request
+# thread makes the flashcard call, so one generation costs one extra thread.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.ANTHROPIC_MAX_WORKERS, thread_name_prefix="anthropic"
+)
+
+
+def _timed_create(client, stage, **kwargs):
+    start = time.perf_counter()
+    try:
+        with timed(f"anthropic_{stage}"):
+            response = client.messages.create(**kwargs)
+        token_usage.record(stage, getattr(response, "usage", None))
+        return response
+    finally:
+        logger.info(
+            "Anthropic %s call took %.0f ms",
+            stage,
+            (time.perf_counter() - start) * 1000,
+        )
+
+
+def _cached_system(text):
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+
+def _fit_summary(wiki_summary, system_prompt, template):
+    """Trim the article so the whole prompt fits GENERATION_INPUT_TOKEN_BUDGET."""
+    budget = settings.GENERATION_INPUT_TOKEN_BUDGET - estimate_tokens(
+        system_prompt + template
+    )
+    trimmed = fit_to_budget(wiki_summary, budget)
+    if len(trimmed) < len(wiki_summary):
+        logger.info(
+            "Trimmed summary from ~%d to ~%d tokens",
+            estimate_tokens(wiki_summary),
+            estimate_tokens(trimmed),
+        )
+    return trimmed
+
+
+def _summary_request(wiki_summary):
+    wiki_summary = _fit_summary(wiki_summary, SUMMARY_SYSTEM_PROMPT, SUMMARY_PROMPT)
+    return {
+        "model": MODEL,
+        "max_tokens": 256,
+        "system": _cached_system(SUMMARY_SYSTEM_PROMPT),
+        "messages": [
+            {
+                "role": "user",
+                "content": SUMMARY_PROMPT.format(wiki_summary=wiki_summary),
+            }
+        ],
+    }
+
+
+def _flashcard_request(page_title, wiki_summary):
+    wiki_summary = _fit_summary(
+        wiki_summary, FLASHCARD_SYSTEM_PROMPT, FLASHCARD_PROMPT + page_title
+    )
+    return {
+        "model": MODEL,
+        "max_tokens": 1024,
+        "system": _cached_system(FLASHCARD_SYSTEM_PROMPT),
+        "messages": [
+            {
+                "role": "user",
+                "content": FLASHCARD_PROMPT.format(
+                    page_title=page_title, wiki_summary=wiki_summary
+                ),
+            }
+        ],
+    }
+
+
+def generate_flashcards(client, page_title, wiki_summary):
+    """
+    Runs the flashcard and deck-summary prompts concurrently.
+    Returns (flashcards_text, deck_summary_text). Anthropic errors
+    (APIStatusError, APIConnectionError, ...) propagate to the caller.
+    """
+    start = time.perf_counter()
+    summary_future = _executor.submit(
+        current_context().run,
+        _timed_create,
+        client,
+        "summary",
+        **_summary_request(wiki_summary),
+    )
+    try:
+        ai_response = _timed_create(
+            client, "flashcards", **_flashcard_request(page_title, wiki_summary)
+        )
+    except Exception:
+        summary_future.cancel()
+        raise
+    ai_summary = summary_future.result()
+
+    logger.info(
+        "Generation pipeline took %.0f ms", (time.perf_counter() - start) * 1000
+    )
+    return ai_response.content[0].text, ai_summary.content[0].text
+
+
+class GenerationError(Exception):
+    """
+    A generation failure with the user-facing message and HTTP status the API
+    returns for it. `retryable` marks failures a background job may retry.
+    """
+
+    def __init__(self, message, status=500, retryable=False):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.retryable = retryable
+
+
+def fetch_source(topic):
+    """Resolve the topic on Wikipedia; returns (page_title, wiki_summary)."""
+    try:
+        page_title, wiki_summary = fetch_wikipedia_content_cached(topic)
+    except WikipediaNotFoundError as e:
+        raise GenerationError(str(e), status=404)
+    except WikipediaAmbiguousError as e:
+        raise GenerationError(str(e), status=400)
+    except WikipediaTimeoutError as e:
+        raise GenerationError(str(e), status=504, retryable=True)
+
+    if not wiki_summary:
+        logger.error("No summary content found")
+        raise GenerationError("No source content found for this topic.", status=404)
+
+    logger.info("Summary length: %d characters", len(wiki_summary))
+    return page_title, wiki_summary
+
+
+def get_client():
+    return providers.get("anthropic")
+
+
+@contextmanager
+def _anthropic_errors():
+    import anthropic
+
+    try:
+        yield
+    except anthropic.APIStatusError as e:
+        logger.error("Anthropic API error: %s - %s", e.status_code, e.message)
+        raise GenerationError("AI service error. Please try again.", retryable=True)
+    except anthropic.APIConnectionError as e:
+        logger.error("Anthropic connection error: %s", e)
+        raise GenerationError(
+            "Could not reach AI service. Please try again.", retryable=True
+        )
+
+
+def generate_content(topic, fresh=False):
+    """
+    The expensive, user-independent half of generation: resolve the topic on
+    Wikipedia and prompt Claude, unless a cached card set for the same article
+    exists and `fresh` is not set. Returns {"page_title", "deck_summary",
+    "flashcards"}.
+    """
+    page_title, wiki_summary = fetch_source(topic)
+
+    if not fresh:
+        cached = cached_content(page_title, wiki_summary)
+        if cached is not None:
+            return cached
+
+    with _anthropic_errors():
+        cards_text, deck_summary = generate_flashcards(
+            get_client(), page_title, wiki_summary
+        )
+    return parsed_content(page_title, wiki_summary, cards_text, deck_summary)
+
+
+def _content(page_title, deck_summary, flashcards_data):
+    return {
+        "page_title": page_title,
+        "deck_summary": deck_summary,
+        "flashcards": flashcards_data,
+    }
+
+
+def cached_content(page_title, wiki_summary):
+    """The content a card set cached for the article makes, or None."""
+    cached = card_cache.get(page_title, wiki_summary, PROMPT_VERSION, MODEL)
+    if cached is None:
+        return None
+    logger.info("Using cached card set for %r", page_title)
+    return _content(page_title, *cached)
+
+
+def parsed_content(page_title, wiki_summary, cards_text, deck_summary):
+    """
+    Parse Claude's card reply into content and cache the card set; raises
+    GenerationError if no card could be parsed.
+    """
+    log_payload(logger, "AI raw response", cards_text)
+
+    flashcards_data = parse_cards(cards_text)
+    logger.info("Parsed %d flashcards", len(flashcards_data))
+
+    if not flashcards_data:
+        raise GenerationError("Failed to generate flashcards.", retryable=True)
+
+    card_cache.set(
+        page_title, wiki_summary, PROMPT_VERSION, MODEL, deck_summary, flashcards_data
+    )
+    return _content(page_title, deck_summary, flashcards_data)
+
+
+def flight_key(topic, fresh=False):
+    """Requests with the same key share one generate_content() run."""
+    key = normalize_topic(topic) + ("|fresh" if fresh else "")
+    if len(key) > FLIGHT_KEY_LENGTH:
+        # Keep a readable prefix; the digest keeps long keys distinct.
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        key = f"{key[:FLIGHT_KEY_LENGTH - len(digest) - 1]}#{digest}"
+    return key
+
+
+def coalesced_content(topic, fresh=False):
+    """
+    generate_content() through generation_flight. A fresh request only shares
+    a run it actually waited on, never one another process finished earlier.
+    """
+    return generation_flight.run(
+        flight_key(topic, fresh),
+        lambda: generate_content(topic, fresh=fresh),
+        window=0 if fresh else None,
+    )
+
+
+def save_deck(user_id, content):
+    """
+    Save generated content to the user's deck for that article (created if
+    needed) with one bulk insert. Returns the API payload
+    {"deck": {...}, "flashcards": [...]}.
+    """
+    with transaction.atomic():
+        # Save to the user's deck using the proper Wikipedia page title
+        deck, created = Deck.objects.get_or_create(
+            user_id=user_id,
+            title=content["page_title"],
+            defaults={"description": content["deck_summary"]},
+        )
+        flashcards = Flashcard.objects.bulk_create(
+            [
+                Flashcard(
+                    deck=deck,
+                    user_id=deck.user_id,
+                    question=card.get("question"),
+                    answer=card.get("answer"),
+                    hint=card.get("hint"),
+                )
+                for card in content["flashcards"]
+            ],
+            batch_size=settings.FLASHCARD_BULK_BATCH_SIZE,
+        )
+        Deck.touch(deck.id)
+
+    return {
+        "deck": {"id": deck.id, "title": deck.title},
+        "flashcards": [_card_payload(fc) for fc in flashcards],
+    }
+
+
+def generate_deck(user_id, topic, progress=None, fresh=False, finish=None):
+    """
+    The full topic -> deck pipeline shared by the API view and the job worker:
+    generate the content (coalesced with any concurrent request for the same
+    topic) and save the cards to the user's deck. `progress(stage)` is called
+    as each stage starts; `fresh` skips the shared card cache. `finish(result)`
+    runs in the transaction that saves the cards, so whatever it records
+    commits with them or, if it raises, not at all.
+    Returns the API payload {"deck": {...}, "flashcards": [...]}.
+    """
+    progress = progress or (lambda stage: None)
+
+    progress("generating")
+    content = coalesced_content(topic, fresh=fresh)
+
+    progress("saving")
+    with transaction.atomic():
+        result = save_deck(user_id, content)
+        if finish is not None:
+            finish(result)
+    return result
+
+
+def _card_payload(flashcard):
+    return {
+        "id": flashcard.id,
+        "question": flashcard.question,
+        "answer": flashcard.answer,
+        "hint": flashcard.hint,
+    }
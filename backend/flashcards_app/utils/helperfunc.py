@@ -1,8 +1,13 @@
-import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
-import wikipedia
-from wikipedia.exceptions import DisambiguationError, PageError
+from django.conf import settings
+
+from flashquiz_proj.utils.log import log_payload
+from flashquiz_proj.utils.metrics import current_context, timed
+from flashquiz_proj.utils.providers import providers
 
 logger = logging.getLogger(__name__)
 
@@ -15,101 +20,155 @@ class WikipediaAmbiguousError(Exception):
     pass
 
 
-def fetch_wikipedia_content(topic):
-    """
-    Fetches Wikipedia page title and summary for a given topic.
-    Returns (page_title, wiki_summary) on success.
-    Raises WikipediaNotFoundError or WikipediaAmbiguousError on failure.
-    """
-    logger.info(f"Searching for topic: {topic}")
+class WikipediaTimeoutError(Exception):
+    pass
+
+
+# Shared, bounded pool for speculative Wikipedia lookups. Lookups that lose
+# the race keep running here until they finish; their results are ignored.
+_wiki_executor = ThreadPoolExecutor(
+    max_workers=settings.WIKIPEDIA_MAX_WORKERS, thread_name_prefix="wikipedia"
+)
+
 
+def get_wikipedia():
+    return providers.get("wikipedia")
+
+
+def _submit_lookup(dependency, lookup, topic):
+    # NOTE: page.summary is a second HTTP call, so each lookup is timed as a
+    # whole rather than per wikipedia.* call.
+    def run():
+        with timed(dependency):
+            return lookup(topic)
+
+    return _wiki_executor.submit(current_context().run, run)
+
+
+def _direct_lookup(topic):
+    """Exact title lookup. Returns (title, summary), or None on PageError."""
+    wikipedia = get_wikipedia()
     try:
         wiki_page = wikipedia.page(topic, auto_suggest=False)
-        logger.info(f"Found direct match: {wiki_page.title}")
         return wiki_page.title, wiki_page.summary
+    except wikipedia.PageError:
+        return None
 
-    except PageError:
-        logger.info("No exact match, trying with auto-suggest...")
-        try:
-            wiki_page = wikipedia.page(topic, auto_suggest=True)
-            topic_words = set(topic.lower().split())
-            title_words = set(wiki_page.title.lower().split())
-            if not topic_words.intersection(title_words):
-                logger.warning(
-                    f"Auto-suggest result '{wiki_page.title}' doesn't match '{topic}'"
-                )
-                raise PageError(topic)
-            logger.info(f"Found match with auto-suggest: {wiki_page.title}")
-            return wiki_page.title, wiki_page.summary
-
-        except PageError:
-            logger.info("Auto-suggest failed, falling back to search...")
-            search_results = wikipedia.search(topic, results=5)
-            logger.info(f"Search results: {search_results}")
-
-            if not search_results:
-                raise WikipediaNotFoundError(
-                    f"No Wikipedia page found for '{topic}'."
-                )
-
-            topic_lower = topic.lower()
-            best_match = next(
-                (r for r in search_results if r.lower() == topic_lower),
-                search_results[0],
-            )
-            logger.info(f"Using best match from search: {best_match}")
 
-            try:
-                wiki_page = wikipedia.page(best_match, auto_suggest=False)
-                logger.info(f"Successfully fetched page: {wiki_page.title}")
-                return wiki_page.title, wiki_page.summary
-            except PageError:
-                raise WikipediaNotFoundError(
-                    f"Could not fetch Wikipedia content for '{topic}'."
-                )
-
-    except DisambiguationError as e:
-        logger.info(f"Disambiguation needed. Options: {e.options[:3]}")
-        try:
-            wiki_page = wikipedia.page(e.options[0], auto_suggest=False)
-            logger.info(f"Used first disambiguation option: {wiki_page.title}")
-            return wiki_page.title, wiki_page.summary
-        except (PageError, IndexError):
-            raise WikipediaAmbiguousError(
-                f"The topic '{topic}' is ambiguous. Please be more specific."
-            )
-
-
-def validate_flashcard(ai_output):
-    flashcards = []
+def _auto_suggest_lookup(topic):
+    """Auto-suggest lookup, only accepted if the title shares a word with the topic."""
+    wikipedia = get_wikipedia()
+    try:
+        wiki_page = wikipedia.page(topic, auto_suggest=True)
+    except (wikipedia.PageError, wikipedia.DisambiguationError):
+        return None
+    topic_words = set(topic.lower().split())
+    title_words = set(wiki_page.title.lower().split())
+    if not topic_words.intersection(title_words):
+        logger.warning(
+            "Auto-suggest result %r doesn't match %r", wiki_page.title, topic
+        )
+        return None
+    return wiki_page.title, wiki_page.summary
+
+
+def _search_lookup(topic):
+    """Search, prefer an exact title match, then fetch that page."""
+    wikipedia = get_wikipedia()
+    search_results = wikipedia.search(topic, results=5)
+    log_payload(logger, "Wikipedia search results", search_results)
+
+    if not search_results:
+        raise WikipediaNotFoundError(f"No Wikipedia page found for '{topic}'.")
+
+    topic_lower = topic.lower()
+    best_match = next(
+        (r for r in search_results if r.lower() == topic_lower),
+        search_results[0],
+    )
+    logger.info("Using best match from search: %s", best_match)
+
     try:
-        cleaned = ai_output.strip()
-
-        if cleaned.startswith("```"):
-            logger.info("Detected markdown code block, cleaning...")
-            lines = cleaned.split("\n")[1:]
-            if lines and lines[-1].strip() == "```":
-                lines = lines[:-1]
-            cleaned = "\n".join(lines)
-
-        logger.info(f"Cleaned JSON: {cleaned[:200]}...")
-
-        data = json.loads(cleaned)
-        if isinstance(data, list):
-            for item in data:
-                if isinstance(item, dict):
-                    flashcards.append(
-                        {
-                            "question": item.get("question", "").strip(),
-                            "answer": item.get("answer", "").strip(),
-                            "hint": item.get("hint", "").strip(),
-                        }
+        wiki_page = wikipedia.page(best_match, auto_suggest=False)
+        return wiki_page.title, wiki_page.summary
+    except wikipedia.PageError:
+        raise WikipediaNotFoundError(
+            f"Could not fetch Wikipedia content for '{topic}'."
+        )
+
+
+def _disambiguation_lookup(option):
+    """Exact lookup of a disambiguation option. Returns None if it misses too."""
+    wikipedia = get_wikipedia()
+    try:
+        wiki_page = wikipedia.page(option, auto_suggest=False)
+        return wiki_page.title, wiki_page.summary
+    except (wikipedia.PageError, wikipedia.DisambiguationError):
+        return None
+
+
+def _result_by(future, deadline, topic):
+    try:
+        return future.result(timeout=max(0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        raise WikipediaTimeoutError(
+            f"Wikipedia took too long to respond for '{topic}'."
+        )
+
+
+def fetch_wikipedia_content(topic):
+    """
+    Fetches Wikipedia page title and summary for a given topic.
+    Returns (page_title, wiki_summary) on success.
+    Raises WikipediaNotFoundError or WikipediaAmbiguousError on failure, and
+    WikipediaTimeoutError if nothing resolved within WIKIPEDIA_RESOLVE_BUDGET.
+
+    The direct lookup, auto-suggest and search all start at once instead of
+    one after another. Results are still taken in that order of preference:
+    auto-suggest only counts if the direct lookup missed, and search only if
+    both did, so the answer matches the old sequential fallback chain.
+    """
+    logger.info("Searching for topic: %s", topic)
+    wikipedia = get_wikipedia()
+    deadline = time.monotonic() + settings.WIKIPEDIA_RESOLVE_BUDGET
+
+    stages = [
+        ("direct match", _submit_lookup("wikipedia_direct", _direct_lookup, topic)),
+        (
+            "auto-suggest",
+            _submit_lookup("wikipedia_auto_suggest", _auto_suggest_lookup, topic),
+        ),
+        ("search", _submit_lookup("wikipedia_search", _search_lookup, topic)),
+    ]
+    try:
+        for name, future in stages:
+            try:
+                result = _result_by(future, deadline, topic)
+            except wikipedia.DisambiguationError as e:
+                # The direct lookup and the search's page fetch both let this
+                # through; the option is fetched within the same budget.
+                logger.info("Disambiguation needed. Options: %s", e.options[:3])
+                result = None
+                if e.options:
+                    result = _result_by(
+                        _submit_lookup(
+                            "wikipedia_disambiguation",
+                            _disambiguation_lookup,
+                            e.options[0],
+                        ),
+                        deadline,
+                        topic,
+                    )
+                if result is None:
+                    raise WikipediaAmbiguousError(
+                        f"The topic '{topic}' is ambiguous. Please be more specific."
                     )
-        logger.info(f"Successfully parsed {len(flashcards)} flashcards")
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON Decode Error: {e}")
-        logger.error(f"Failed to parse: {ai_output[:500]}")
-    except Exception as e:
-        logger.error(f"Validation error: {e}")
-
-    return flashcards
+                logger.info("Used first disambiguation option: %s", result[0])
+                return result
+            if result is not None:
+                logger.info("Found match via %s: %s", name, result[0])
+                return result
+            logger.info("No match via %s", name)
+    finally:
+        for _, future in stages:
+            future.cancel()
@@ -0,0 +1,130 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import GenerationJob
+from .generation import GenerationError, generate_deck
+
+logger = logging.getLogger(__name__)
+
+
+class JobAbandoned(Exception):
+    """The worker lost its claim on a job (timed out and was re-queued)."""
+
+
+def enqueue_generation(user_id, topic, fresh=False):
+    return GenerationJob.objects.create(user_id=user_id, topic=topic, fresh=fresh)
+
+
+async def aenqueue_generation(user_id, topic, fresh=False):
+    return await GenerationJob.objects.acreate(
+        user_id=user_id, topic=topic, fresh=fresh
+    )
+
+
+def claim_next_job():
+    """
+    Claim the oldest runnable job for this worker, or return None.
+
+    The claim is a conditional UPDATE on (pk, status, attempts), so two
+    workers racing for the same row can't both win, on any database backend.
+    """
+    now = timezone.now()
+    candidates = GenerationJob.objects.filter(
+        status=GenerationJob.PENDING, run_after__lte=now
+    ).order_by("run_after", "id")
+    for job in candidates[:5]:
+        if claim_job(job, now):
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def claim_job(job, now):
+    """Claim `job` as listed; False if another worker got to it first."""
+    return GenerationJob.objects.filter(
+        pk=job.pk, status=GenerationJob.PENDING, attempts=job.attempts
+    ).update(
+        status=GenerationJob.RUNNING,
+        stage="starting",
+        attempts=F("attempts") + 1,
+        locked_until=now + timedelta(seconds=settings.GENERATION_JOB_TIMEOUT),
+    )
+
+
+def run_job(job):
+    attempt = job.attempts
+
+    def progress(stage):
+        # Doubles as a heartbeat: extends the lease, and bails out before
+        # writing anything if the job was timed out and handed to a retry.
+        updated = GenerationJob.objects.filter(
+            pk=job.pk, status=GenerationJob.RUNNING, attempts=attempt
+        ).update(
+            stage=stage,
+            locked_until=timezone.now()
+            + timedelta(seconds=settings.GENERATION_JOB_TIMEOUT),
+        )
+        if not updated:
+            raise JobAbandoned(job.pk)
+
+    def finish(result):
+        # Runs in the transaction that saves the cards: a job is never left
+        # RUNNING with its cards saved, so a retry can't add a second set.
+        finished = GenerationJob.objects.filter(
+            pk=job.pk, status=GenerationJob.RUNNING, attempts=attempt
+        ).update(
+            status=GenerationJob.SUCCEEDED,
+            stage="done",
+            result=result,
+            deck_id=result["deck"]["id"],
+            error="",
+            locked_until=None,
+        )
+        if not finished:
+            raise JobAbandoned(job.pk)
+
+    try:
+        generate_deck(
+            job.user_id, job.topic, progress=progress, fresh=job.fresh, finish=finish
+        )
+    except JobAbandoned:
+        logger.warning("Job %s attempt %s was abandoned", job.pk, attempt)
+        return
+    except GenerationError as e:
+        fail_job(job.pk, attempt, e.message, retryable=e.retryable)
+        return
+    except Exception as e:
+        logger.exception("Job %s crashed", job.pk)
+        fail_job(job.pk, attempt, f"{type(e).__name__}: {e}", retryable=True)
+
+
+def fail_job(job_id, attempt, error, retryable=False):
+    """Re-queue the job with exponential backoff, or mark it failed for good."""
+    if retryable and attempt < settings.GENERATION_JOB_MAX_ATTEMPTS:
+        delay = settings.GENERATION_JOB_RETRY_DELAY * 2 ** (attempt - 1)
+        updates = {
+            "status": GenerationJob.PENDING,
+            "stage": "queued",
+            "run_after": timezone.now() + timedelta(seconds=delay),
+        }
+        logger.info("Job %s attempt %s failed, retrying in %ss", job_id, attempt, delay)
+    else:
+        updates = {"status": GenerationJob.FAILED, "stage": "failed"}
+        logger.info("Job %s failed after %s attempts: %s", job_id, attempt, error)
+
+    GenerationJob.objects.filter(
+        pk=job_id, status=GenerationJob.RUNNING, attempts=attempt
+    ).update(error=error, locked_until=None, **updates)
+
+
+def reap_expired_jobs():
+    """Hand back jobs whose worker died or blew through its lease."""
+    expired = GenerationJob.objects.filter(
+        status=GenerationJob.RUNNING, locked_until__lt=timezone.now()
+    ).values_list("pk", "attempts")
+    for job_id, attempt in expired:
+        fail_job(job_id, attempt, "Job timed out.", retryable=True)
@@ -0,0 +1,123 @@
+import hashlib
+import threading
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+from rest_framework.response import Response
+from rest_framework.status import HTTP_200_OK
+
+from flashquiz_proj.utils.metrics import registry
+
+from ..models import Deck
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _user_state():
+    return {"count": Count("id"), "versions": Sum("version"), "last_id": Max("id")}
+
+
+def _version(state):
+    return "{count}-{versions}-{last_id}".format(**state)
+
+
+def get_user_version(user_id):
+    """
+    A token that changes with every write to the user's decks, cards or
+    feedback: each of them moves a Deck.version (see Deck.touch), and creating
+    or deleting a deck changes the count or the highest id. It is read from
+    the database rather than kept in the cache, so a write made by any process
+    (another web worker, the job worker) is seen by every other one at once.
+    """
+    return _version(Deck.objects.filter(user_id=user_id).aggregate(**_user_state()))
+
+
+async def aget_user_version(user_id):
+    state = await Deck.objects.filter(user_id=user_id).aaggregate(**_user_state())
+    return _version(state)
+
+
+def _response_key(request, version):
+    return "response:{}:{}:{}".format(
+        request.user_details.id,
+        version,
+        hashlib.sha256(request.get_full_path().encode("utf-8")).hexdigest(),
+    )
+
+
+def _hit(data):
+    with _lock:
+        _stats["hits"] += 1
+    response = Response(data, status=HTTP_200_OK)
+    response["X-Cache"] = "HIT"
+    return response
+
+
+def _miss():
+    with _lock:
+        _stats["misses"] += 1
+
+
+def cached_response(view_method):
+    """
+    Cache successful GET responses per Clerk user. Goes under
+    @clerk_authenticated so request.user_details is set. Entries are keyed by
+    the ETag @conditional_response computed for the request, or else by
+    get_user_version(), so any write to the data behind a page makes its old
+    entry unreachable, whichever process made it. Works on sync and async
+    view methods.
+    """
+    if iscoroutinefunction(view_method):
+
+        @wraps(view_method)
+        async def async_wrapper(self, request, *args, **kwargs):
+            version = getattr(request, "etag", None) or await aget_user_version(
+                request.user_details.id
+            )
+            key = _response_key(request, version)
+            data = await cache.aget(key)
+            if data is not None:
+                return _hit(data)
+
+            _miss()
+            response = await view_method(self, request, *args, **kwargs)
+            if response.status_code == HTTP_200_OK:
+                await cache.aset(
+                    key, response.data, timeout=settings.RESPONSE_CACHE_TTL
+                )
+                response["X-Cache"] = "MISS"
+            return response
+
+        return async_wrapper
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        version = getattr(request, "etag", None) or get_user_version(
+            request.user_details.id
+        )
+        key = _response_key(request, version)
+        data = cache.get(key)
+        if data is not None:
+            return _hit(data)
+
+        _miss()
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == HTTP_200_OK:
+            cache.set(key, response.data, timeout=settings.RESPONSE_CACHE_TTL)
+            response["X-Cache"] = "MISS"
+        return response
+
+    return wrapper
+
+
+def stats():
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {**_stats, "hit_rate": _stats["hits"] / lookups if lookups else 0.0}
+
+
+registry.register_stats("flashquiz_response_cache", stats)
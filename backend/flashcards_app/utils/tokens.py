@@ -0,0 +1,76 @@
+import logging
+import threading
+
+from flashquiz_proj.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Rough English average for Claude's tokenizer; good enough for budgeting
+# without a count_tokens round trip per request.
+CHARS_PER_TOKEN = 4
+
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def fit_to_budget(text, max_tokens):
+    """
+    Trim text to about max_tokens, keeping it from the start (a Wikipedia
+    summary leads with the most important facts). Cuts at the last paragraph
+    break that keeps at least half the budget, else at the last sentence end,
+    else at the last space.
+    """
+    max_chars = max(max_tokens, 0) * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    for boundary in ("\n", ". "):
+        cut = text.rfind(boundary, max_chars // 2, max_chars)
+        if cut != -1:
+            return text[: cut + 1].rstrip()
+    cut = text.rfind(" ", 0, max_chars)
+    return text[: cut if cut != -1 else max_chars].rstrip()
+
+
+class TokenUsage:
+    """Running totals of Anthropic token usage, per stage ("flashcards", ...)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, stage, usage):
+        if usage is None:
+            return
+        values = {field: getattr(usage, field, None) or 0 for field in USAGE_FIELDS}
+        with self._lock:
+            totals = self._stages.setdefault(
+                stage, dict.fromkeys(("calls",) + USAGE_FIELDS, 0)
+            )
+            totals["calls"] += 1
+            for field, value in values.items():
+                totals[field] += value
+        logger.info(
+            "Anthropic %s usage: input=%d output=%d cache_write=%d cache_read=%d",
+            stage,
+            values["input_tokens"],
+            values["output_tokens"],
+            values["cache_creation_input_tokens"],
+            values["cache_read_input_tokens"],
+        )
+
+    def stats(self):
+        with self._lock:
+            return {stage: dict(totals) for stage, totals in self._stages.items()}
+
+
+token_usage = TokenUsage()
+registry.register_stats("flashquiz_anthropic_tokens", token_usage.stats, label="stage")
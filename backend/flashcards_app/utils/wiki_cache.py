@@ -0,0 +1,141 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from flashquiz_proj.utils.lru import LRUCache
+from flashquiz_proj.utils.metrics import registry
+
+from ..models import WikipediaCacheEntry
+from .helperfunc import (
+    WikipediaAmbiguousError,
+    WikipediaNotFoundError,
+    fetch_wikipedia_content,
+)
+
+logger = logging.getLogger(__name__)
+
+NEGATIVE_KINDS = {
+    WikipediaCacheEntry.NOT_FOUND: WikipediaNotFoundError,
+    WikipediaCacheEntry.AMBIGUOUS: WikipediaAmbiguousError,
+}
+
+
+def normalize_topic(topic):
+    return " ".join(topic.lower().split())[:255]
+
+
+class WikipediaCache:
+    """
+    Two-tier cache in front of fetch_wikipedia_content(): an in-process LRU
+    backed by the WikipediaCacheEntry table. Maps a normalized topic to
+    (page_title, summary), or to the "not found"/"ambiguous" error it raised.
+    """
+
+    def __init__(self, maxsize, ttl, negative_ttl):
+        self.memory = LRUCache(maxsize=maxsize)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self.db_hits = 0
+        self.misses = 0
+
+    def fetch(self, topic, refresh=False):
+        key = normalize_topic(topic)
+        if not refresh:
+            entry = self.memory.get(key)
+            if entry is None:
+                entry = self._load(key)
+            if entry is not None:
+                return self._unpack(entry)
+
+        with self._lock:
+            self.misses += 1
+        logger.debug("Wikipedia cache miss for %r", key)
+        try:
+            page_title, summary = fetch_wikipedia_content(topic)
+        except WikipediaNotFoundError as e:
+            self._store(key, WikipediaCacheEntry.NOT_FOUND, error=str(e))
+            raise
+        except WikipediaAmbiguousError as e:
+            self._store(key, WikipediaCacheEntry.AMBIGUOUS, error=str(e))
+            raise
+        self._store(key, WikipediaCacheEntry.FOUND, page_title, summary)
+        return page_title, summary
+
+    def purge(self, topic=None, expired_only=False):
+        entries = WikipediaCacheEntry.objects.all()
+        if topic is not None:
+            entries = entries.filter(topic_key=normalize_topic(topic))
+            self.memory.pop(normalize_topic(topic))
+        elif not expired_only:
+            self.memory.clear()
+        if expired_only:
+            entries = entries.filter(expires_at__lte=timezone.now())
+        deleted, _ = entries.delete()
+        return deleted
+
+    def stats(self):
+        memory = self.memory.stats()
+        with self._lock:
+            db_hits, misses = self.db_hits, self.misses
+        lookups = memory["hits"] + db_hits + misses
+        return {
+            "memory_hits": memory["hits"],
+            "db_hits": db_hits,
+            "misses": misses,
+            "memory_size": memory["size"],
+            "hit_rate": (memory["hits"] + db_hits) / lookups if lookups else 0.0,
+        }
+
+    def _load(self, key):
+        row = (
+            WikipediaCacheEntry.objects.filter(
+                topic_key=key, expires_at__gt=timezone.now()
+            )
+            .values_list("kind", "page_title", "summary", "error", "expires_at")
+            .first()
+        )
+        if row is None:
+            return None
+        with self._lock:
+            self.db_hits += 1
+        kind, page_title, summary, error, expires_at = row
+        entry = (kind, page_title, summary, error)
+        self.memory.set(key, entry, ttl=(expires_at - timezone.now()).total_seconds())
+        return entry
+
+    def _store(self, key, kind, page_title="", summary="", error=""):
+        ttl = self.ttl if kind == WikipediaCacheEntry.FOUND else self.negative_ttl
+        WikipediaCacheEntry.objects.update_or_create(
+            topic_key=key,
+            defaults={
+                "kind": kind,
+                "page_title": page_title,
+                "summary": summary,
+                "error": error,
+                "expires_at": timezone.now() + timedelta(seconds=ttl),
+            },
+        )
+        self.memory.set(key, (kind, page_title, summary, error), ttl=ttl)
+
+    def _unpack(self, entry):
+        kind, page_title, summary, error = entry
+        if kind in NEGATIVE_KINDS:
+            raise NEGATIVE_KINDS[kind](error)
+        return page_title, summary
+
+
+wiki_cache = WikipediaCache(
+    maxsize=settings.WIKIPEDIA_CACHE_SIZE,
+    ttl=settings.WIKIPEDIA_CACHE_TTL,
+    negative_ttl=settings.WIKIPEDIA_NEGATIVE_CACHE_TTL,
+)
+registry.register_stats("flashquiz_wikipedia_cache", wiki_cache.stats)
+
+
+def fetch_wikipedia_content_cached(topic):
+    """fetch_wikipedia_content() behind the shared two-tier cache."""
+    return wiki_cache.fetch(topic)
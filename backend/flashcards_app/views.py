@@ -1,34 +1,75 @@
+import json
 import logging
-import os
 
-import anthropic
-from django.shortcuts import get_object_or_404
-from dotenv import load_dotenv
+from adrf.views import APIView
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Avg,
+    Count,
+    FloatField,
+    Max,
+    OuterRef,
+    Prefetch,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
 from rest_framework.response import Response
 from rest_framework.status import (
     HTTP_200_OK,
     HTTP_201_CREATED,
+    HTTP_202_ACCEPTED,
     HTTP_204_NO_CONTENT,
     HTTP_400_BAD_REQUEST,
     HTTP_404_NOT_FOUND,
-    HTTP_500_INTERNAL_SERVER_ERROR,
 )
-from rest_framework.views import APIView
 
 from flashquiz_proj.utils.auth_utils import clerk_authenticated
 
-from .models import Deck, Feedback, Flashcard
-from .serializers import DeckSerializer, FeedbackSerializer, FlashcardSerializer
-from .utils.helperfunc import (
-    WikipediaAmbiguousError,
-    WikipediaNotFoundError,
-    fetch_wikipedia_content,
-    validate_flashcard,
+from .models import Deck, Feedback, Flashcard, GenerationJob
+from .pagination import CursorPaginatedMixin
+from .serializers import (
+    DeckSerializer,
+    DeckSummarySerializer,
+    DeckWithFlashcardsSerializer,
+    FeedbackSerializer,
+    FlashcardSerializer,
+    GenerationJobSerializer,
 )
+from .utils.async_generation import agenerate_deck, astream_deck
+from .utils.batch import astream_batch
+from .utils.conditional import conditional_response, path_tag
+from .utils.generation import MAX_TOPIC_LENGTH, GenerationError
+from .utils.jobs import aenqueue_generation
+from .utils.response_cache import cached_response
 
-load_dotenv()
 logger = logging.getLogger(__name__)
-client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+
+# NOTE: Every endpoint is an async view (adrf's APIView), so under ASGI a
+# request waiting on the database, Clerk or Claude doesn't hold a worker
+# thread. Queries use the async ORM; DRF serializers and paginators are sync,
+# so validating, saving and paginating go through sync_to_async.
+
+
+def _save(serializer, **kwargs):
+    """is_valid(), save() and .data in one sync_to_async call; None if invalid."""
+    if not serializer.is_valid():
+        return None
+    serializer.save(**kwargs)
+    return serializer.data
+
+
+def _topic_error(topic):
+    """The 400 message for an unusable generation topic, or None."""
+    if not isinstance(topic, str) or not topic.strip():
+        return "Topic not provided."
+    if len(topic) > MAX_TOPIC_LENGTH:
+        return f"Topic must be at most {MAX_TOPIC_LENGTH} characters."
+    return None
 
 
 class GenerateFlashcardsView(APIView):
@@ -37,198 +78,273 @@ class GenerateFlashcardsView(APIView):
     # reducing complexity in our project, but it also ties auth tightly to Clerk
     # (less flexibility than Django’s built-in system).
     @clerk_authenticated
-    def post(self, request):
+    async def post(self, request):
         topic = request.data.get("topic")
-        if not topic:
-            return Response(
-                {"error": "Topic not provided."}, status=HTTP_400_BAD_REQUEST
-            )
+        error = _topic_error(topic)
+        if error:
+            return Response({"error": error}, status=HTTP_400_BAD_REQUEST)
+
+        # NOTE: With {"async": true} the work is queued for the
+        # run_generation_worker command and the client polls the job instead
+        # of holding this worker for the whole Wikipedia + LLM round trip.
+        # {"fresh": true} skips the shared card cache and always prompts Claude.
+        fresh = bool(request.data.get("fresh"))
+        if request.data.get("async"):
+            job = await aenqueue_generation(request.user_details.id, topic, fresh=fresh)
+            return Response(GenerationJobSerializer(job).data, status=HTTP_202_ACCEPTED)
 
         try:
-            page_title, wiki_summary = fetch_wikipedia_content(topic)
-        except WikipediaNotFoundError as e:
-            return Response({"error": str(e)}, status=HTTP_404_NOT_FOUND)
-        except WikipediaAmbiguousError as e:
-            return Response({"error": str(e)}, status=HTTP_400_BAD_REQUEST)
-
-        if not wiki_summary:
-            logger.error("No summary content found")
-            return Response(
-                {"error": "No source content found for this topic."},
-                status=HTTP_404_NOT_FOUND,
-            )
-
-        logger.info(f"Summary length: {len(wiki_summary)} characters")
-
-        ai_prompt = f"""
-You are a flashcard generator. Given Wikipedia content, extract specific, testable facts and format them as flashcards.
+            result = await agenerate_deck(request.user_details.id, topic, fresh=fresh)
+        except GenerationError as e:
+            return Response({"error": e.message}, status=e.status)
 
-Rules:
-- ONE fact per card. Never combine two facts into one card.
-- The question must NOT contain or imply the answer.
-- The answer must state the fact directly and concisely (a number, name, date, ranking, etc.).
-- The hint must help narrow down the answer WITHOUT restating the question or giving the answer away. It should eliminate wrong guesses, not confirm the right one.
-- Avoid trivia-style "what is X" questions where the answer is just the definition of X.
-- Prefer questions that test relationships, rankings, quantities, causes, or contrasts.
+        return Response(result, status=HTTP_201_CREATED)
 
-Bad example:
-Q: How many UN official languages is Arabic?
-A: One of six official languages
-Hint: It ranks third after English and French
 
-Good example:
-Q: How many official languages does the United Nations recognize?
-A: Six
-Hint: Arabic and Chinese were added in 1973, bringing the total up from four
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-Generate exactly 5 flashcards. Each must be a JSON object with these fields:
-- "question": the question text
-- "answer": the answer text (a specific fact — number, name, date, etc.)
-- "hint": a hint that narrows down the answer without giving it away
 
-Article title: {page_title}
-Article summary: {wiki_summary}
+async def sse_stream(events):
+    async for event, data in events:
+        yield sse_event(event, data)
 
-Return ONLY a valid JSON array. Do NOT include any extra text.
-Example:
-[
-  {{"question": "Q1", "answer": "A1", "hint": "Hint1"}},
-  ...
-]
-"""
 
-        short_summary = f"""
-Create a short summary (200 characters max) with surface-level information about the topic.
+class GenerateFlashcardsStreamView(APIView):
+    # NOTE: Same request body as /api/generate-flashcards/, but the response
+    # is a text/event-stream: a "deck" event, one "card" event per flashcard
+    # as soon as Claude has written it (already saved to the deck), then
+    # "done" or "error". Read it with fetch() - EventSource can't POST.
+    @clerk_authenticated
+    async def post(self, request):
+        topic = request.data.get("topic")
+        error = _topic_error(topic)
+        if error:
+            return Response({"error": error}, status=HTTP_400_BAD_REQUEST)
 
-Provided summary: {wiki_summary}
+        events = astream_deck(
+            request.user_details.id, topic, fresh=bool(request.data.get("fresh"))
+        )
+        response = StreamingHttpResponse(
+            sse_stream(events), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        # Stop nginx-style proxies from buffering the stream.
+        response["X-Accel-Buffering"] = "no"
+        return response
 
-Return ONLY a plain string with no extra text or formatting.
-"""
 
-        try:
-            ai_response = client.messages.create(
-                model="claude-haiku-4-5-20251001",
-                max_tokens=1024,
-                messages=[{"role": "user", "content": ai_prompt}],
-            )
-            ai_summary = client.messages.create(
-                model="claude-haiku-4-5-20251001",
-                max_tokens=256,
-                messages=[{"role": "user", "content": short_summary}],
+class GenerateFlashcardsBatchView(APIView):
+    # NOTE: {"topics": [...], "concurrency": 4, "fresh": false} generates one
+    # deck per topic, several at a time, and streams a "topic" event for each
+    # as it finishes (in completion order, with its index), then "done".
+    @clerk_authenticated
+    async def post(self, request):
+        topics = request.data.get("topics")
+        if (
+            not isinstance(topics, list)
+            or not topics
+            or not all(isinstance(topic, str) and topic.strip() for topic in topics)
+        ):
+            return Response(
+                {"error": "topics must be a non-empty list of topics"},
+                status=HTTP_400_BAD_REQUEST,
             )
-        except anthropic.APIStatusError as e:
-            logger.error(f"Anthropic API error: {e.status_code} - {e.message}")
+        if any(len(topic) > MAX_TOPIC_LENGTH for topic in topics):
             return Response(
-                {"error": "AI service error. Please try again."},
-                status=HTTP_500_INTERNAL_SERVER_ERROR,
+                {"error": f"Topics must be at most {MAX_TOPIC_LENGTH} characters."},
+                status=HTTP_400_BAD_REQUEST,
             )
-        except anthropic.APIConnectionError as e:
-            logger.error(f"Anthropic connection error: {e}")
+        if len(topics) > settings.GENERATION_BATCH_MAX_TOPICS:
             return Response(
-                {"error": "Could not reach AI service. Please try again."},
-                status=HTTP_500_INTERNAL_SERVER_ERROR,
+                {
+                    "error": f"At most {settings.GENERATION_BATCH_MAX_TOPICS} topics per request"
+                },
+                status=HTTP_400_BAD_REQUEST,
             )
-        logger.info(f"=== AI RAW RESPONSE ===")
-        logger.info(ai_response.content[0].text)
-        logger.info(f"=== END RAW RESPONSE ===")
-
-        flashcards_data = validate_flashcard(ai_response.content[0].text)
-        logger.info(f"Validated flashcards count: {len(flashcards_data)}")
-
-        if not flashcards_data:
+        try:
+            concurrency = int(
+                request.data.get("concurrency", settings.GENERATION_BATCH_CONCURRENCY)
+            )
+        except (TypeError, ValueError):
             return Response(
-                {"error": "Failed to generate flashcards."},
-                status=HTTP_500_INTERNAL_SERVER_ERROR,
+                {"error": "concurrency must be a number"}, status=HTTP_400_BAD_REQUEST
             )
+        concurrency = max(1, min(concurrency, settings.GENERATION_BATCH_CONCURRENCY))
 
-        # Save to the user's deck using the proper Wikipedia page title
-        deck, created = Deck.objects.get_or_create(
-            user_id=request.user_details.id,
-            title=page_title,
-            defaults={"description": ai_summary.content[0].text},
+        events = astream_batch(
+            request.user_details.id,
+            topics,
+            concurrency,
+            fresh=bool(request.data.get("fresh")),
+        )
+        response = StreamingHttpResponse(
+            sse_stream(events), content_type="text/event-stream"
         )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
 
-        saved_flashcards = []
-        for card in flashcards_data:
-            fc = Flashcard.objects.create(
-                deck=deck,
-                question=card.get("question"),
-                answer=card.get("answer"),
-                hint=card.get("hint"),
-            )
-            saved_flashcards.append(
-                {
-                    "id": fc.id,
-                    "question": fc.question,
-                    "answer": fc.answer,
-                    "hint": fc.hint,
-                }
-            )
 
-        return Response(
-            {
-                "deck": {"id": deck.id, "title": deck.title},
-                "flashcards": saved_flashcards,
-            },
-            status=HTTP_201_CREATED,
+class GenerationJobDetailView(APIView):
+    @clerk_authenticated
+    async def get(self, request, job_id):
+        job = await aget_object_or_404(
+            GenerationJob, pk=job_id, user_id=request.user_details.id
         )
+        serializer = GenerationJobSerializer(job)
+        return Response(serializer.data, status=HTTP_200_OK)
+
 
+# NOTE: ETag validators. Each one costs a single indexed query on Deck's
+# version columns, so an unchanged list or deck is answered with a 304 without
+# loading cards or serializing anything.
+async def deck_list_validators(request):
+    state = await Deck.objects.filter(user_id=request.user_details.id).aaggregate(
+        count=Count("id"), last_modified=Max("updated_at"), versions=Sum("version")
+    )
+    if not state["count"]:
+        return None
+    etag = "decks-{count}-{versions}-{stamp}-{path}".format(
+        count=state["count"],
+        versions=state["versions"],
+        stamp=state["last_modified"].timestamp(),
+        path=path_tag(request),
+    )
+    # No Last-Modified: deleting the newest deck moves Max(updated_at)
+    # backwards, so If-Modified-Since alone would keep the deleted deck.
+    return etag, None
+
+
+async def deck_validators(request, pk):
+    deck = (
+        await Deck.objects.filter(pk=pk, user_id=request.user_details.id)
+        .values("version", "updated_at")
+        .afirst()
+    )
+    if deck is None:
+        return None
+    etag = f"deck-{pk}-{deck['version']}-{path_tag(request)}"
+    return etag, deck["updated_at"]
+
+
+async def flashcard_list_validators(request):
+    deck_id = request.query_params.get("deck_id")
+    if not deck_id:
+        return None
+    deck = (
+        await Deck.objects.filter(pk=deck_id, user_id=request.user_details.id)
+        .values("version")
+        .afirst()
+    )
+    if deck is None:
+        return None
+    return f"cards-{deck_id}-{deck['version']}-{path_tag(request)}", None
+
+
+class DeckListCreateView(CursorPaginatedMixin, APIView):
+    ordering = ("created_at", "id")
 
-class DeckListCreateView(APIView):
     @clerk_authenticated
-    def get(self, request):
+    @conditional_response(deck_list_validators)
+    @cached_response
+    async def get(self, request):
         # NOTE: Unlike Django's built-in auth, we're not using a User ForeignKey or DjangoRestFramework's permission_classes.
         # Clerk attaches `request.user_details` from the Clerk software development kit (SDK), which holds the Clerk user ID (a string, e.g. "user_abc123").
         # Our Deck model stores this Clerk user_id string directly in the DB,
         # so we filter on that field instead of using request.user.decks.all().
         user_id = request.user_details.id
-        decks = Deck.objects.filter(user_id=user_id)
-        serializer = DeckSerializer(decks, many=True)
-        return Response(serializer.data, status=HTTP_200_OK)
+        # NOTE: Card counts and average ratings come from correlated subqueries
+        # in the same SELECT, so the list costs one query however many decks
+        # there are (joining both tables would multiply cards by feedback).
+        card_counts = (
+            Flashcard.objects.filter(deck=OuterRef("pk"))
+            .order_by()
+            .values("deck")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        avg_ratings = (
+            Feedback.objects.filter(deck=OuterRef("pk"))
+            .order_by()
+            .values("deck")
+            .annotate(avg=Avg("rating"))
+            .values("avg")
+        )
+        decks = Deck.objects.filter(user_id=user_id).annotate(
+            flashcard_count=Coalesce(Subquery(card_counts), 0),
+            avg_feedback_rating=Subquery(avg_ratings, output_field=FloatField()),
+        )
+        return await self.apaginated_response(request, decks, DeckSummarySerializer)
 
     @clerk_authenticated
-    def post(self, request):
-        serializer = DeckSerializer(data=request.data)
-        if serializer.is_valid():
-            # Save with user_id field populated
-            serializer.save(user_id=request.user_details.id)
-            return Response(serializer.data, status=HTTP_201_CREATED)
-        return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+    async def post(self, request):
+        serializer = DeckSerializer(
+            data=request.data, context={"user_id": request.user_details.id}
+        )
+        # Save with user_id field populated
+        data = await sync_to_async(_save)(serializer, user_id=request.user_details.id)
+        if data is None:
+            return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+        return Response(data, status=HTTP_201_CREATED)
 
 
 class DeckDetailView(APIView):
     # NOTE: I use @clerk_authenticated only on view methods that map
     # to HTTP endpoints (get/post/delete). Helper methods like get_object()
     # don’t get the full request, so the decorator will throw errors.
-    def get_object(self, pk, user_id):
-        return get_object_or_404(Deck, pk=pk, user_id=user_id)
+    async def get_object(self, pk, user_id):
+        return await aget_object_or_404(Deck, pk=pk, user_id=user_id)
 
     @clerk_authenticated
-    def get(self, request, pk):
-        deck = self.get_object(pk, request.user_details.id)  # <-- use self.get_object
+    @conditional_response(deck_validators)
+    @cached_response
+    async def get(self, request, pk):
+        # NOTE: ?include=flashcards returns the deck and all of its cards in
+        # one response (two queries), so a study session needs one request.
+        if request.query_params.get("include") == "flashcards":
+            decks = Deck.objects.prefetch_related(
+                Prefetch("flashcards", queryset=Flashcard.objects.order_by("id"))
+            )
+            deck = await aget_object_or_404(
+                decks, pk=pk, user_id=request.user_details.id
+            )
+            serializer = DeckWithFlashcardsSerializer(deck)
+            return Response(serializer.data, status=HTTP_200_OK)
+
+        deck = await self.get_object(
+            pk, request.user_details.id
+        )  # <-- use self.get_object
         serializer = DeckSerializer(deck)
         return Response(serializer.data, status=HTTP_200_OK)
 
     @clerk_authenticated
-    def put(self, request, pk):
-        deck = self.get_object(pk, request.user_details.id)
-        serializer = DeckSerializer(deck, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=HTTP_200_OK)
-        return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+    async def put(self, request, pk):
+        deck = await self.get_object(pk, request.user_details.id)
+        serializer = DeckSerializer(
+            deck,
+            data=request.data,
+            partial=True,
+            context={"user_id": request.user_details.id},
+        )
+        data = await sync_to_async(_save)(serializer)
+        if data is None:
+            return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+        return Response(data, status=HTTP_200_OK)
 
     @clerk_authenticated
-    def delete(self, request, pk):
-        deck = self.get_object(pk, request.user_details.id)
-        deck.delete()
+    async def delete(self, request, pk):
+        deck = await self.get_object(pk, request.user_details.id)
+        await deck.adelete()
         return Response(status=HTTP_204_NO_CONTENT)
 
 
 # Flashcard Views
-class FlashcardListCreateView(APIView):
+class FlashcardListCreateView(CursorPaginatedMixin, APIView):
     @clerk_authenticated
-    def get(self, request):
+    @conditional_response(flashcard_list_validators)
+    @cached_response
+    async def get(self, request):
         deck_id = request.query_params.get("deck_id")
         if not deck_id:
             return Response(
@@ -236,12 +352,11 @@ class FlashcardListCreateView(APIView):
             )
 
         user_id = request.user_details.id
-        flashcards = Flashcard.objects.filter(deck__id=deck_id, deck__user_id=user_id)
-        serializer = FlashcardSerializer(flashcards, many=True)
-        return Response(serializer.data, status=HTTP_200_OK)
+        flashcards = Flashcard.objects.filter(user_id=user_id, deck_id=deck_id)
+        return await self.apaginated_response(request, flashcards, FlashcardSerializer)
 
     @clerk_authenticated
-    def post(self, request):
+    async def post(self, request):
         deck_id = request.data.get("deck_id")
         if not deck_id:
             return Response(
@@ -249,7 +364,10 @@ class FlashcardListCreateView(APIView):
             )
 
         user_id = request.user_details.id
-        deck = get_object_or_404(Deck, id=deck_id, user_id=user_id)
+        deck = await aget_object_or_404(Deck, id=deck_id, user_id=user_id)
+
+        if "cards" in request.data:
+            return await sync_to_async(self.create_batch)(request, deck)
 
         # Create a copy of the request data without deck_id since serializer doesn't expect it
         serializer_data = {
@@ -257,42 +375,89 @@ class FlashcardListCreateView(APIView):
         }
 
         serializer = FlashcardSerializer(data=serializer_data)
-        if serializer.is_valid():
+        data = await sync_to_async(_save)(serializer, deck=deck)
+        if data is None:
+            return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+        return Response(data, status=HTTP_201_CREATED)
+
+    def create_batch(self, request, deck):
+        # NOTE: Batch mode: {"deck_id": 1, "cards": [...], "atomic": false}.
+        # Valid cards are saved with one bulk insert and invalid ones are
+        # reported by index; with "atomic": true any invalid card rejects the
+        # whole batch. Sync, so the transaction stays on one thread.
+        cards = request.data.get("cards")
+        if not isinstance(cards, list) or not cards:
+            return Response(
+                {"error": "cards must be a non-empty list"},
+                status=HTTP_400_BAD_REQUEST,
+            )
+        if len(cards) > settings.FLASHCARD_BATCH_MAX_SIZE:
+            return Response(
+                {
+                    "error": f"At most {settings.FLASHCARD_BATCH_MAX_SIZE} cards per request"
+                },
+                status=HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = FlashcardSerializer(data=cards, many=True)
+        errors = []
+        if not serializer.is_valid():
+            errors = [
+                {"index": index, "errors": item_errors}
+                for index, item_errors in enumerate(serializer.errors)
+                if item_errors
+            ]
+            if request.data.get("atomic"):
+                return Response({"errors": errors}, status=HTTP_400_BAD_REQUEST)
+
+            failed = {error["index"] for error in errors}
+            valid_cards = [
+                card for index, card in enumerate(cards) if index not in failed
+            ]
+            if not valid_cards:
+                return Response({"errors": errors}, status=HTTP_400_BAD_REQUEST)
+            serializer = FlashcardSerializer(data=valid_cards, many=True)
+            serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
             serializer.save(deck=deck)
-            return Response(serializer.data, status=HTTP_201_CREATED)
-        return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+        return Response(
+            {"created": serializer.data, "errors": errors}, status=HTTP_201_CREATED
+        )
 
 
 class FlashcardDetailView(APIView):
-    def get_object(self, pk, user_id):
-        return get_object_or_404(Flashcard, pk=pk, deck__user_id=user_id)
+    async def get_object(self, pk, user_id):
+        return await aget_object_or_404(Flashcard, pk=pk, user_id=user_id)
 
     @clerk_authenticated
-    def get(self, request, pk):
-        flashcard = self.get_object(pk, request.user_details.id)
+    async def get(self, request, pk):
+        flashcard = await self.get_object(pk, request.user_details.id)
         serializer = FlashcardSerializer(flashcard)
         return Response(serializer.data, status=HTTP_200_OK)
 
     @clerk_authenticated
-    def put(self, request, pk):
-        flashcard = self.get_object(pk, request.user_details.id)
+    async def put(self, request, pk):
+        flashcard = await self.get_object(pk, request.user_details.id)
         serializer = FlashcardSerializer(flashcard, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=HTTP_200_OK)
-        return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+        data = await sync_to_async(_save)(serializer)
+        if data is None:
+            return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+        return Response(data, status=HTTP_200_OK)
 
     @clerk_authenticated
-    def delete(self, request, pk):
-        flashcard = self.get_object(pk, request.user_details.id)
-        flashcard.delete()
+    async def delete(self, request, pk):
+        flashcard = await self.get_object(pk, request.user_details.id)
+        await flashcard.adelete()
         return Response(status=HTTP_200_OK)
 
 
 # Feedback Views
-class FeedbackListCreateView(APIView):
+class FeedbackListCreateView(CursorPaginatedMixin, APIView):
+    ordering = ("created_at", "id")
+
     @clerk_authenticated
-    def get(self, request):
+    async def get(self, request):
         user_id = request.query_params.get("user_id")
         deck_id = request.query_params.get("deck_id")
 
@@ -302,40 +467,39 @@ class FeedbackListCreateView(APIView):
         if deck_id:
             feedbacks = feedbacks.filter(deck_id=deck_id)
 
-        serializer = FeedbackSerializer(feedbacks, many=True)
-        return Response(serializer.data, status=HTTP_200_OK)
+        return await self.apaginated_response(request, feedbacks, FeedbackSerializer)
 
     @clerk_authenticated
-    def post(self, request):
+    async def post(self, request):
         serializer = FeedbackSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save(user=request.user)
-            return Response(serializer.data, status=HTTP_201_CREATED)
-        return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+        data = await sync_to_async(_save)(serializer, user_id=request.user_details.id)
+        if data is None:
+            return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+        return Response(data, status=HTTP_201_CREATED)
 
 
 class FeedbackDetailView(APIView):
 
-    def get_object(self, pk):
-        return get_object_or_404(Feedback, pk=pk)
+    async def get_object(self, pk):
+        return await aget_object_or_404(Feedback, pk=pk)
 
     @clerk_authenticated
-    def get(self, request, pk):
-        feedback = self.get_object(pk)
+    async def get(self, request, pk):
+        feedback = await self.get_object(pk)
         serializer = FeedbackSerializer(feedback)
         return Response(serializer.data, status=HTTP_200_OK)
 
     @clerk_authenticated
-    def put(self, request, pk):
-        feedback = self.get_object(pk)
+    async def put(self, request, pk):
+        feedback = await self.get_object(pk)
         serializer = FeedbackSerializer(feedback, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=HTTP_200_OK)
-        return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+        data = await sync_to_async(_save)(serializer)
+        if data is None:
+            return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+        return Response(data, status=HTTP_200_OK)
 
     @clerk_authenticated
-    def delete(self, request, pk):
-        feedback = self.get_object(pk)
-        feedback.delete()
+    async def delete(self, request, pk):
+        feedback = await self.get_object(pk)
+        await feedback.adelete()
         return Response(status=HTTP_204_NO_CONTENT)
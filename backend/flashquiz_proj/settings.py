@@ -13,6 +13,102 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY")
 CLERK_ISSUER = os.getenv("CLERK_ISSUER")
 CLERK_JWKS_URL = os.getenv("CLERK_JWKS_URL")
+# Fallback lifetime (seconds) for cached JWKS keys when Clerk sends no max-age
+CLERK_JWKS_TTL = int(os.getenv("CLERK_JWKS_TTL", "300"))
+# Minimum gap between forced JWKS refreshes triggered by an unknown kid
+CLERK_JWKS_MIN_REFRESH_INTERVAL = int(
+    os.getenv("CLERK_JWKS_MIN_REFRESH_INTERVAL", "30")
+)
+# Verified-token cache; entries never outlive the token's own `exp`
+CLERK_TOKEN_CACHE_SIZE = int(os.getenv("CLERK_TOKEN_CACHE_SIZE", "4096"))
+CLERK_TOKEN_CACHE_MAX_TTL = int(os.getenv("CLERK_TOKEN_CACHE_MAX_TTL", "300"))
+# "claims" builds request.user_details from the verified token alone; "eager"
+# also fetches the Clerk user profile up front on every request
+CLERK_USER_DETAILS_MODE = os.getenv("CLERK_USER_DETAILS_MODE", "claims")
+CLERK_USER_CACHE_SIZE = int(os.getenv("CLERK_USER_CACHE_SIZE", "1024"))
+CLERK_USER_CACHE_TTL = int(os.getenv("CLERK_USER_CACHE_TTL", "300"))
+
+ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+# Threads shared by all requests for concurrent Anthropic calls
+ANTHROPIC_MAX_WORKERS = int(os.getenv("ANTHROPIC_MAX_WORKERS", "8"))
+
+# Most input tokens (roughly estimated) one Anthropic prompt may use; longer
+# Wikipedia summaries are trimmed to fit
+GENERATION_INPUT_TOKEN_BUDGET = int(os.getenv("GENERATION_INPUT_TOKEN_BUDGET", "2000"))
+
+# Seconds a finished generation stays reusable by requests for the same topic
+# that were waiting on it in other processes
+GENERATION_COALESCE_WINDOW = int(os.getenv("GENERATION_COALESCE_WINDOW", "60"))
+
+# Generated card sets are shared across users for this many seconds
+CARD_CACHE_MAX_AGE = int(os.getenv("CARD_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+
+# Batch flashcard writes: rows per INSERT, and the most cards one batch
+# request to /api/flashcards/ may carry
+FLASHCARD_BULK_BATCH_SIZE = int(os.getenv("FLASHCARD_BULK_BATCH_SIZE", "500"))
+FLASHCARD_BATCH_MAX_SIZE = int(os.getenv("FLASHCARD_BATCH_MAX_SIZE", "1000"))
+
+# Cursor pagination for list endpoints: default and maximum ?page_size
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "50"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "200"))
+
+# Background generation jobs (see `manage.py run_generation_worker`)
+GENERATION_JOB_CONCURRENCY = int(os.getenv("GENERATION_JOB_CONCURRENCY", "4"))
+GENERATION_JOB_TIMEOUT = int(os.getenv("GENERATION_JOB_TIMEOUT", "120"))
+GENERATION_JOB_MAX_ATTEMPTS = int(os.getenv("GENERATION_JOB_MAX_ATTEMPTS", "3"))
+GENERATION_JOB_RETRY_DELAY = int(os.getenv("GENERATION_JOB_RETRY_DELAY", "5"))
+GENERATION_JOB_POLL_INTERVAL = float(os.getenv("GENERATION_JOB_POLL_INTERVAL", "1"))
+
+# Wikipedia content cache: in-process LRU in front of the WikipediaCacheEntry
+# table. Negative entries (no page / ambiguous topic) expire sooner.
+WIKIPEDIA_CACHE_SIZE = int(os.getenv("WIKIPEDIA_CACHE_SIZE", "512"))
+WIKIPEDIA_CACHE_TTL = int(os.getenv("WIKIPEDIA_CACHE_TTL", str(7 * 24 * 3600)))
+WIKIPEDIA_NEGATIVE_CACHE_TTL = int(os.getenv("WIKIPEDIA_NEGATIVE_CACHE_TTL", "3600"))
+
+# Speculative Wikipedia resolution: shared lookup threads and the overall
+# time budget (seconds) for resolving one topic
+WIKIPEDIA_MAX_WORKERS = int(os.getenv("WIKIPEDIA_MAX_WORKERS", "12"))
+WIKIPEDIA_RESOLVE_BUDGET = float(os.getenv("WIKIPEDIA_RESOLVE_BUDGET", "15"))
+
+# Batch generation (/api/generate-flashcards/batch/): most topics per request,
+# topics one request generates at once, and topics generated at once across
+# all batch requests in the process
+GENERATION_BATCH_MAX_TOPICS = int(os.getenv("GENERATION_BATCH_MAX_TOPICS", "30"))
+GENERATION_BATCH_CONCURRENCY = int(os.getenv("GENERATION_BATCH_CONCURRENCY", "4"))
+GENERATION_BATCH_GLOBAL_CONCURRENCY = int(
+    os.getenv("GENERATION_BATCH_GLOBAL_CONCURRENCY", "8")
+)
+
+# Per-user cache of deck and flashcard GET responses (seconds). Entries are
+# keyed by the decks' versions in the database, so they are never stale even
+# when each process keeps its own cache; set REDIS_URL to share them between
+# workers (needs the redis package).
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# Metrics: /metrics requires this Bearer token when set (without one it is only
+# served with DEBUG on), and SERVER_TIMING adds a per-request Server-Timing
+# header (db and external calls) for the frontend
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+SERVER_TIMING = os.getenv("SERVER_TIMING", "False") == "True"
+
+# Logging: LOG_LEVEL for the root logger, LOG_LEVELS for per-logger overrides
+# ("flashcards_app=DEBUG,django.db.backends=WARNING"), LOG_FORMAT "json" for
+# one JSON object per line. Raw payloads (model output, search results) are
+# only logged at DEBUG, for a sample of calls and cut to a maximum length.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.1"))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
 
 # Fix: os.getenv returns a string, so "False" is truthy — compare explicitly
 DEBUG = os.getenv("DEBUG", "False") == "True"
@@ -33,8 +129,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",  # must be first
+    "flashquiz_proj.utils.log.RequestIdMiddleware",
+    "flashquiz_proj.utils.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",  # right after security
+    "flashquiz_proj.utils.static.AsyncWhiteNoiseMiddleware",  # right after security
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -106,17 +204,32 @@ STORAGES = {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
     }
 }
+# NOTE: The root handlers are moved behind a QueueHandler by
+# flashquiz_proj.utils.log.configure, so console I/O happens on a background
+# thread instead of inside the request.
+LOGGING_CONFIG = "flashquiz_proj.utils.log.configure"
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "formatters": {
+        "text": {
+            "format": "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s",
+        },
+        "json": {"()": "flashquiz_proj.utils.log.JsonFormatter"},
+    },
+    "filters": {
+        "request_id": {"()": "flashquiz_proj.utils.log.RequestIdFilter"},
+    },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
+            "formatter": "json" if LOG_FORMAT == "json" else "text",
+            "filters": ["request_id"],
         },
     },
     "root": {
         "handlers": ["console"],
-        "level": "DEBUG",
+        "level": LOG_LEVEL,
     },
 }
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -125,3 +238,4 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS", "http://localhost:5173").split(
     ","
 )
+CORS_EXPOSE_HEADERS = ["Server-Timing", "X-Request-ID"]
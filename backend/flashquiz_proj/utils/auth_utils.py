@@ -1,72 +1,218 @@
+import hashlib
+import logging
+import time
+from contextlib import contextmanager
 from functools import wraps
 
-import requests
-from clerk_backend_api import Clerk
+from asgiref.sync import iscoroutinefunction
 from django.http import JsonResponse
-from flashquiz_proj.settings import CLERK_ISSUER, CLERK_JWKS_URL, CLERK_SECRET_KEY
-from jose import jwk, jwt
+from flashquiz_proj.settings import (
+    CLERK_ISSUER,
+    CLERK_JWKS_MIN_REFRESH_INTERVAL,
+    CLERK_JWKS_TTL,
+    CLERK_JWKS_URL,
+    CLERK_TOKEN_CACHE_MAX_TTL,
+    CLERK_TOKEN_CACHE_SIZE,
+    CLERK_USER_CACHE_SIZE,
+    CLERK_USER_CACHE_TTL,
+    CLERK_USER_DETAILS_MODE,
+)
+from jose import jwt
 from jose.exceptions import JWTError  # use jose's error, not PyJWT's
 
+from .jwks import JWKSKeyStore
+from .lru import LRUCache
+from .metrics import registry, timed
+from .providers import providers
 
-def get_jwks():
-    response = requests.get(CLERK_JWKS_URL)
-    response.raise_for_status()
-    return response.json()
+logger = logging.getLogger(__name__)
+
+# NOTE: One key store per process. Clerk's keys change rarely, so fetching the
+# JWKS on every request only added an HTTP round trip to each API call.
+jwks_store = JWKSKeyStore(
+    CLERK_JWKS_URL,
+    default_ttl=CLERK_JWKS_TTL,
+    min_refresh_interval=CLERK_JWKS_MIN_REFRESH_INTERVAL,
+)
+
+
+# Verified token payloads keyed by sha256(token). Entries expire at the token's
+# own `exp` and are dropped whenever Clerk's signing keys change.
+token_cache = LRUCache(maxsize=CLERK_TOKEN_CACHE_SIZE)
+jwks_store.on_change(token_cache.clear)
+
+user_cache = LRUCache(maxsize=CLERK_USER_CACHE_SIZE, ttl=CLERK_USER_CACHE_TTL)
+
+registry.register_stats("flashquiz_jwks", jwks_store.stats)
+registry.register_stats("flashquiz_token_cache", token_cache.stats)
+registry.register_stats("flashquiz_clerk_user_cache", user_cache.stats)
 
 
 def get_public_keys(kid):
-    jwks = get_jwks()
-    for key in jwks["keys"]:
-        if key["kid"] == kid:
-            return jwk.construct(key)
-    raise ValueError("Invalid Token")
+    return jwks_store.get_key(kid)
 
 
-def decode_token(token):
+def get_clerk_client():
+    return providers.get("clerk")
+
+
+def get_user_profile(user_id):
+    """Clerk user lookup behind a bounded LRU+TTL cache."""
+    user = user_cache.get(user_id)
+    if user is None:
+        with timed("clerk_user"):
+            user = get_clerk_client().users.get(user_id=user_id)
+        user_cache.set(user_id, user)
+    return user
+
+
+async def aget_user_profile(user_id):
+    user = user_cache.get(user_id)
+    if user is None:
+        with timed("clerk_user"):
+            user = await get_clerk_client().users.get_async(user_id=user_id)
+        user_cache.set(user_id, user)
+    return user
+
+
+class ClerkIdentity:
+    """
+    The authenticated user as seen by the views, built from verified JWT claims.
+
+    `id` is the token's `sub` claim, which is all most views need. Any other
+    attribute (email_addresses, first_name, ...) is looked up on the Clerk
+    user profile, fetched on first access.
+    """
+
+    def __init__(self, user_id, claims):
+        self.id = user_id
+        self.claims = claims
+        self._profile = None
+
+    @property
+    def profile(self):
+        if self._profile is None:
+            self._profile = get_user_profile(self.id)
+        return self._profile
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.profile, name)
+
+
+@contextmanager
+def _token_errors():
     try:
-        headers = jwt.get_unverified_headers(token)
-        kid = headers["kid"]
-        public_key = get_public_keys(kid)
-        payload = jwt.decode(
-            token,
-            public_key.to_pem().decode("utf-8"),
-            algorithms=["RS256"],
-            issuer=CLERK_ISSUER,
-        )
-        return payload
+        yield
     except JWTError as e:
-        import logging
-
-        logger = logging.getLogger(__name__)
-        logger.error(f"JWTError: {str(e)}")
-        logger.error(f"CLERK_ISSUER: {CLERK_ISSUER}")
+        logger.error("JWTError: %s (CLERK_ISSUER: %s)", e, CLERK_ISSUER)
         raise ValueError(f"Token verification failed: {str(e)}")
     except Exception as e:
-        import logging
-
-        logger = logging.getLogger(__name__)
-        logger.error(f"Unexpected error in decode_token: {type(e).__name__}: {str(e)}")
+        logger.error("Unexpected error in decode_token: %s: %s", type(e).__name__, e)
         raise ValueError(f"Token verification failed: {str(e)}")
 
 
+def _decode(token, public_key):
+    return jwt.decode(token, public_key, algorithms=["RS256"], issuer=CLERK_ISSUER)
+
+
+def decode_token(token):
+    with _token_errors():
+        kid = jwt.get_unverified_headers(token)["kid"]
+        return _decode(token, get_public_keys(kid))
+
+
+async def adecode_token(token):
+    with _token_errors():
+        kid = jwt.get_unverified_headers(token)["kid"]
+        return _decode(token, await jwks_store.aget_key(kid))
+
+
+def _token_cache_key(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _remember(cache_key, payload):
+    ttl = CLERK_TOKEN_CACHE_MAX_TTL
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(cache_key, payload, ttl=ttl)
+    return payload
+
+
+def verify_token(token):
+    """decode_token() with a cache in front, so a repeated token skips RS256."""
+    cache_key = _token_cache_key(token)
+    payload = token_cache.get(cache_key)
+    if payload is not None:
+        return payload
+    return _remember(cache_key, decode_token(token))
+
+
+async def averify_token(token):
+    cache_key = _token_cache_key(token)
+    payload = token_cache.get(cache_key)
+    if payload is not None:
+        return payload
+    return _remember(cache_key, await adecode_token(token))
+
+
+def _bearer_token(request):
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    return auth_header.split(" ")[1]
+
+
+def _identity(payload):
+    user_id = payload.get("sub")
+    if not user_id:
+        return None, JsonResponse({"error": "User ID not found in token"}, status=404)
+    return ClerkIdentity(user_id, payload), None
+
+
 def clerk_authenticated(view_func):
+    # NOTE: Wraps sync and async view methods alike. Async views verify the
+    # token (and fetch the JWKS or Clerk profile when needed) without blocking
+    # the event loop.
+    if iscoroutinefunction(view_func):
+
+        @wraps(view_func)
+        async def async_wrapper(self, request, *args, **kwargs):
+            token = _bearer_token(request)
+            if token is None:
+                return JsonResponse({"error": "Authentication Required"}, status=401)
+            try:
+                identity, error = _identity(await averify_token(token))
+                if error is not None:
+                    return error
+                request.user_details = identity
+                if CLERK_USER_DETAILS_MODE == "eager":
+                    identity._profile = await aget_user_profile(identity.id)
+            except ValueError as e:
+                return JsonResponse({"error": str(e)}, status=401)
+            return await view_func(self, request, *args, **kwargs)
+
+        return async_wrapper
+
     @wraps(view_func)
     def wrapper(self, request, *args, **kwargs):
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
+        token = _bearer_token(request)
+        if token is None:
             return JsonResponse({"error": "Authentication Required"}, status=401)
 
-        token = auth_header.split(" ")[1]
-
         try:
-            payload = decode_token(token)
-            user_id = payload.get("sub")
-            if not user_id:
-                return JsonResponse({"error": "User ID not found in token"}, status=404)
-
-            clerk_sdk = Clerk(bearer_auth=CLERK_SECRET_KEY)
-            user_details = clerk_sdk.users.get(user_id=user_id)
-            request.user_details = user_details
+            identity, error = _identity(verify_token(token))
+            if error is not None:
+                return error
+
+            # NOTE: In "claims" mode we skip the Clerk Users API entirely; the
+            # profile is only fetched if a view reads a field beyond `id`.
+            request.user_details = identity
+            if CLERK_USER_DETAILS_MODE == "eager":
+                identity.profile
 
         except ValueError as e:
             return JsonResponse({"error": str(e)}, status=401)
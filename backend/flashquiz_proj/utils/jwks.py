@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+import weakref
+
+import requests
+from jose import jwk
+
+from .metrics import timed
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class JWKSKeyStore:
+    """
+    Process-wide cache of Clerk's signing keys, keyed by `kid`.
+
+    Keys are parsed once with jwk.construct() and reused until the TTL from
+    the JWKS response's Cache-Control header runs out. A stale store keeps
+    serving its keys while one background thread refreshes them; an unknown
+    `kid` (key rotation) triggers a single forced refresh that concurrent
+    callers wait on instead of each hitting Clerk.
+
+    Async views use aget_key(), which fetches over httpx without blocking the
+    event loop; concurrent async callers on one loop share a single fetch.
+    """
+
+    def __init__(self, url, default_ttl=300, min_refresh_interval=30, timeout=5):
+        self.url = url
+        self.default_ttl = default_ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+
+        self._keys = {}
+        self._raw_keys = None
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._background_refresh = False
+        self._listeners = []
+        self._async_refreshes = weakref.WeakKeyDictionary()
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def get_key(self, kid):
+        key, generation = self._lookup(kid)
+        if key is not None:
+            return key
+
+        # Unknown kid: either the store is empty or Clerk rotated its keys.
+        # Refresh once (unless we just did) and look again.
+        if generation == 0 or self._can_force_refresh():
+            self.refresh(generation)
+        return self._require(kid)
+
+    async def aget_key(self, kid):
+        key, generation = self._lookup(kid)
+        if key is not None:
+            return key
+
+        if generation == 0 or self._can_force_refresh():
+            await self.arefresh(generation)
+        return self._require(kid)
+
+    def refresh(self, seen_generation=None):
+        """
+        Fetch the JWKS and swap in the parsed keys. If another thread finished
+        a refresh while we were waiting for the lock, reuse its result.
+        """
+        with self._refresh_lock:
+            if seen_generation is not None and self._generation != seen_generation:
+                return
+            try:
+                with timed("jwks"):
+                    response = requests.get(self.url, timeout=self.timeout)
+                response.raise_for_status()
+                raw_keys = response.json()["keys"]
+            except Exception as e:
+                self._refresh_failed(e)
+                return
+            self._install(raw_keys, response.headers.get("Cache-Control"))
+
+    async def arefresh(self, seen_generation=None):
+        """refresh() for async callers; one fetch per event loop at a time."""
+        loop = asyncio.get_running_loop()
+        task = self._async_refreshes.get(loop)
+        if task is None:
+            task = loop.create_task(self._afetch(seen_generation))
+            self._async_refreshes[loop] = task
+            task.add_done_callback(lambda _: self._async_refreshes.pop(loop, None))
+        await asyncio.shield(task)
+
+    async def _afetch(self, seen_generation):
+        import httpx
+
+        if seen_generation is not None and self._generation != seen_generation:
+            return
+        try:
+            with timed("jwks"):
+                async with httpx.AsyncClient(timeout=self.timeout) as client:
+                    response = await client.get(self.url)
+            response.raise_for_status()
+            raw_keys = response.json()["keys"]
+        except Exception as e:
+            self._refresh_failed(e)
+            return
+        self._install(raw_keys, response.headers.get("Cache-Control"))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "keys": len(self._keys),
+                "generation": self._generation,
+            }
+
+    def on_change(self, listener):
+        """Register a callable to run whenever a refresh changes the key set."""
+        self._listeners.append(listener)
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def clear(self):
+        with self._lock:
+            self._keys = {}
+            self._raw_keys = None
+            self._expires_at = 0.0
+            self._fetched_at = 0.0
+            self._generation = 0
+
+    def _lookup(self, kid):
+        """Return (key or None, generation); a stale hit starts a refresh."""
+        with self._lock:
+            key = self._keys.get(kid)
+            stale = time.monotonic() >= self._expires_at
+            generation = self._generation
+            if key is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if key is not None and stale:
+            self._refresh_in_background(generation)
+        return key, generation
+
+    def _require(self, kid):
+        with self._lock:
+            key = self._keys.get(kid)
+        if key is None:
+            raise ValueError("Invalid Token")
+        return key
+
+    def _refresh_failed(self, error):
+        with self._lock:
+            self.refresh_errors += 1
+        logger.error("JWKS refresh failed: %s: %s", type(error).__name__, error)
+        if not self._keys:
+            raise ValueError(f"Could not load signing keys: {error}")
+
+    def _install(self, raw_keys, cache_control):
+        try:
+            keys = {key["kid"]: jwk.construct(key) for key in raw_keys}
+        except Exception as e:
+            self._refresh_failed(e)
+            return
+        ttl = self._parse_max_age(cache_control)
+        now = time.monotonic()
+        with self._lock:
+            changed = raw_keys != self._raw_keys
+            self._raw_keys = raw_keys
+            self._keys = keys
+            self._fetched_at = now
+            self._expires_at = now + ttl
+            self._generation += 1
+            self.refreshes += 1
+        logger.debug("Loaded %d JWKS keys (ttl=%ss)", len(keys), ttl)
+        if changed:
+            for listener in self._listeners:
+                listener()
+
+    def _can_force_refresh(self):
+        # Rate-limit forced refreshes so a flood of tokens with a bogus kid
+        # can't turn into a flood of requests to Clerk.
+        return time.monotonic() - self._fetched_at >= self.min_refresh_interval
+
+    def _refresh_in_background(self, generation):
+        with self._lock:
+            if self._background_refresh:
+                return
+            self._background_refresh = True
+
+        def run():
+            try:
+                self.refresh(generation)
+            except ValueError:
+                pass
+            finally:
+                with self._lock:
+                    self._background_refresh = False
+
+        threading.Thread(target=run, name="jwks-refresh", daemon=True).start()
+
+    def _parse_max_age(self, cache_control):
+        if cache_control and "no-store" not in cache_control:
+            match = MAX_AGE_RE.search(cache_control)
+            if match:
+                return int(match.group(1))
+        return self.default_ttl
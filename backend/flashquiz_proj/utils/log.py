@@ -0,0 +1,219 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.config
+import queue
+import random
+import re
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+_request_id = contextvars.ContextVar("request_id", default="-")
+
+# Ids we accept from X-Request-ID; anything else gets a fresh uuid, so a
+# client can't put arbitrary text or megabytes into every log line.
+REQUEST_ID_RE = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+_listener = None
+
+
+def get_request_id():
+    return _request_id.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps each record with the id of the request that logged it."""
+
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = _request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    QueueHandler that renders the message and traceback before queueing, so
+    records are safe to hand to another thread, but leaves the layout to the
+    handlers behind the listener.
+    """
+
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure(config):
+    """
+    LOGGING_CONFIG hook: apply the LOGGING dict and the LOG_LEVELS overrides,
+    then move the root handlers behind a queue drained by one background
+    thread, so a request that logs only pays for a queue put, never for
+    console or file I/O. Calling it again (a LOGGING override in tests, a
+    settings reload) replaces the listener along with the handlers.
+    """
+    global _listener
+    if _listener is not None:
+        # Drain what's queued into the old handlers before dictConfig closes
+        # them; the new ones get a listener of their own below.
+        _listener.stop()
+        atexit.unregister(_listener.stop)
+        _listener = None
+
+    logging.config.dictConfig(config)
+    for name, level in logger_levels(settings.LOG_LEVELS):
+        logging.getLogger(name).setLevel(level)
+
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    if not handlers:
+        return
+    for handler in handlers:
+        root.removeHandler(handler)
+
+    records = queue.SimpleQueue()
+    queue_handler = BackgroundQueueHandler(records)
+    # Filters run in the thread that logs, where the request id is still set.
+    queue_handler.addFilter(RequestIdFilter())
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def logger_levels(spec):
+    """Parse "name=LEVEL,name=LEVEL" (LOG_LEVELS) into (name, level) pairs."""
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            yield name.strip(), level.strip().upper()
+
+
+def log_payload(logger, label, payload):
+    """
+    Log a large payload (raw model output, search results) at DEBUG, for
+    LOG_PAYLOAD_SAMPLE_RATE of calls and cut to LOG_PAYLOAD_MAX_CHARS.
+    Nothing is formatted unless the record will actually be written.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    if random.random() >= settings.LOG_PAYLOAD_SAMPLE_RATE:
+        return
+    text = payload if isinstance(payload, str) else repr(payload)
+    limit = settings.LOG_PAYLOAD_MAX_CHARS
+    if len(text) > limit:
+        text = f"{text[:limit]}... [{len(text) - limit} more chars]"
+    logger.debug("%s: %s", label, text)
+
+
+def _incoming_request_id(request):
+    request_id = request.headers.get("X-Request-ID", "")
+    if REQUEST_ID_RE.fullmatch(request_id):
+        return request_id
+    return uuid.uuid4().hex
+
+
+def _in_context(context, iterator):
+    iterator = iter(iterator)
+    while True:
+        try:
+            yield context.run(next, iterator)
+        except StopIteration:
+            return
+
+
+async def _awith_request_id(request_id, iterator):
+    # An async body is iterated by the server's task, outside this request's
+    # context, so the id is set around each chunk instead.
+    iterator = aiter(iterator)
+    while True:
+        token = _request_id.set(request_id)
+        try:
+            chunk = await anext(iterator)
+        except StopAsyncIteration:
+            return
+        finally:
+            _request_id.reset(token)
+        yield chunk
+
+
+def _keep_request_id(response, request_id):
+    # Async views stream async bodies, whichever server is running them.
+    if response.is_async:
+        response.streaming_content = _awith_request_id(
+            request_id, response.streaming_content
+        )
+    else:
+        response.streaming_content = _in_context(
+            contextvars.copy_context(), response.streaming_content
+        )
+
+
+class RequestIdMiddleware:
+    """
+    Gives each request an id, taken from X-Request-ID when the proxy sets a
+    well-formed one (REQUEST_ID_RE), attached to every log record and echoed
+    back in the response headers.
+    Streamed responses keep the id while the body is generated.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_id = _incoming_request_id(request)
+        token = _request_id.set(request_id)
+        try:
+            response = self.get_response(request)
+            if response.streaming:
+                _keep_request_id(response, request_id)
+        finally:
+            _request_id.reset(token)
+        response["X-Request-ID"] = request_id
+        return response
+
+    async def __acall__(self, request):
+        request_id = _incoming_request_id(request)
+        token = _request_id.set(request_id)
+        try:
+            response = await self.get_response(request)
+            if response.streaming:
+                _keep_request_id(response, request_id)
+        finally:
+            _request_id.reset(token)
+        response["X-Request-ID"] = request_id
+        return response
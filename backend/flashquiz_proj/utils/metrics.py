@@ -0,0 +1,316 @@
+import contextvars
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in sorted(values.items()):
+            labels = _format_labels(zip(self.labelnames, key))
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for key, series in sorted(snapshot.items()):
+            labels = list(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                bucket = _format_labels(labels + [("le", _format_value(bound))])
+                yield f"{self.name}_bucket{bucket} {count}"
+            yield f"{self.name}_count{_format_labels(labels)} {series[-2]}"
+            yield f"{self.name}_sum{_format_labels(labels)} {series[-1]!r}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, *args, **kwargs):
+        metric = Counter(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs):
+        metric = Histogram(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, prefix, stats, label=None):
+        """
+        Export a component's stats() dict as gauges named `prefix_<key>`, read
+        at scrape time. With `label`, stats() returns {label value: {key:
+        number}} (e.g. token usage per stage).
+        """
+        self._collectors.append((prefix, stats, label))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, stats, label in self._collectors:
+            groups = stats().items() if label else [(None, stats())]
+            gauges = {}
+            for group, values in groups:
+                for key, value in values.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        labels = [(label, group)] if label else []
+                        gauges.setdefault(key, []).append((labels, value))
+            for key, samples in gauges.items():
+                name = f"{prefix}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in samples:
+                    lines.append(
+                        f"{name}{_format_labels(labels)} {_format_value(value)}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+# NOTE: Recording is a dict update under a short lock, so nothing on the
+# request path waits on I/O. Each worker process keeps its own numbers, so
+# scrape every process to see the whole deployment.
+registry = Registry()
+
+request_duration = registry.histogram(
+    "flashquiz_request_duration_seconds",
+    "Time spent in a view, until the response is returned.",
+    ("view", "method", "status"),
+)
+request_queries = registry.histogram(
+    "flashquiz_request_db_queries",
+    "Database queries run per request.",
+    ("view",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+request_db_duration = registry.histogram(
+    "flashquiz_request_db_duration_seconds",
+    "Time spent in database queries per request.",
+    ("view",),
+)
+dependency_duration = registry.histogram(
+    "flashquiz_dependency_duration_seconds",
+    "Time spent in calls to external services.",
+    ("dependency", "outcome"),
+)
+
+
+class RequestTimings:
+    """What one request spent its time on; becomes the Server-Timing header."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        # (dependency, seconds); list.append is safe across threads
+        self.dependencies = []
+
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+def current_context():
+    """
+    Context to run executor work in (`executor.submit(ctx.run, fn, ...)`) so
+    dependency timings from worker threads count toward the request.
+    """
+    return contextvars.copy_context()
+
+
+@contextmanager
+def timed(dependency):
+    """Time a call to an external service (JWKS, Clerk, Wikipedia, Anthropic)."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        elapsed = time.perf_counter() - start
+        dependency_duration.observe(elapsed, dependency=dependency, outcome=outcome)
+        timings = _current.get()
+        if timings is not None:
+            timings.dependencies.append((dependency, elapsed))
+
+
+def _server_timing(timings, total):
+    totals = {}
+    for dependency, elapsed in timings.dependencies:
+        totals[dependency] = totals.get(dependency, 0.0) + elapsed
+    parts = [
+        f"total;dur={total * 1000:.1f}",
+        f'db;dur={timings.db_time * 1000:.1f};desc="{timings.queries} queries"',
+    ]
+    parts += [
+        f"{dependency};dur={elapsed * 1000:.1f}"
+        for dependency, elapsed in sorted(totals.items())
+    ]
+    return ", ".join(parts)
+
+
+def _count_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.db_time += time.perf_counter() - start
+
+
+def _watch(conn):
+    if _count_query not in conn.execute_wrappers:
+        conn.execute_wrappers.append(_count_query)
+
+
+def _watch_new_connection(sender, connection, **kwargs):
+    _watch(connection)
+
+
+# NOTE: Async views run their queries on sync_to_async threads, each with its
+# own connection, so the counter is installed on every connection and finds
+# the request through the context variable rather than being wrapped around
+# the view on one thread's connection.
+connection_created.connect(_watch_new_connection)
+
+
+class MetricsMiddleware:
+    """
+    Records latency, query count and query time per view. With
+    SERVER_TIMING = True the breakdown (db plus each external dependency) is
+    also sent in a Server-Timing header.
+
+    For streamed responses the latency covers the view up to the first byte,
+    not the whole stream.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # The connection may predate this module (e.g. under the test runner).
+        _watch(connection)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._record(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._record(request, response, timings, time.perf_counter() - start)
+
+    def _record(self, request, response, timings, total):
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match and match.view_name else "unmatched"
+        request_duration.observe(
+            total, view=view, method=request.method, status=response.status_code
+        )
+        request_queries.observe(timings.queries, view=view)
+        request_db_duration.observe(timings.db_time, view=view)
+
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = _server_timing(timings, total)
+        return response
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint; requires METRICS_TOKEN as a Bearer token if
+    set. Without a token it is only served with DEBUG on, so a production
+    deploy doesn't publish its latencies and cache stats by accident.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}".encode()
+        # Constant time; bytes, since compare_digest rejects non-ASCII str.
+        supplied = request.headers.get("Authorization", "").encode()
+        if not hmac.compare_digest(supplied, expected):
+            return HttpResponse("Unauthorized", status=401)
+    elif not settings.DEBUG:
+        return HttpResponse("Not Found", status=404)
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,72 @@
+import threading
+
+from django.conf import settings
+
+
+class ProviderRegistry:
+    """
+    Process-wide clients for external services, built on first use.
+
+    A factory does its own imports, so a worker, migration or management
+    command that never talks to a service never pays for importing its SDK.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory):
+        self._factories[name] = factory
+
+    def get(self, name):
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._instances[name] = self._factories[name]()
+        return instance
+
+    def reset(self, name=None):
+        """Drop a built client (or all of them); the next get() rebuilds it."""
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+            else:
+                self._instances.pop(name, None)
+
+    def loaded(self):
+        return sorted(self._instances)
+
+
+def _anthropic():
+    import anthropic
+
+    return anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+
+
+def _anthropic_async():
+    import anthropic
+
+    return anthropic.AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
+
+
+def _clerk():
+    from clerk_backend_api import Clerk
+
+    return Clerk(bearer_auth=settings.CLERK_SECRET_KEY)
+
+
+def _wikipedia():
+    # The wikipedia package is a module-level API, so the module is the client.
+    import wikipedia
+
+    return wikipedia
+
+
+providers = ProviderRegistry()
+providers.register("anthropic", _anthropic)
+providers.register("anthropic_async", _anthropic_async)
+providers.register("clerk", _clerk)
+providers.register("wikipedia", _wikipedia)
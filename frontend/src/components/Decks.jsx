@@ -1,6 +1,6 @@
 import { useNavigate } from "react-router-dom";
 
-const Decks = ({ decks, deleteDeck, selectDeck }) => {
+const Decks = ({ decks, deleteDeck, selectDeck, hasMore, loadMore, loadingMore }) => {
   const navigate = useNavigate();
 
   const handleEdit = async (deck) => {
@@ -51,6 +51,18 @@ const Decks = ({ decks, deleteDeck, selectDeck }) => {
           </div>
         ))
       )}
+      {/* Decks are loaded a page at a time */}
+      {hasMore && (
+        <div className="text-center">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="bg-gradient-to-r from-gray-600 to-gray-700 text-white px-6 py-2 rounded-lg hover:from-gray-700 hover:to-gray-800 transition-all duration-200 shadow-md hover:shadow-lg font-medium disabled:opacity-50"
+          >
+            {loadingMore ? "Loading..." : "Load more decks"}
+          </button>
+        </div>
+      )}
     </div>
   );
 };
@@ -1,7 +1,7 @@
 import { Outlet } from "react-router-dom";
 import { useState, useEffect } from "react";
 import { useAuth } from "@clerk/clerk-react";
-import api from "../services/api";
+import api, { getPage, streamEvents } from "../services/api";
 
 //NOTE: In this project, I wanted a single source of truth for decks, and flashcards so I created a layout component to hold the state
 //reason being that I want to share this state between multiple components (e.g. the DecksPage and the StudyModePage), and use my App.jsx for routing
@@ -10,6 +10,9 @@ const DecksLayout = () => {
 
   // This is where we store our decks, the currently selected deck, and the flashcards
   const [decks, setDecks] = useState([]);
+  //URL of the next page of decks, or null once everything is loaded
+  const [decksNext, setDecksNext] = useState(null);
+  const [loadingMoreDecks, setLoadingMoreDecks] = useState(false);
   const [selectedDeck, setSelectedDeck] = useState(null);
   const [flashcards, setFlashcards] = useState([]);
   const [deleting, setDeleting] = useState(false);
@@ -23,15 +26,39 @@ const DecksLayout = () => {
     try {
       //Clerk manages authentication for us.  Here we ask Clerk for the user's token
       const token = await getToken();
-      const res = await api.get("/api/decks/", {
+      //Only the first page; the rest is loaded when the user asks for more
+      const page = await getPage("/api/decks/", {
         headers: { Authorization: `Bearer ${token}` },
       });
-      setDecks(res.data);
+      setDecks(page.results);
+      setDecksNext(page.next);
     } catch (err) {
       console.error("Error fetching decks:", err);
     }
   };
 
+  //Appends the next page of decks to the ones already shown
+  const loadMoreDecks = async () => {
+    if (!decksNext || loadingMoreDecks) return;
+    setLoadingMoreDecks(true);
+    try {
+      const token = await getToken();
+      const page = await getPage(decksNext, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      //A deck created meanwhile may already be in the list, so skip duplicates
+      setDecks((prev) => [
+        ...prev,
+        ...page.results.filter((deck) => !prev.some((d) => d.id === deck.id)),
+      ]);
+      setDecksNext(page.next);
+    } catch (err) {
+      console.error("Error fetching more decks:", err);
+    } finally {
+      setLoadingMoreDecks(false);
+    }
+  };
+
   //Select deck keeps track of the currently selected deck for when we want to edit/delete/study
   const selectDeck = async (deck) => {
     //Resets to no deck selected
@@ -44,13 +71,15 @@ const DecksLayout = () => {
     setSelectedDeck(deck);
 
     try {
-      //Fetch flashcards tied to the selected deck
+      //Fetch the deck together with its flashcards in a single request
       const token = await getToken();
-      const res = await api.get("/api/flashcards/", {
-        params: { deck_id: deck.id },
+      const res = await api.get(`/api/decks/${deck.id}/`, {
+        params: { include: "flashcards" },
         headers: { Authorization: `Bearer ${token}` },
       });
-      setFlashcards(res.data);
+      const { flashcards: cards, ...deckDetails } = res.data;
+      setSelectedDeck({ ...deck, ...deckDetails });
+      setFlashcards(cards);
     } catch (err) {
       console.error("Error fetching flashcards:", err);
       setFlashcards([]);
@@ -100,21 +129,31 @@ const DecksLayout = () => {
     //NOTE: Here we are sending the topic to the backend to:
     //1. Retrieve information about the topic from wikipediaAPI
     //2. Generate flashcards based on the topic with OpenAI
+    //The stream endpoint sends the deck first and then each flashcard as soon
+    //as it is written, so cards show up one by one instead of all at the end.
     try {
       const token = await getToken();
-      const res = await api.post(
-        "/api/generate-flashcards/",
+      let failed = false;
+      await streamEvents(
+        "/api/generate-flashcards/stream/",
         { topic },
         { headers: { Authorization: `Bearer ${token}` } },
+        (event, data) => {
+          if (event === "deck") {
+            setDecks((prev) =>
+              prev.some((d) => d.id === data.id) ? prev : [...prev, data],
+            );
+            setSelectedDeck(data);
+            setFlashcards([]);
+          } else if (event === "card") {
+            setFlashcards((prev) => [...prev, data]);
+          } else if (event === "error") {
+            failed = true;
+            console.error("Error generating AI deck:", data.error);
+          }
+        },
       );
-
-      //The AI returns a deck, along with an array of flashcards
-      const newDeck = res.data.deck;
-      const newFlashcards = res.data.flashcards;
-
-      //Finally once we have the deck and flashcards, we add them to our state
-      setDecks((prev) => [...prev, newDeck]);
-      setFlashcards(newFlashcards);
+      if (failed) alert("Failed to generate AI deck. Please try again.");
     } catch (err) {
       console.error("Error generating AI deck:", err);
       alert("Failed to generate AI deck. Please try again.");
@@ -205,6 +244,9 @@ const DecksLayout = () => {
       context={{
         aiConstructedDeck,
         decks,
+        hasMoreDecks: Boolean(decksNext),
+        loadMoreDecks,
+        loadingMoreDecks,
         selectedDeck,
         createDeck,
         flashcards,
@@ -6,6 +6,9 @@ import Decks from "../components/Decks.jsx";
 const DecksPage = () => {
   const {
     decks,
+    hasMoreDecks,
+    loadMoreDecks,
+    loadingMoreDecks,
     fetchDecks,
     deleteDeck,
     deleting,
@@ -141,8 +144,16 @@ const DecksPage = () => {
           <div className="bg-white dark:bg-gray-800 rounded-xl shadow-md p-6 border border-gray-200 dark:border-gray-700">
             <h2 className="text-2xl font-semibold text-gray-800 dark:text-gray-100 mb-6">
               Total Decks: {decks.length}
+              {hasMoreDecks && "+"}
             </h2>
-            <Decks decks={decks} deleteDeck={deleteDeck} selectDeck={selectDeck} />
+            <Decks
+              decks={decks}
+              deleteDeck={deleteDeck}
+              selectDeck={selectDeck}
+              hasMore={hasMoreDecks}
+              loadMore={loadMoreDecks}
+              loadingMore={loadingMoreDecks}
+            />
           </div>
         </div>
       </div>
@@ -17,8 +17,9 @@ const StudyModePage = () => {
 
   useEffect(() => {
     if (!selectedDeck || selectedDeck.id !== Number(deckId)) {
+      //The deck may be on a page of the list that hasn't been loaded yet
       const deck = decks.find((d) => d.id === Number(deckId));
-      if (deck) selectDeck(deck);
+      selectDeck(deck || { id: Number(deckId) });
     }
   }, [deckId, selectedDeck, decks, selectDeck]);
 
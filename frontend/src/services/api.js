@@ -4,4 +4,43 @@ const api = axios.create({
   baseURL: import.meta.env.VITE_API_BASE || "http://localhost:8000",
 });
 
+//NOTE: List endpoints are cursor-paginated ({ next, previous, results }).
+//This loads one page; pass the `next` URL it returns to load the page after.
+export const getPage = async (url, config = {}) => {
+  const res = await api.get(url, config);
+  return { results: res.data.results, next: res.data.next };
+};
+
+//NOTE: Reads a text/event-stream response from a POST endpoint and calls
+//onEvent(event, data) for each server-sent event as it arrives.
+//EventSource only supports GET, so this uses fetch() and reads the body stream.
+export const streamEvents = async (url, body, config = {}, onEvent) => {
+  const res = await fetch(`${api.defaults.baseURL}${url}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", ...config.headers },
+    body: JSON.stringify(body),
+  });
+  if (!res.ok) throw new Error(`Request failed with status ${res.status}`);
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const messages = buffer.split("\n\n");
+    buffer = messages.pop();
+    for (const message of messages) {
+      let event = "message";
+      let data = "";
+      for (const line of message.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      onEvent(event, data ? JSON.parse(data) : null);
+    }
+  }
+};
+
 export default api;